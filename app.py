@@ -1,5 +1,7 @@
 import os
 import logging
+import threading
+import time
 
 from flask import Flask, jsonify, request, render_template
 from flask_sqlalchemy import SQLAlchemy
@@ -16,37 +18,99 @@ class Base(DeclarativeBase):
 
 
 db = SQLAlchemy(model_class=Base)
-# Create the app
-app = Flask(__name__)
-app.secret_key = os.environ.get("SESSION_SECRET", "valorant-esports-api-dev-key")
-app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
-
-# Configure the database
-app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL")
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
-
-# Initialize the app with the extension
-db.init_app(app)
-
-with app.app_context():
-    # Import models
-    from models import Player, Team, Match, MapStatistic, Event
-    
-    # Create tables
-    db.create_all()
-    
+
+# Process role: "all" serves the API and runs the scheduler (single-process
+# deployments), "web" only serves the API and never imports the scrapers;
+# "worker" and "script" leave scraping to scripts/scraper_worker.py or the script
+APP_ROLE = os.environ.get("APP_ROLE", "all")
+
+# Background services are started at most once per process
+_services_started = False
+_services_lock = threading.Lock()
+
+
+def create_app():
+    """
+    Create and configure the Flask app.
+
+    Creating the app does no database or network I/O: the schema is synced
+    by the explicit `flask sync-schema` step and the scheduler is started
+    by start_background_services, so importing the app is cheap and safe in
+    scripts, serverless functions and a preloading gunicorn master.
+
+    Returns:
+        Flask: The configured app
+    """
+    started = time.monotonic()
+
+    app = Flask(__name__)
+    app.secret_key = os.environ.get("SESSION_SECRET", "valorant-esports-api-dev-key")
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
+
+    # Configure the database
+    app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL")
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        "pool_recycle": 300,
+        "pool_pre_ping": True,
+    }
+
+    # Initialize the app with the extension
+    db.init_app(app)
+
+    # Web routes and error handlers
+    app.add_url_rule('/', 'home', home)
+    app.add_url_rule('/docs', 'docs', docs)
+    app.register_error_handler(404, not_found_error)
+    app.register_error_handler(500, internal_error)
+
+    # API routes; the scrapers they queue work for are only imported by the workers
+    from app_routes import register_routes
+    register_routes(app)
+
+    @app.cli.command('sync-schema')
+    def sync_schema_command():
+        """Create tables and add indexes/columns missing from older databases."""
+        from utils.schema import sync_schema
+        sync_schema()
+
+    if APP_ROLE == 'all':
+        # Single-process deployments start the scheduler in the process serving requests
+        @app.before_request
+        def start_services():
+            start_background_services()
+
+    app.config["BOOT_SECONDS"] = time.monotonic() - started
+    return app
+
+
+def start_background_services():
+    """
+    Start campaigning for scheduler leadership, once per process, when this
+    process runs the scheduler (APP_ROLE=all). Called after gunicorn forks a
+    worker, or by the first request, never at import time.
+
+    Returns:
+        bool: True if the services were started by this call
+    """
+    global _services_started
+
+    if APP_ROLE != 'all' or _services_started:
+        return False
+
+    with _services_lock:
+        if _services_started:
+            return False
+        _services_started = True
+
     # Import and setup scheduler
     from utils.scheduling import start_scheduler
-    import threading
-    
-    # Start the scheduler for periodic data updates in a background thread
-    scheduler_thread = threading.Thread(target=start_scheduler)
-    scheduler_thread.daemon = True  # Make thread a daemon so it exits when main thread exits
-    scheduler_thread.start()
+    from utils.leader import start_leader_election
+
+    # Every process campaigns for leadership; only the leader starts the
+    # scheduler, and another process takes over if the leader dies
+    start_leader_election(start_scheduler)
+    return True
 
 
 # API Rate limiting (simple implementation)
@@ -79,11 +143,9 @@ def check_rate_limit():
 
 
 # Web routes
-@app.route('/')
 def home():
     return render_template('index.html')
 
-@app.route('/docs')
 def docs():
     return render_template('docs.html')
 
@@ -309,11 +371,12 @@ def docs():
 
 
 # Error handlers
-@app.errorhandler(404)
 def not_found_error(error):
     return jsonify({"error": "Resource not found"}), 404
 
-@app.errorhandler(500)
 def internal_error(error):
     logger.error(f"Server error: {str(error)}")
     return jsonify({"error": "Internal server error"}), 500
+
+
+app = create_app()
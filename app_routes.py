@@ -1,7 +1,12 @@
+import hashlib
+import hmac
 import logging
-from flask import jsonify, request
+import os
+from flask import current_app, jsonify, request
+from sqlalchemy import or_, and_
 from models import Team, Player, Match, MapStatistic, Event
-from utils.db_operations import update_specific_team, upsert_event
+from utils.background_refresh import enqueue_refresh, is_team_stale, is_event_stale
+from utils.access_tracking import record_access
 from datetime import datetime, timedelta
 import json
 
@@ -14,6 +19,9 @@ request_count = {}
 RATE_LIMIT = 60  # Requests per minute
 RATE_WINDOW = 60  # Window size in seconds
 
+# Token required by admin endpoints (X-Admin-Token header); admin endpoints are disabled when unset
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
 def register_routes(app):
     """
     Register all API routes with the Flask app
@@ -35,6 +43,15 @@ def register_routes(app):
     app.add_url_rule('/api/events/<event_id>', 'get_event_detail', get_event_detail, methods=['GET'])
     app.add_url_rule('/api/search/teams', 'search_teams', search_teams, methods=['GET'])
     app.add_url_rule('/api/search/players', 'search_players', search_players, methods=['GET'])
+    app.add_url_rule('/api/status/crawls', 'get_crawl_status', get_crawl_status, methods=['GET'])
+    app.add_url_rule('/api/status/process', 'get_process_status', get_process_status, methods=['GET'])
+    app.add_url_rule('/api/status/freshness', 'get_freshness_status', get_freshness_status, methods=['GET'])
+    app.add_url_rule('/api/refresh/<kind>/<path:target_id>', 'request_refresh', request_refresh, methods=['POST'])
+    app.add_url_rule('/api/jobs/<int:job_id>', 'get_refresh_job', get_refresh_job, methods=['GET'])
+    app.add_url_rule('/api/admin/failures', 'get_failures', get_failures, methods=['GET'])
+    app.add_url_rule('/api/admin/failures/<int:failure_id>/replay', 'replay_failure', replay_failure, methods=['POST'])
+    app.add_url_rule('/api/admin/job-runs', 'get_job_runs', get_job_runs, methods=['GET'])
+    app.add_url_rule('/api/admin/metrics', 'get_job_metrics', get_job_metrics, methods=['GET'])
 
 def check_rate_limit():
     """
@@ -62,21 +79,74 @@ def check_rate_limit():
     return True
 
 
-# Web routes - commented out to avoid conflict with app.py
-# @app.route('/')
-# def home_route():
-#     from flask import render_template
-#     return render_template('index.html')
+def stale_response(payload, stale, refresh_job=None, status=200):
+    """
+    Build a JSON response flagging data that is older than it should be
+    
+    Args:
+        payload: Response data
+        stale (bool): True if the data is stale or incomplete
+        refresh_job (ScrapeJob, optional): Background refresh queued for the data
+        status (int): HTTP status code
+        
+    Returns:
+        Response: JSON response with X-Data-Stale / X-Refresh-Queued / X-Refresh-Job /
+            X-Refresh-Job-Url headers
+    """
+    response = jsonify(payload)
+    response.status_code = status
+    response.headers['X-Data-Stale'] = 'true' if stale else 'false'
+    if refresh_job:
+        response.headers['X-Refresh-Queued'] = 'true'
+        response.headers['X-Refresh-Job'] = str(refresh_job.id)
+        response.headers['X-Refresh-Job-Url'] = get_job_url(refresh_job)
+    return response
+
+
+def check_admin_token():
+    """
+    Check the admin token of the current request
+    
+    Returns:
+        bool: True if the request may use admin endpoints; always False
+            when no token is configured
+    """
+    if not ADMIN_TOKEN:
+        return False
+    return hmac.compare_digest(request.headers.get('X-Admin-Token', '').encode(), ADMIN_TOKEN.encode())
 
 
-# @app.route('/docs')
-# def docs_route():
-#     from flask import render_template
-#     return render_template('docs.html')
+def get_job_token(job_id):
+    """
+    Get the token that lets a client read a job it did not create itself,
+    e.g. a job its refresh request was merged into
+    """
+    return hmac.new(str(current_app.secret_key).encode(), f"job:{job_id}".encode(), hashlib.sha256).hexdigest()[:32]
+
+
+def get_job_url(job):
+    """
+    Get the URL a client polls a job at
+    """
+    return f"/api/jobs/{job.id}?token={get_job_token(job.id)}"
+
+
+def can_read_job(job):
+    """
+    Check whether the current request may read a job: the client that
+    created it, a client holding its token, or an admin
+    
+    Returns:
+        bool: True if the job may be returned
+    """
+    if check_admin_token():
+        return True
+    if job.client and job.client == request.remote_addr:
+        return True
+    return hmac.compare_digest(request.args.get('token', '').encode(), get_job_token(job.id).encode())
 
 
 # API routes
-# @app.route('/api/players_extended', methods=['GET'])
 def get_players_extended():
     if not check_rate_limit():
         return jsonify({"error": "Rate limit exceeded"}), 429
@@ -114,7 +184,6 @@ def get_players_extended():
         return jsonify({"error": str(e)}), 500
 
 
-@app.route('/api/players_detail/<player_id>', methods=['GET'])
 def get_player_details(player_id):
     if not check_rate_limit():
         return jsonify({"error": "Rate limit exceeded"}), 429
@@ -125,6 +194,7 @@ def get_player_details(player_id):
         if not player:
             return jsonify({"error": "Player not found"}), 404
         
+        record_access('player', player.id)
         return jsonify(player.to_dict())
     
     except Exception as e:
@@ -132,7 +202,6 @@ def get_player_details(player_id):
         return jsonify({"error": str(e)}), 500
 
 
-@app.route('/api/teams', methods=['GET'])
 def get_teams():
     if not check_rate_limit():
         return jsonify({"error": "Rate limit exceeded"}), 429
@@ -162,7 +231,6 @@ def get_teams():
         return jsonify({"error": str(e)}), 500
 
 
-@app.route('/api/teams_detail/<team_id>', methods=['GET'])
 def get_team_detail(team_id):
     if not check_rate_limit():
         return jsonify({"error": "Rate limit exceeded"}), 429
@@ -173,27 +241,28 @@ def get_team_detail(team_id):
         if not team:
             return jsonify({"error": "Team not found"}), 404
         
-        # Fetch latest data from VLR.gg
+        record_access('team', team.id)
+        
+        # Stored data is served right away; fresh data from VLR.gg is fetched in the background
+        stale = is_team_stale(team)
         refresh = request.args.get('refresh', 'false').lower() == 'true'
-        if refresh:
-            logger.info(f"Refreshing team data for {team_id}")
-            success = update_specific_team(team_id)
-            if success:
-                # Reload the team from the database
-                team = Team.query.filter_by(id=team_id).first()
-                logger.info(f"Team data refreshed successfully for {team_id}")
-            else:
-                logger.warning(f"Failed to refresh team data for {team_id}")
+        refresh_job = None
+        if refresh or stale:
+            logger.info(f"Queueing refresh of team data for {team_id}")
+            refresh_job = enqueue_refresh('team', team_id, request.remote_addr)
         
         include_players = request.args.get('include_players', 'true').lower() == 'true'
-        return jsonify(team.to_dict(include_players=include_players))
+        result = team.to_dict(include_players=include_players)
+        result['stale'] = stale
+        result['refresh_queued'] = refresh_job is not None
+        result['refresh_job_id'] = refresh_job.id if refresh_job else None
+        return stale_response(result, stale, refresh_job)
     
     except Exception as e:
         logger.error(f"Error in get_team: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
 
-@app.route('/api/matches_all', methods=['GET'])
 def get_matches_all():
     if not check_rate_limit():
         return jsonify({"error": "Rate limit exceeded"}), 429
@@ -202,6 +271,7 @@ def get_matches_all():
         # Get query parameters
         team_id = request.args.get('team_id')
         status = request.args.get('status')  # upcoming, completed, live
+        event_id = request.args.get('event_id')
         event = request.args.get('event')
         limit = request.args.get('limit', 50, type=int)
         offset = request.args.get('offset', 0, type=int)
@@ -215,8 +285,17 @@ def get_matches_all():
         if status:
             query = query.filter_by(status=status)
             
-        if event:
-            query = query.filter(Match.event_name.ilike(f"%{event}%"))
+        if event_id:
+            query = query.filter(Match.event_id == event_id)
+        elif event:
+            # Resolve the name against the (small) events table and filter
+            # matches through the indexed event_id column; matches not linked
+            # to an event yet (older rows, bo3 listings) fall back to their event name
+            event_ids = [row.id for row in Event.query.with_entities(Event.id).filter(Event.name.ilike(f"%{event}%")).all()]
+            query = query.filter(or_(
+                Match.event_id.in_(event_ids),
+                and_(Match.event_id == None, Match.event_name.ilike(f"%{event}%"))  # noqa: E711
+            ))
         
         # Sort by date (most recent first)
         query = query.order_by(Match.date.desc())
@@ -234,7 +313,6 @@ def get_matches_all():
         return jsonify({"error": str(e)}), 500
 
 
-@app.route('/api/matches/live', methods=['GET'])
 def get_live_matches():
     if not check_rate_limit():
         return jsonify({"error": "Rate limit exceeded"}), 429
@@ -259,7 +337,6 @@ def get_live_matches():
         return jsonify({"error": str(e)}), 500
 
 
-@app.route('/api/matches/upcoming', methods=['GET'])
 def get_upcoming_matches():
     if not check_rate_limit():
         return jsonify({"error": "Rate limit exceeded"}), 429
@@ -290,7 +367,6 @@ def get_upcoming_matches():
         return jsonify({"error": str(e)}), 500
 
 
-@app.route('/api/matches/recent', methods=['GET'])
 def get_recent_matches():
     if not check_rate_limit():
         return jsonify({"error": "Rate limit exceeded"}), 429
@@ -321,7 +397,6 @@ def get_recent_matches():
         return jsonify({"error": str(e)}), 500
 
 
-@app.route('/api/matches_detail/<match_id>', methods=['GET'])
 def get_match_detail(match_id):
     if not check_rate_limit():
         return jsonify({"error": "Rate limit exceeded"}), 429
@@ -340,7 +415,6 @@ def get_match_detail(match_id):
         return jsonify({"error": str(e)}), 500
 
 
-@app.route('/api/events', methods=['GET'])
 def get_events():
     if not check_rate_limit():
         return jsonify({"error": "Rate limit exceeded"}), 429
@@ -364,32 +438,21 @@ def get_events():
         # Apply pagination
         events = query.limit(limit).offset(offset).all()
         
-        # If no events in database, fetch from VLR.gg
-        if not events:
-            from scrapers import vlr_scraper
-            
-            # Get events from VLR.gg
-            vlr_events = vlr_scraper.get_events(limit=limit)
-            
-            # Store events in database
-            for event_data in vlr_events:
-                from utils.db_operations import upsert_event
-                upsert_event(event_data)
-            
-            # Retry query
-            events = query.limit(limit).offset(offset).all()
+        # If no events in database, fetch them from VLR.gg in the background
+        refresh_job = None
+        if not events and offset == 0:
+            refresh_job = enqueue_refresh('events', client=request.remote_addr)
         
         # Convert to dictionary
         result = [event.to_dict() for event in events]
         
-        return jsonify(result)
+        return stale_response(result, refresh_job is not None, refresh_job)
     
     except Exception as e:
         logger.error(f"Error in get_events: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
 
-@app.route('/api/events_detail/<event_id>', methods=['GET'])
 def get_event_detail(event_id):
     if not check_rate_limit():
         return jsonify({"error": "Rate limit exceeded"}), 429
@@ -398,33 +461,42 @@ def get_event_detail(event_id):
         event = Event.query.filter_by(id=event_id).first()
         
         if not event:
-            # Try to fetch from VLR.gg
-            from scrapers import vlr_scraper
-            from utils.db_operations import upsert_event
+            from utils.negative_cache import get_miss_state
             
-            event_data = vlr_scraper.get_event_details(event_id)
-            
-            if event_data:
-                event = upsert_event(event_data)
-            else:
+            if get_miss_state('event', event_id) == 'active':
                 return jsonify({"error": "Event not found"}), 404
+            
+            # Fetch it from VLR.gg in the background; the client retries later
+            refresh_job = enqueue_refresh('event', event_id, request.remote_addr)
+            return stale_response({
+                "id": event_id,
+                "status": "pending",
+                "refresh_queued": refresh_job is not None,
+                "refresh_job_id": refresh_job.id if refresh_job else None
+            }, True, refresh_job, status=202)
+        
+        # Events that were only seen on match pages have no details yet
+        stale = is_event_stale(event)
+        refresh_job = enqueue_refresh('event', event_id, request.remote_addr) if stale else None
         
         include_matches = request.args.get('include_matches', 'false').lower() == 'true'
         
         result = event.to_dict()
+        result['stale'] = stale
+        result['refresh_queued'] = refresh_job is not None
+        result['refresh_job_id'] = refresh_job.id if refresh_job else None
         
         if include_matches:
             matches = Match.query.filter_by(event_id=event_id).all()
             result['matches'] = [match.to_dict(include_maps=False) for match in matches]
         
-        return jsonify(result)
+        return stale_response(result, stale, refresh_job)
     
     except Exception as e:
         logger.error(f"Error in get_event: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
 
-@app.route('/api/search/teams', methods=['GET'])
 def search_teams():
     if not check_rate_limit():
         return jsonify({"error": "Rate limit exceeded"}), 429
@@ -442,12 +514,16 @@ def search_teams():
         # Convert to dictionary
         result = [team.to_dict() for team in db_teams]
         
-        # If not enough results, search VLR.gg
+        # If not enough results, add cached VLR.gg search results; on a cache
+        # miss the search runs in the background and stores the teams it finds
+        refresh_job = None
         if len(result) < 5:
-            from scrapers import vlr_scraper
+            from utils.search_cache import get_cached_search, normalize_query
             
-            # Get teams from VLR.gg
-            vlr_teams = vlr_scraper.search_teams(query, limit=10)
+            vlr_teams = get_cached_search('teams', query, limit=10)
+            if vlr_teams is None:
+                vlr_teams = []
+                refresh_job = enqueue_refresh('search_teams', normalize_query(query), request.remote_addr)
             
             # Add teams from VLR that aren't already in the results
             existing_ids = [team['id'] for team in result]
@@ -460,14 +536,13 @@ def search_teams():
                     if len(result) >= 10:
                         break
         
-        return jsonify(result)
+        return stale_response(result, refresh_job is not None, refresh_job)
     
     except Exception as e:
         logger.error(f"Error in search_teams: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
 
-@app.route('/api/search/players', methods=['GET'])
 def search_players():
     if not check_rate_limit():
         return jsonify({"error": "Rate limit exceeded"}), 429
@@ -485,12 +560,16 @@ def search_players():
         # Convert to dictionary
         result = [player.to_dict() for player in db_players]
         
-        # If not enough results, search VLR.gg
+        # If not enough results, add cached VLR.gg search results; on a cache
+        # miss the search runs in the background and stores the players it finds
+        refresh_job = None
         if len(result) < 5:
-            from scrapers import player_scraper
+            from utils.search_cache import get_cached_search, normalize_query
             
-            # Get players from VLR.gg
-            vlr_players = player_scraper.search_players(query, limit=10)
+            vlr_players = get_cached_search('players', query, limit=10)
+            if vlr_players is None:
+                vlr_players = []
+                refresh_job = enqueue_refresh('search_players', normalize_query(query), request.remote_addr)
             
             # Add players from VLR that aren't already in the results
             existing_ids = [player['id'] for player in result]
@@ -503,19 +582,208 @@ def search_players():
                     if len(result) >= 10:
                         break
         
-        return jsonify(result)
+        return stale_response(result, refresh_job is not None, refresh_job)
     
     except Exception as e:
         logger.error(f"Error in search_players: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
 
-# Error handlers commented out to avoid conflict with app.py
-# @app.errorhandler(404)
-# def not_found_error_route(error):
-#     return jsonify({"error": "Resource not found"}), 404
-# 
-# @app.errorhandler(500)
-# def internal_error_route(error):
-#     logger.error(f"Server error: {str(error)}")
-#     return jsonify({"error": "Internal server error"}), 500
\ No newline at end of file
+def get_crawl_status():
+    if not check_rate_limit():
+        return jsonify({"error": "Rate limit exceeded"}), 429
+    
+    try:
+        from utils.crawl_checkpoint import get_crawl_progress
+        
+        # Progress and ETA of checkpointed crawls (e.g. team_roster)
+        name = request.args.get('name')
+        return jsonify(get_crawl_progress(name))
+    
+    except Exception as e:
+        logger.error(f"Error in get_crawl_status: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+def get_process_status():
+    if not check_rate_limit():
+        return jsonify({"error": "Rate limit exceeded"}), 429
+    
+    try:
+        from utils.process_stats import get_process_stats
+        
+        # Boot time and memory of the process serving this request
+        return jsonify(get_process_stats(current_app))
+    
+    except Exception as e:
+        logger.error(f"Error in get_process_status: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+def get_freshness_status():
+    if not check_rate_limit():
+        return jsonify({"error": "Rate limit exceeded"}), 429
+    
+    try:
+        from utils.freshness import get_freshness_report
+        
+        # Age of the data per entity class against its objective; 503 when a class is stale
+        # or its job is behind schedule, so health checks alert on freshness, not uptime
+        report = get_freshness_report()
+        return jsonify(report), 200 if report['ok'] else 503
+    
+    except Exception as e:
+        logger.error(f"Error in get_freshness_status: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+def request_refresh(kind, target_id):
+    if not check_rate_limit():
+        return jsonify({"error": "Rate limit exceeded"}), 429
+    
+    try:
+        from utils.refresh_jobs import (
+            API_JOB_KINDS, PRIORITY_ON_DEMAND, find_active_job, merge_job, check_job_quota, create_job
+        )
+        
+        if kind not in API_JOB_KINDS:
+            return jsonify({"error": f"Unknown refresh kind, expected one of: {', '.join(API_JOB_KINDS)}"}), 404
+        
+        from utils.reconciliation import is_source_team_id
+        
+        if kind == 'team' and is_source_team_id(target_id):
+            return jsonify({"error": "Team is only known from match listings and has no page to refresh"}), 404
+        
+        # A requested team refresh also refreshes its players' pages
+        params = {'players': True} if kind == 'team' else None
+        
+        # An identical unfinished job is shared instead of queueing another one,
+        # and moved ahead of background work if it was queued by the scheduler
+        job = find_active_job(kind, target_id)
+        if job:
+            merge_job(job, PRIORITY_ON_DEMAND, params)
+            response = jsonify(dict(job.to_dict(), deduplicated=True))
+            response.status_code = 202
+            response.headers['Location'] = get_job_url(job)
+            return response
+        
+        quota_error = check_job_quota(request.remote_addr)
+        if quota_error:
+            return jsonify({"error": quota_error}), 429
+        
+        # The work runs on the scraper workers; the client polls /api/jobs/{id}?token=...
+        job, created = create_job(
+            kind, target_id, client=request.remote_addr, priority=PRIORITY_ON_DEMAND, params=params, origin='api'
+        )
+        response = jsonify(dict(job.to_dict(), deduplicated=not created))
+        response.status_code = 202
+        response.headers['Location'] = get_job_url(job)
+        return response
+    
+    except Exception as e:
+        logger.error(f"Error in request_refresh: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+def get_refresh_job(job_id):
+    if not check_rate_limit():
+        return jsonify({"error": "Rate limit exceeded"}), 429
+    
+    try:
+        from utils.refresh_jobs import get_job
+        
+        # Other clients' jobs are not found rather than forbidden, so job IDs cannot be probed
+        job = get_job(job_id)
+        if not job or not can_read_job(job):
+            return jsonify({"error": "Job not found"}), 404
+        
+        return jsonify(job.to_dict())
+    
+    except Exception as e:
+        logger.error(f"Error in get_refresh_job: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+def get_failures():
+    if not check_admin_token():
+        return jsonify({"error": "Forbidden"}), 403
+    
+    try:
+        from utils.dead_letter import list_failures, get_failure_counts
+        
+        # Dead-letter entries of failed scrapes, most recent first
+        status = request.args.get('status')
+        item_type = request.args.get('type')
+        limit = min(request.args.get('limit', 100, type=int), 500)
+        
+        failures = list_failures(status=status, item_type=item_type, limit=limit)
+        return jsonify({
+            "counts": get_failure_counts(),
+            "failures": [failure.to_dict() for failure in failures]
+        })
+    
+    except Exception as e:
+        logger.error(f"Error in get_failures: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+def replay_failure(failure_id):
+    if not check_admin_token():
+        return jsonify({"error": "Forbidden"}), 403
+    
+    try:
+        from utils.dead_letter import requeue_failure
+        
+        # The scheduler retries the item on its next run; nothing is scraped in the request
+        failure = requeue_failure(failure_id)
+        if not failure:
+            return jsonify({"error": "Failure not found"}), 404
+        
+        return jsonify(failure.to_dict()), 202
+    
+    except Exception as e:
+        logger.error(f"Error in replay_failure: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+def get_job_runs():
+    if not check_admin_token():
+        return jsonify({"error": "Forbidden"}), 403
+    
+    try:
+        from utils.job_metrics import list_job_runs, get_job_run_summary, JOB_METRICS_WINDOW
+        
+        # Recent runs with their stage timings, and per-job aggregates against the previous window
+        job_name = request.args.get('job')
+        run_type = request.args.get('type')
+        status = request.args.get('status')
+        window = request.args.get('window', JOB_METRICS_WINDOW, type=int)
+        limit = min(request.args.get('limit', 100, type=int), 500)
+        
+        runs = list_job_runs(job_name=job_name, run_type=run_type, status=status, limit=limit)
+        return jsonify({
+            "window": window,
+            "summary": get_job_run_summary(window=window, job_name=job_name),
+            "runs": [run.to_dict() for run in runs]
+        })
+    
+    except Exception as e:
+        logger.error(f"Error in get_job_runs: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+def get_job_metrics():
+    if not check_admin_token():
+        return jsonify({"error": "Forbidden"}), 403
+    
+    try:
+        from utils.job_metrics import get_job_run_summary, render_metrics
+        from utils.freshness import get_freshness_report, render_freshness_metrics
+        
+        # Prometheus text format; scrapers must send the X-Admin-Token header (403 without ADMIN_TOKEN)
+        metrics = render_metrics(get_job_run_summary()) + render_freshness_metrics(get_freshness_report())
+        return metrics, 200, {'Content-Type': 'text/plain; version=0.0.4'}
+    
+    except Exception as e:
+        logger.error(f"Error in get_job_metrics: {str(e)}")
+        return jsonify({"error": str(e)}), 500
@@ -0,0 +1,51 @@
+"""
+Gunicorn settings, loaded automatically from the working directory.
+
+The app is imported once in the master (preload_app) and shared with the
+workers copy-on-write. The garbage collector is kept off while it loads and
+everything loaded is frozen before forking, so collections in the workers do
+not write to (and thereby copy) the shared pages. Each worker logs how long
+it took to boot and its resident memory.
+"""
+import gc
+import os
+import time
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5000")
+# One worker by default: each worker keeps its own in-process caches (search
+# cache, listing cache, access counters), so more workers cost memory and
+# lower cache hit rates, not only add capacity
+workers = int(os.environ.get("WEB_CONCURRENCY", "1"))
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") == "1"
+
+CONFIG_LOADED_AT = time.monotonic()
+
+if preload_app:
+    # Avoid freed holes in pages the workers will share
+    gc.disable()
+
+
+def when_ready(server):
+    from utils.process_stats import get_rss_mb
+
+    if preload_app:
+        gc.freeze()
+    server.log.info(f"Master ready in {time.monotonic() - CONFIG_LOADED_AT:.2f}s, "
+                    f"RSS {get_rss_mb() or 0:.1f} MB, {gc.get_freeze_count()} objects frozen")
+
+
+def post_fork(server, worker):
+    worker.boot_started_at = time.monotonic()
+    gc.enable()
+
+
+def post_worker_init(worker):
+    from app import app, start_background_services
+    from utils.process_stats import get_rss_mb
+
+    # Threads do not survive fork, so the scheduler starts in each worker (the leader runs it)
+    start_background_services()
+
+    app.config["WORKER_BOOT_SECONDS"] = round(time.monotonic() - worker.boot_started_at, 4)
+    worker.log.info(f"Worker {worker.pid} booted in {app.config['WORKER_BOOT_SECONDS']:.2f}s, "
+                    f"RSS {get_rss_mb() or 0:.1f} MB")
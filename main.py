@@ -1,4 +1,11 @@
-from app import app
+from app import app, start_background_services
 
 if __name__ == "__main__":
+    # Development server: sync the schema here instead of a separate `flask sync-schema` step
+    from utils.schema import sync_schema
+
+    with app.app_context():
+        sync_schema()
+
+    start_background_services()
     app.run(host="0.0.0.0", port=5000, debug=True)
@@ -13,7 +13,7 @@ class Player(db.Model):
     stats = db.Column(db.Text)  # JSON string of player statistics
     image_url = db.Column(db.String(256))  # Player image URL
     agent_pool = db.Column(db.Text)  # JSON string of player's most played agents
-    last_updated = db.Column(db.DateTime, default=datetime.utcnow)
+    last_updated = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
     team = db.relationship('Team', back_populates='players')
     
@@ -40,7 +40,7 @@ class Team(db.Model):
     region = db.Column(db.String(64))
     logo_url = db.Column(db.String(256))
     stats = db.Column(db.Text)  # JSON string of team statistics
-    last_updated = db.Column(db.DateTime, default=datetime.utcnow)
+    last_updated = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
     players = db.relationship('Player', back_populates='team')
     team1_matches = db.relationship('Match', foreign_keys='Match.team1_id', back_populates='team1')
@@ -69,7 +69,7 @@ class Match(db.Model):
     team1_id = db.Column(db.String(64), db.ForeignKey('teams.id'))
     team2_id = db.Column(db.String(64), db.ForeignKey('teams.id'))
     date = db.Column(db.DateTime)
-    event_id = db.Column(db.String(64), db.ForeignKey('events.id'), nullable=True)
+    event_id = db.Column(db.String(64), db.ForeignKey('events.id'), nullable=True, index=True)
     event_name = db.Column(db.String(128))
     status = db.Column(db.String(32))  # upcoming, live, completed
     score = db.Column(db.String(16))
@@ -82,6 +82,10 @@ class Match(db.Model):
     map_statistics = db.relationship('MapStatistic', back_populates='match')
     event = db.relationship('Event', foreign_keys=[event_id])
     
+    __table_args__ = (
+        db.Index('ix_matches_status_updated', 'status', 'last_updated'),
+    )
+    
     def to_dict(self, include_maps=False):
         result = {
             'id': self.id,
@@ -123,6 +127,10 @@ class Event(db.Model):
     logo_url = db.Column(db.String(256))
     last_updated = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_events_status_updated', 'status', 'last_updated'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -169,3 +177,263 @@ class MapStatistic(db.Model):
             'player_stats': json.loads(self.player_stats) if self.player_stats else {},
             'last_updated': self.last_updated.isoformat() if self.last_updated else None
         }
+
+
+class EntityAccess(db.Model):
+    __tablename__ = 'entity_access'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    entity_type = db.Column(db.String(32), nullable=False)  # team, player
+    entity_id = db.Column(db.String(64), nullable=False)
+    score = db.Column(db.Float, default=0.0)  # Exponentially decayed request count
+    last_accessed = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('entity_type', 'entity_id', name='uq_entity_access_entity'),
+    )
+    
+    def to_dict(self):
+        return {
+            'entity_type': self.entity_type,
+            'entity_id': self.entity_id,
+            'score': self.score,
+            'last_accessed': self.last_accessed.isoformat() if self.last_accessed else None
+        }
+
+
+class CrawlCheckpoint(db.Model):
+    __tablename__ = 'crawl_checkpoints'
+    
+    name = db.Column(db.String(64), primary_key=True)
+    cursor = db.Column(db.String(256))  # Key of the last processed item
+    processed = db.Column(db.Integer, default=0)
+    total = db.Column(db.Integer)
+    started_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+    
+    def to_dict(self):
+        processed = self.processed or 0
+        elapsed = None
+        eta_seconds = None
+        
+        if self.started_at and self.updated_at:
+            elapsed = (self.updated_at - self.started_at).total_seconds()
+            if processed and self.total and not self.finished_at:
+                eta_seconds = round(elapsed / processed * max(self.total - processed, 0))
+        
+        return {
+            'name': self.name,
+            'cursor': self.cursor,
+            'processed': processed,
+            'total': self.total,
+            'progress': round(processed / self.total * 100, 1) if self.total else None,
+            'elapsed_seconds': round(elapsed) if elapsed is not None else None,
+            'eta_seconds': eta_seconds,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+class SchedulerJobState(db.Model):
+    __tablename__ = 'scheduler_job_state'
+    
+    name = db.Column(db.String(64), primary_key=True)  # Scheduled job name, e.g. live_matches
+    last_started_at = db.Column(db.DateTime)
+    last_finished_at = db.Column(db.DateTime)
+    next_run_at = db.Column(db.DateTime)  # When the job is next due, from the start of its last run
+    last_duration = db.Column(db.Float)  # Seconds
+    last_error = db.Column(db.Text)  # Error of the last run, None if it succeeded
+    runs = db.Column(db.Integer, default=0)
+    failures = db.Column(db.Integer, default=0)
+    
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'last_started_at': self.last_started_at.isoformat() if self.last_started_at else None,
+            'last_finished_at': self.last_finished_at.isoformat() if self.last_finished_at else None,
+            'next_run_at': self.next_run_at.isoformat() if self.next_run_at else None,
+            'last_duration': self.last_duration,
+            'last_error': self.last_error,
+            'runs': self.runs or 0,
+            'failures': self.failures or 0
+        }
+
+
+class JobRun(db.Model):
+    __tablename__ = 'job_runs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_name = db.Column(db.String(64), nullable=False)  # Scheduled job name, or queued job kind
+    run_type = db.Column(db.String(16), nullable=False)  # scheduled, queue
+    scrape_job_id = db.Column(db.Integer)  # Queued job that was run
+    status = db.Column(db.String(16), nullable=False)  # succeeded, failed
+    started_at = db.Column(db.DateTime, nullable=False, index=True)
+    finished_at = db.Column(db.DateTime)
+    duration = db.Column(db.Float)  # Seconds
+    pages_fetched = db.Column(db.Integer, default=0)
+    bytes_fetched = db.Column(db.Integer, default=0)
+    cache_hits = db.Column(db.Integer, default=0)
+    fetch_time = db.Column(db.Float, default=0)  # Seconds waiting on the sources, rate budget excluded
+    parse_time = db.Column(db.Float, default=0)  # Seconds
+    db_write_time = db.Column(db.Float, default=0)  # Seconds in INSERT/UPDATE/DELETE statements
+    rows_changed = db.Column(db.Integer, default=0)
+    errors = db.Column(db.Integer, default=0)
+    error = db.Column(db.Text)  # Error the run failed with
+
+    __table_args__ = (
+        db.Index('ix_job_runs_job_started', 'job_name', 'started_at'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'job_name': self.job_name,
+            'run_type': self.run_type,
+            'scrape_job_id': self.scrape_job_id,
+            'status': self.status,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'duration': self.duration,
+            'pages_fetched': self.pages_fetched or 0,
+            'bytes_fetched': self.bytes_fetched or 0,
+            'cache_hits': self.cache_hits or 0,
+            'fetch_time': self.fetch_time or 0,
+            'parse_time': self.parse_time or 0,
+            'db_write_time': self.db_write_time or 0,
+            'rows_changed': self.rows_changed or 0,
+            'errors': self.errors or 0,
+            'error': self.error
+        }
+
+
+class MatchSourceLink(db.Model):
+    __tablename__ = 'match_source_links'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    source = db.Column(db.String(16), nullable=False)  # vlr, bo3
+    source_id = db.Column(db.String(64), nullable=False)
+    match_id = db.Column(db.String(64), db.ForeignKey('matches.id'), nullable=False, index=True)
+    last_seen = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('source', 'source_id', name='uq_match_source_links_source'),
+    )
+
+
+class FailedScrape(db.Model):
+    __tablename__ = 'failed_scrapes'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    item_type = db.Column(db.String(16), nullable=False)  # match, team, player, event
+    item_id = db.Column(db.String(64), nullable=False)
+    source = db.Column(db.String(16), nullable=False, default='vlr')
+    stage = db.Column(db.String(16))  # fetch, parse, store
+    error_class = db.Column(db.String(64))
+    error_message = db.Column(db.Text)
+    url = db.Column(db.String(256))
+    page_hash = db.Column(db.String(40))  # SHA-1 of the raw page that failed
+    hash_repeats = db.Column(db.Integer, default=0)  # Consecutive parse failures on an unchanged page
+    attempts = db.Column(db.Integer, default=0)
+    status = db.Column(db.String(16), default='pending', index=True)  # pending, quarantined, resolved
+    first_failed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_failed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    next_retry_at = db.Column(db.DateTime, index=True)
+    
+    __table_args__ = (
+        db.UniqueConstraint('item_type', 'item_id', 'source', name='uq_failed_scrapes_item'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'item_type': self.item_type,
+            'item_id': self.item_id,
+            'source': self.source,
+            'stage': self.stage,
+            'error_class': self.error_class,
+            'error_message': self.error_message,
+            'url': self.url,
+            'page_hash': self.page_hash,
+            'attempts': self.attempts,
+            'status': self.status,
+            'first_failed_at': self.first_failed_at.isoformat() if self.first_failed_at else None,
+            'last_failed_at': self.last_failed_at.isoformat() if self.last_failed_at else None,
+            'next_retry_at': self.next_retry_at.isoformat() if self.next_retry_at else None
+        }
+
+
+class NegativeCacheEntry(db.Model):
+    __tablename__ = 'negative_cache'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    entity_type = db.Column(db.String(16), nullable=False)  # team, player, event
+    entity_id = db.Column(db.String(64), nullable=False)
+    misses = db.Column(db.Integer, default=0)  # Consecutive "Page not found" results
+    first_missed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_missed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, index=True)
+    
+    __table_args__ = (
+        db.UniqueConstraint('entity_type', 'entity_id', name='uq_negative_cache_entity'),
+    )
+    
+    def to_dict(self):
+        return {
+            'entity_type': self.entity_type,
+            'entity_id': self.entity_id,
+            'misses': self.misses,
+            'first_missed_at': self.first_missed_at.isoformat() if self.first_missed_at else None,
+            'last_missed_at': self.last_missed_at.isoformat() if self.last_missed_at else None,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None
+        }
+
+
+class ScrapeJob(db.Model):
+    __tablename__ = 'scrape_jobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(16), nullable=False)  # team, match, event, player, events, search_teams, search_players
+    target_id = db.Column(db.String(128))  # Entity ID or search query
+    params = db.Column(db.Text)  # JSON string of extra job parameters
+    dedup_key = db.Column(db.String(192))  # At most one unfinished job per key
+    priority = db.Column(db.Integer, default=6)  # Lower runs first
+    status = db.Column(db.String(16), default='queued', index=True)  # queued, running, succeeded, failed
+    client = db.Column(db.String(64), index=True)  # Address of the API client that requested the job
+    origin = db.Column(db.String(8))  # api (POST /api/refresh) or read (stale GET); None for scheduled jobs
+    attempts = db.Column(db.Integer, default=0)
+    max_attempts = db.Column(db.Integer, default=3)
+    run_after = db.Column(db.DateTime)  # Not claimed before this time (retry backoff)
+    lease_owner = db.Column(db.String(128))  # Worker holding the job
+    lease_expires_at = db.Column(db.DateTime, index=True)  # Job is requeued if still running after this
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    result = db.Column(db.Text)  # JSON string summarizing what was updated
+    error = db.Column(db.Text)
+    
+    __table_args__ = (
+        db.Index('ix_scrape_jobs_target', 'kind', 'target_id'),
+        db.Index('ix_scrape_jobs_claim', 'status', 'priority', 'id'),
+        db.Index(
+            'uq_scrape_jobs_active_dedup', 'dedup_key', unique=True,
+            postgresql_where=db.text("status IN ('queued', 'running')"),
+            sqlite_where=db.text("status IN ('queued', 'running')")
+        ),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'target_id': self.target_id,
+            'status': self.status,
+            'priority': self.priority,
+            'attempts': self.attempts,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'result': json.loads(self.result) if self.result else None,
+            'error': self.error
+        }
@@ -10,20 +10,23 @@ import time
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# Scripts do their own scraping; importing the app must not start the scheduler
+os.environ.setdefault("APP_ROLE", "script")
+
 from app import app
 from utils.scheduling import start_scheduler
+from utils.leader import start_leader_election
 
 def apply_optimization():
     """
     Modify the scheduling to run in true background threads
     """
     with app.app_context():
-        # Start the scheduler in a separate thread
-        scheduler_thread = threading.Thread(target=start_scheduler)
-        scheduler_thread.daemon = True  # Make thread a daemon so it exits when main thread exits
-        scheduler_thread.start()
+        # Start the scheduler in a separate thread once this process is the
+        # scheduler leader (a running app process may already be leading)
+        start_leader_election(start_scheduler)
         
-        print("Started scheduler in background thread.")
+        print("Started scheduler leader election in background thread.")
         print("This allows API endpoints to be accessible immediately.")
 
 if __name__ == "__main__":
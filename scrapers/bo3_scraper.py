@@ -1,24 +1,42 @@
 import requests
 import logging
-import json
+import os
 import time
 import re
-from bs4 import BeautifulSoup
 from datetime import datetime
-from urllib.parse import urljoin
+from scrapers.fetch_state import record_fetch
+from utils.run_metrics import record_page, timed
+from utils.rate_budget import get_current_budget
+
+# Use a fast JSON decoder when available
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    import json
+    json_loads = json.loads
 
 # Setup logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-# Base URL 
-# Note: bo3.gg appears to be a CS2 website, not a Valorant website
-# We'll use it as instructed, but it might not have Valorant data
+# Base URLs
+# bo3.gg is a single page application; instead of rendering it in a browser
+# we read the same JSON API the SPA loads its data from
 BASE_URL = "https://bo3.gg"
+API_URL = "https://api.bo3.gg/api/v1"
+
+# Valorant discipline on bo3.gg (the site also covers CS2 and Dota 2)
+DISCIPLINE_ID = os.environ.get("BO3_DISCIPLINE_ID", "2")
+
+# Directory with saved API responses (e.g. tests/fixtures/bo3); when set,
+# no network requests are made
+FIXTURE_DIR = os.environ.get("BO3_FIXTURE_DIR")
 
 # Headers to mimic a browser
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept": "application/json",
     "Accept-Language": "en-US,en;q=0.9",
     "Accept-Encoding": "gzip, deflate, br",
     "Connection": "keep-alive",
@@ -28,86 +46,256 @@ HEADERS = {
 # Rate limiting parameters
 REQUEST_DELAY = 2  # Delay between requests in seconds
 
-def get_soup(url):
+# bo3.gg match statuses mapped to ours
+STATUS_MAP = {
+    'upcoming': 'upcoming',
+    'scheduled': 'upcoming',
+    'current': 'live',
+    'live': 'live',
+    'finished': 'completed',
+    'defwin': 'completed'
+}
+
+def get_json(path, params=None, fixture=None):
     """
-    Fetches the page and returns a BeautifulSoup object.
-    
+    Fetches a bo3.gg API endpoint and decodes the JSON response.
+
     Args:
-        url (str): URL to fetch
-        
+        path (str): API path, e.g. "/matches"
+        params (dict, optional): Query parameters
+        fixture (str, optional): Name of the saved response to use when
+            BO3_FIXTURE_DIR is set
+
     Returns:
-        BeautifulSoup: Parsed HTML
+        dict: Decoded response
     """
+    if FIXTURE_DIR:
+        fixture_path = os.path.join(FIXTURE_DIR, f"{fixture or path.strip('/').replace('/', '_')}.json")
+        try:
+            with open(fixture_path, 'rb') as fixture_file:
+                return json_loads(fixture_file.read())
+        except OSError as e:
+            logger.error(f"Error reading fixture {fixture_path}: {str(e)}")
+            return None
+
+    url = f"{API_URL}{path}"
     try:
-        # Add delay to avoid overwhelming the server
-        time.sleep(REQUEST_DELAY)
-        
-        response = requests.get(url, headers=HEADERS)
+        # Add delay to avoid overwhelming the server, or draw from the
+        # caller's rate budget if one is active on this thread
+        budget = get_current_budget()
+        if budget:
+            budget.acquire()
+        else:
+            time.sleep(REQUEST_DELAY)
+
+        started = time.perf_counter()
+        response = requests.get(url, params=params, headers=HEADERS)
         response.raise_for_status()
-        
-        return BeautifulSoup(response.text, 'html.parser')
+        record_fetch(url, content=response.content)
+        record_page(len(response.content), time.perf_counter() - started)
+
+        with timed('parse_time'):
+            return json_loads(response.content)
     except requests.exceptions.RequestException as e:
+        record_fetch(url, error=e)
         logger.error(f"Error fetching {url}: {str(e)}")
         return None
+    except ValueError as e:
+        record_fetch(url, content=response.content, error=e)
+        logger.error(f"Error decoding {url}: {str(e)}")
+        return None
+
+
+def parse_date(value):
+    """
+    Parses an API timestamp such as "2025-04-20T14:00:00.000Z" into a naive UTC datetime
+    """
+    if not value:
+        return None
+
+    try:
+        return datetime.strptime(value[:19], "%Y-%m-%dT%H:%M:%S")
+    except ValueError:
+        logger.error(f"Error parsing date {value}")
+        return None
+
+
+def _team_id(team):
+    """
+    Gets a team ID from an API team object, preferring its slug
+    """
+    if not team:
+        return None
+    if team.get('slug'):
+        return team['slug']
+    if team.get('name'):
+        return re.sub(r'[^a-z0-9]', '-', team['name'].lower())
+    return str(team['id']) if team.get('id') else None
+
+
+def parse_match(match):
+    """
+    Parses an API match object into the match dictionary used by upsert_match
+
+    Args:
+        match (dict): Match object from the bo3.gg API
+
+    Returns:
+        dict: Match dictionary, or None if the object is incomplete
+    """
+    team1 = match.get('team1') or {}
+    team2 = match.get('team2') or {}
+
+    if not match.get('id') or not team1.get('name') or not team2.get('name'):
+        return None
+
+    status = STATUS_MAP.get(match.get('status'), 'upcoming')
+
+    score = "TBD"
+    if match.get('team1_score') is not None and match.get('team2_score') is not None and status != 'upcoming':
+        score = f"{match['team1_score']}-{match['team2_score']}"
+
+    tournament = match.get('tournament') or {}
+    slug = match.get('slug')
+
+    return {
+        'id': str(match['id']),
+        'slug': slug,
+        'team1_id': _team_id(team1),
+        'team2_id': _team_id(team2),
+        'team1_name': team1['name'],
+        'team2_name': team2['name'],
+        'date': parse_date(match.get('start_date')),
+        'event_name': tournament.get('name', ""),
+        'score': score,
+        'status': status,
+        'match_format': f"bo{match['bo_type']}" if match.get('bo_type') else None,
+        'match_url': f"{BASE_URL}/valorant/matches/{slug}" if slug else None
+    }
+
+
+def parse_games(games, team1_id=None):
+    """
+    Parses API game (map) objects into map statistics dictionaries
+
+    Args:
+        games (list): Game objects from the bo3.gg API
+        team1_id: API ID of the match's first team
+
+    Returns:
+        list: Map statistics dictionaries
+    """
+    maps = []
+
+    for game in sorted(games or [], key=lambda game: game.get('number') or 0):
+        try:
+            # Scores are reported per winner/loser clan
+            winner_score = game.get('winner_clan_score') or 0
+            loser_score = game.get('loser_clan_score') or 0
+
+            if team1_id is not None and game.get('winner_team_id') not in (None, team1_id):
+                team1_score, team2_score = loser_score, winner_score
+            else:
+                team1_score, team2_score = winner_score, loser_score
+
+            maps.append({
+                'map_name': (game.get('map_name') or "Unknown").replace('_', ' ').title(),
+                'team1_score': team1_score,
+                'team2_score': team2_score,
+                'team1_attack': None,
+                'team1_defense': None,
+                'team2_attack': None,
+                'team2_defense': None,
+                'player_stats': {}
+            })
+        except Exception as e:
+            logger.error(f"Error parsing game: {str(e)}")
+            continue
+
+    return maps
 
 
 def get_matches(limit=20):
     """
-    Scrapes upcoming and recent matches from bo3.gg
-    
+    Gets live, upcoming and recently finished matches from bo3.gg
+
     Args:
         limit (int): Maximum number of matches to fetch
-        
+
     Returns:
         list: List of match dictionaries
     """
     try:
-        # bo3.gg uses SPA (Single Page Application) architecture which requires 
-        # JavaScript to render. Our simple scraper might not capture all data.
-        # The site is actually redirecting /matches to /matches/current
-        matches_url = f"{BASE_URL}/matches/current"
-        soup = get_soup(matches_url)
-        
-        if not soup:
-            logger.warning("No soup returned from bo3.gg matches page")
+        params = {
+            'page[offset]': 0,
+            'page[limit]': limit,
+            'sort': 'start_date',
+            'filter[matches.status][in]': 'current,upcoming,finished',
+            'filter[matches.discipline_id][eq]': DISCIPLINE_ID,
+            'with': 'teams,tournament'
+        }
+        data = get_json("/matches", params=params)
+
+        if not data:
+            logger.warning("No data returned from bo3.gg matches endpoint")
             return []
-        
-        # Since we couldn't find proper match cards on initial inspection,
-        # we'll return an empty list for now. In a production environment,
-        # we would use Selenium to render the JavaScript.
+
         matches = []
-        
-        # Log that we're not currently able to scrape data from bo3.gg
-        logger.info("bo3.gg appears to be a dynamic site that requires JavaScript rendering. " 
-                   "Consider using Selenium for this site.")
-        
-        # Note: bo3.gg appears to focus on CS2 matches, not Valorant
+        for match in (data.get('results') or data.get('data') or [])[:limit]:
+            try:
+                match_data = parse_match(match)
+                if match_data:
+                    matches.append(match_data)
+            except Exception as e:
+                logger.error(f"Error parsing match: {str(e)}")
+                continue
+
         return matches
-    
+
     except Exception as e:
         logger.error(f"Error in get_matches: {str(e)}")
         return []
 
 
-def get_match_details(match_id):
+def get_slug_from_url(url):
     """
-    Scrapes detailed information for a specific match.
-    
+    Gets the match slug from a bo3.gg match page or API URL
+    """
+    found = re.search(r'/matches/([^/?#]+)', url or '')
+    return found.group(1) if found else None
+
+
+def get_match_details(match_id, slug=None):
+    """
+    Gets detailed information for a specific match. The match endpoint is
+    addressed by slug, which callers keep from the listing (queued jobs in
+    their params, failed fetches in their URL).
+
     Args:
-        match_id (str): ID of the match to fetch
-        
+        match_id (str): ID (or slug) of the match to fetch
+        slug (str, optional): Slug of the match, as listed by get_matches
+
     Returns:
         dict: Match details with map statistics
     """
     try:
-        # Similar to get_matches, bo3.gg requires JavaScript rendering
-        # for match details pages
-        logger.info(f"bo3.gg requires JavaScript rendering for match detail pages. " 
-                   "Consider using Selenium for this site.")
-        
-        # Return None to indicate we couldn't fetch the match details
-        return None
-    
+        slug = slug or match_id
+        data = get_json(f"/matches/{slug}", params={'with': 'teams,tournament,games'}, fixture=f"match_{match_id}")
+
+        if not data:
+            return None
+
+        match = data.get('data', data)
+        match_details = parse_match(match)
+
+        if not match_details:
+            logger.error(f"Incomplete match data for bo3 match {match_id}")
+            return None
+
+        match_details['maps'] = parse_games(match.get('games'), team1_id=match.get('team1_id'))
+
+        return match_details
+
     except Exception as e:
         logger.error(f"Error in get_match_details: {str(e)}")
         return None
@@ -115,23 +303,20 @@ def get_match_details(match_id):
 
 def get_team_details(team_id):
     """
-    Scrapes team information and roster from bo3.gg
-    
+    Gets team information from bo3.gg
+
     Args:
         team_id (str): ID of the team to fetch
-        
+
     Returns:
         dict: Team details with player roster
     """
     try:
-        # Similar to other bo3.gg functions, this site requires JavaScript
-        # rendering to access team details properly
-        logger.info(f"bo3.gg requires JavaScript rendering for team detail pages. " 
-                   "Consider using Selenium for this site.")
-        
-        # Return None to indicate we couldn't fetch the team details
+        # Rosters are taken from VLR.gg; bo3.gg is only used for matches
+        logger.info(f"Team details are not fetched from bo3.gg: {team_id}")
+
         return None
-    
+
     except Exception as e:
         logger.error(f"Error in get_team_details: {str(e)}")
-        return None
\ No newline at end of file
+        return None
@@ -0,0 +1,77 @@
+import hashlib
+import threading
+from utils.run_metrics import count
+
+# Outcome of the most recent request made on each thread
+_state = threading.local()
+
+
+def record_fetch(url, content=None, error=None):
+    """
+    Remember the outcome of a request made on the current thread; a failed
+    request counts as an error of the current run
+
+    Args:
+        url (str): Requested URL
+        content (bytes, optional): Raw response body
+        error (Exception, optional): Error raised by the request
+    """
+    response = getattr(error, 'response', None)
+    _state.last = {
+        'url': url,
+        'status_code': response.status_code if response is not None else (200 if content is not None else None),
+        'page_hash': hashlib.sha1(content).hexdigest() if content is not None else None,
+        'error_class': type(error).__name__ if error else None,
+        'error': str(error) if error else None
+    }
+    if error:
+        count('errors')
+
+
+def record_error(error):
+    """
+    Attach an error raised while parsing the last fetched page of the current
+    thread, and count it as an error of the current run
+
+    Args:
+        error (Exception): Parse error
+    """
+    last = getattr(_state, 'last', None)
+    if last is None:
+        last = _state.last = {'url': None, 'page_hash': None}
+    last['error_class'] = type(error).__name__
+    last['error'] = str(error)
+    count('errors')
+
+
+def get_last_fetch():
+    """
+    Get the outcome of the most recent request made on the current thread
+
+    Returns:
+        dict: url, page_hash, error_class and error (empty if nothing was fetched)
+    """
+    return dict(getattr(_state, 'last', {}))
+
+
+def is_page_missing(soup):
+    """
+    Check whether a page does not exist: a 404 response or VLR.gg's
+    "Page not found" page. Network errors and other failures do not count.
+
+    Args:
+        soup (BeautifulSoup): Parsed page, or None if the request failed
+
+    Returns:
+        bool: True if the page does not exist
+    """
+    if soup is not None:
+        return "Page not found" in soup.text
+    return get_last_fetch().get('status_code') == 404
+
+
+def clear_last_fetch():
+    """
+    Forget the last request of the current thread
+    """
+    _state.last = {}
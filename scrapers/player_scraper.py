@@ -4,6 +4,9 @@ import time
 import re
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
+from scrapers.fetch_state import record_fetch, record_error, is_page_missing
+from utils.run_metrics import record_page, timed, count
+from utils.rate_budget import get_current_budget
 
 # Setup logging
 logging.basicConfig(level=logging.DEBUG)
@@ -35,14 +38,24 @@ def get_soup(url):
         BeautifulSoup: Parsed HTML
     """
     try:
-        # Add delay to avoid overwhelming the server
-        time.sleep(REQUEST_DELAY)
+        # Add delay to avoid overwhelming the server, or draw from the
+        # caller's rate budget if one is active on this thread
+        budget = get_current_budget()
+        if budget:
+            budget.acquire()
+        else:
+            time.sleep(REQUEST_DELAY)
         
+        started = time.perf_counter()
         response = requests.get(url, headers=HEADERS)
         response.raise_for_status()
+        record_fetch(url, content=response.content)
+        record_page(len(response.content), time.perf_counter() - started)
         
-        return BeautifulSoup(response.text, 'html.parser')
+        with timed('parse_time'):
+            return BeautifulSoup(response.text, 'html.parser')
     except requests.exceptions.RequestException as e:
+        record_fetch(url, error=e)
         logger.error(f"Error fetching {url}: {str(e)}")
         return None
 
@@ -57,11 +70,22 @@ def get_player_details(player_id):
         dict: Player details with statistics
     """
     try:
+        from utils.negative_cache import get_miss_state, record_miss, clear_miss
+        
+        # Dead slugs are remembered so they do not cost a request every pass
+        miss_state = get_miss_state('player', player_id)
+        if miss_state == 'active':
+            count('cache_hits')
+            logger.info(f"Skipping player known not to exist: {player_id}")
+            return None
+        
         player_url = f"{BASE_URL}/player/{player_id}"
         soup = get_soup(player_url)
         
         if not soup or "Page not found" in soup.text:
             logger.warning(f"Player page not found: {player_id}")
+            if is_page_missing(soup):
+                record_miss('player', player_id)
             return None
         
         # Extract player name
@@ -174,9 +198,13 @@ def get_player_details(player_id):
             'stats': stats
         }
         
+        if miss_state == 'expired':
+            clear_miss('player', player_id)
+        
         return player_details
     
     except Exception as e:
+        record_error(e)
         logger.error(f"Error in get_player_details: {str(e)}")
         return None
 
@@ -191,6 +219,12 @@ def get_team_players(team_id):
         list: List of player dictionaries
     """
     try:
+        from utils.negative_cache import get_miss_state
+        
+        if get_miss_state('team', team_id) == 'active':
+            logger.info(f"Skipping team known not to exist: {team_id}")
+            return []
+        
         # Check if team_id is numeric or has a prefix
         if team_id.isdigit() or '/' in team_id:
             team_url = f"{BASE_URL}/team/{team_id}"
@@ -382,11 +416,13 @@ def search_players(query, limit=10):
                 players.append(player)
                 
             except Exception as e:
+                record_error(e)
                 logger.error(f"Error parsing player item: {str(e)}")
                 continue
         
         return players
     
     except Exception as e:
+        record_error(e)
         logger.error(f"Error in search_players: {str(e)}")
         return []
\ No newline at end of file
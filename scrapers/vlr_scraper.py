@@ -6,6 +6,10 @@ import re
 from bs4 import BeautifulSoup
 from datetime import datetime
 from urllib.parse import urljoin
+from concurrent.futures import ThreadPoolExecutor
+from scrapers.fetch_state import record_fetch, record_error, clear_last_fetch, get_last_fetch, is_page_missing
+from utils.run_metrics import record_page, timed, count, get_current_run, use_run
+from utils.rate_budget import get_current_budget, use_budget
 
 # Setup logging
 logging.basicConfig(level=logging.DEBUG)
@@ -37,18 +41,89 @@ def get_soup(url):
         BeautifulSoup: Parsed HTML
     """
     try:
-        # Add delay to avoid overwhelming the server
-        time.sleep(REQUEST_DELAY)
+        # Add delay to avoid overwhelming the server, or draw from the
+        # caller's rate budget if one is active on this thread
+        budget = get_current_budget()
+        if budget:
+            budget.acquire()
+        else:
+            time.sleep(REQUEST_DELAY)
         
+        started = time.perf_counter()
         response = requests.get(url, headers=HEADERS)
         response.raise_for_status()
+        record_fetch(url, content=response.content)
+        record_page(len(response.content), time.perf_counter() - started)
         
-        return BeautifulSoup(response.text, 'html.parser')
+        with timed('parse_time'):
+            return BeautifulSoup(response.text, 'html.parser')
     except requests.exceptions.RequestException as e:
+        record_fetch(url, error=e)
         logger.error(f"Error fetching {url}: {str(e)}")
         return None
 
 
+def _parse_match_item(match_item):
+    """
+    Parses a match row from a VLR.gg match listing
+    
+    Args:
+        match_item: BeautifulSoup element of an a.match-item row
+        
+    Returns:
+        dict: Match dictionary, or None if the row is incomplete
+    """
+    # Extract match ID and URL directly from the <a> tag
+    match_url = urljoin(BASE_URL, match_item['href'])
+    match_id = match_url.split('/')[-2]
+    
+    # Extract teams
+    teams = match_item.select('.match-item-vs-team')
+    if len(teams) < 2:
+        return None
+    
+    # Get the text content within the team name divs
+    team1_name_elem = teams[0].select_one('.match-item-vs-team-name .text-of')
+    team2_name_elem = teams[1].select_one('.match-item-vs-team-name .text-of')
+    
+    if not team1_name_elem or not team2_name_elem:
+        return None
+    
+    team1_name = team1_name_elem.text.strip()
+    team2_name = team2_name_elem.text.strip()
+    
+    # Extract match time/date
+    date_elem = match_item.select_one('.match-item-time')
+    date_str = date_elem.text.strip() if date_elem else ""
+    
+    # Extract event name
+    event_elem = match_item.select_one('.match-item-event')
+    event_name = event_elem.text.strip() if event_elem else ""
+    
+    # Extract score
+    score_elem = match_item.select_one('.match-item-vs-team-score')
+    score = score_elem.text.strip() if score_elem else "TBD"
+    
+    # Determine status (upcoming, live, completed)
+    status = "upcoming"
+    if "LIVE" in date_str:
+        status = "live"
+    elif score and score != "TBD" and any(char.isdigit() for char in score):
+        status = "completed"
+    
+    # Create match object
+    return {
+        'id': match_id,
+        'team1_name': team1_name,
+        'team2_name': team2_name,
+        'date_str': date_str,
+        'event_name': event_name,
+        'score': score,
+        'status': status,
+        'match_url': match_url
+    }
+
+
 def get_matches(limit=20):
     """
     Scrapes upcoming and recent matches from VLR.gg
@@ -72,57 +147,9 @@ def get_matches(limit=20):
         
         for match_item in match_items[:limit]:
             try:
-                # Extract match ID and URL directly from the <a> tag
-                match_url = urljoin(BASE_URL, match_item['href'])
-                match_id = match_url.split('/')[-2]
-                
-                # Extract teams
-                teams = match_item.select('.match-item-vs-team')
-                if len(teams) < 2:
-                    continue
-                
-                # Get the text content within the team name divs
-                team1_name_elem = teams[0].select_one('.match-item-vs-team-name .text-of')
-                team2_name_elem = teams[1].select_one('.match-item-vs-team-name .text-of')
-                
-                if not team1_name_elem or not team2_name_elem:
-                    continue
-                
-                team1_name = team1_name_elem.text.strip()
-                team2_name = team2_name_elem.text.strip()
-                
-                # Extract match time/date
-                date_elem = match_item.select_one('.match-item-time')
-                date_str = date_elem.text.strip() if date_elem else ""
-                
-                # Extract event name
-                event_elem = match_item.select_one('.match-item-event')
-                event_name = event_elem.text.strip() if event_elem else ""
-                
-                # Extract score
-                score_elem = match_item.select_one('.match-item-vs-team-score')
-                score = score_elem.text.strip() if score_elem else "TBD"
-                
-                # Determine status (upcoming, live, completed)
-                status = "upcoming"
-                if "LIVE" in date_str:
-                    status = "live"
-                elif score and score != "TBD" and any(char.isdigit() for char in score):
-                    status = "completed"
-                
-                # Create match object
-                match = {
-                    'id': match_id,
-                    'team1_name': team1_name,
-                    'team2_name': team2_name,
-                    'date_str': date_str,
-                    'event_name': event_name,
-                    'score': score,
-                    'status': status,
-                    'match_url': match_url
-                }
-                
-                matches.append(match)
+                match = _parse_match_item(match_item)
+                if match:
+                    matches.append(match)
                 
             except Exception as e:
                 logger.error(f"Error parsing match: {str(e)}")
@@ -135,6 +162,60 @@ def get_matches(limit=20):
         return []
 
 
+def get_results(page=1):
+    """
+    Scrapes one page of completed match results from VLR.gg
+    
+    Args:
+        page (int): Results page number (1 is the most recent)
+        
+    Returns:
+        list: List of match dictionaries with their match day in 'date'
+    """
+    try:
+        results_url = f"{BASE_URL}/matches/results?page={page}"
+        soup = get_soup(results_url)
+        
+        if not soup:
+            return []
+        
+        matches = []
+        
+        # Results are grouped in cards, each preceded by a label with the match day
+        for date_label in soup.select('.wf-label.mod-large'):
+            match_day = None
+            date_text = date_label.find(string=True, recursive=False)
+            date_text = date_text.strip() if date_text else date_label.text.strip()
+            
+            for date_format in ("%a, %B %d, %Y", "%B %d, %Y"):
+                try:
+                    match_day = datetime.strptime(date_text, date_format)
+                    break
+                except ValueError:
+                    continue
+            
+            card = date_label.find_next_sibling('div', class_='wf-card')
+            if not card:
+                continue
+            
+            for match_item in card.select('a.wf-module-item.match-item'):
+                try:
+                    match = _parse_match_item(match_item)
+                    if match:
+                        match['date'] = match_day
+                        match['status'] = 'completed'
+                        matches.append(match)
+                except Exception as e:
+                    logger.error(f"Error parsing result: {str(e)}")
+                    continue
+        
+        return matches
+    
+    except Exception as e:
+        logger.error(f"Error in get_results: {str(e)}")
+        return []
+
+
 def get_match_details(match_id):
     """
     Scrapes detailed information for a specific match.
@@ -236,6 +317,20 @@ def get_match_details(match_id):
         event_elem = soup.select_one('.match-header-event')
         event_name = event_elem.text.strip() if event_elem else ""
         
+        # Extract event link - format: /event/2097/event-name/stage
+        event_id = None
+        event_title = None
+        event_url = None
+        if event_elem and isinstance(event_elem.get('href'), str):
+            event_parts = [part for part in event_elem['href'].split('/') if part]
+            if len(event_parts) >= 2 and event_parts[0] == 'event':
+                event_id = event_parts[1]
+                event_url = urljoin(BASE_URL, '/'.join(['', 'event'] + event_parts[1:3]))
+                
+                # The first line is the event, the rest is the stage/series
+                lines = [line.strip() for line in event_elem.get_text('\n').split('\n') if line.strip()]
+                event_title = lines[0] if lines else event_name
+        
         # Extract score - the score is inside a js-spoiler div with spans
         score_container = soup.select_one('.match-header-vs-score .js-spoiler')
         score = "TBD"
@@ -366,6 +461,9 @@ def get_match_details(match_id):
             'date': match_date,
             'date_str': date_str,
             'event_name': event_name,
+            'event_id': event_id,
+            'event_title': event_title,
+            'event_url': event_url,
             'score': score,
             'status': status,
             'match_url': match_url,
@@ -375,10 +473,49 @@ def get_match_details(match_id):
         return match_details
     
     except Exception as e:
+        record_error(e)
         logger.error(f"Error in get_match_details: {str(e)}")
         return None
 
 
+def get_match_details_batch(match_ids, max_workers=4, budget=None, failures=None):
+    """
+    Fetches details for many matches concurrently
+    
+    Args:
+        match_ids (list): IDs of the matches to fetch
+        max_workers (int): Number of concurrent fetch threads
+        budget (RateBudget, optional): Rate budget shared by the workers
+        failures (dict, optional): Filled with the fetch outcome (URL, page
+            hash, error class) of every match that failed
+        
+    Returns:
+        dict: Mapping of match ID to match details (None for failures)
+    """
+    # Pages fetched by the pool count towards the caller's job run
+    run = get_current_run()
+    
+    def fetch(match_id):
+        # Fetch state is per thread, so it is captured on the worker
+        clear_last_fetch()
+        with use_run(run):
+            if budget:
+                with use_budget(budget):
+                    match_details = get_match_details(match_id)
+            else:
+                match_details = get_match_details(match_id)
+        return match_id, match_details, None if match_details else get_last_fetch()
+    
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for match_id, match_details, fetch_state in executor.map(fetch, match_ids):
+            results[match_id] = match_details
+            if fetch_state is not None and failures is not None:
+                failures[match_id] = fetch_state
+    
+    return results
+
+
 def get_team_details(team_id):
     """
     Scrapes team information and roster from VLR.gg
@@ -387,30 +524,33 @@ def get_team_details(team_id):
         team_id (str): ID of the team to fetch
         
     Returns:
-        dict: Team details with player roster
+        dict: Team details with player roster, or None if the team could not be found
     """
     try:
+        from utils.negative_cache import get_miss_state, record_miss, clear_miss
+        
+        # A team whose page and search both came up empty is not fetched again until the miss expires
+        miss_state = get_miss_state('team', team_id)
+        if miss_state == 'active':
+            count('cache_hits')
+            logger.info(f"Skipping team known not to exist: {team_id}")
+            return None
+        
         # Try direct approach with team ID
         team_url = f"{BASE_URL}/team/{team_id}"
         soup = get_soup(team_url)
         
         # If that fails, try searching for the team
         if not soup or "Page not found" in soup.text:
+            page_missing = is_page_missing(soup)
             logger.info(f"Team page not found directly. Trying to search for team: {team_id}")
             teams_found = search_teams(team_id.replace('-', ' '), limit=5)
             
             if not teams_found:
                 logger.warning(f"No teams found when searching for: {team_id}")
-                # Create a minimal team object with available information
-                team_details = {
-                    'id': team_id,
-                    'name': team_id.replace('-', ' ').title(),
-                    'region': None,
-                    'logo_url': None,
-                    'stats': {},
-                    'players': []
-                }
-                return team_details
+                if page_missing:
+                    record_miss('team', team_id)
+                return None
             
             # Use the first search result
             team_url = teams_found[0].get('team_url')
@@ -517,9 +657,13 @@ def get_team_details(team_id):
             'players': players
         }
         
+        if miss_state == 'expired':
+            clear_miss('team', team_id)
+        
         return team_details
     
     except Exception as e:
+        record_error(e)
         logger.error(f"Error in get_team_details: {str(e)}")
         return None
 
@@ -567,28 +711,33 @@ def search_teams(query, limit=10):
                 teams.append(team_data)
                 
             except Exception as e:
+                record_error(e)
                 logger.error(f"Error parsing team search result: {str(e)}")
                 continue
         
         return teams
     
     except Exception as e:
+        record_error(e)
         logger.error(f"Error in search_teams: {str(e)}")
         return []
 
 
-def get_events(limit=10):
+def get_events(limit=10, page=1):
     """
     Gets upcoming and ongoing events
     
     Args:
         limit (int): Maximum number of events to fetch
+        page (int): Events listing page (later pages list older events)
         
     Returns:
         list: List of event dictionaries
     """
     try:
         events_url = f"{BASE_URL}/events"
+        if page > 1:
+            events_url = f"{events_url}/?page={page}"
         soup = get_soup(events_url)
         
         if not soup:
@@ -700,11 +849,21 @@ def get_event_details(event_id):
         dict: Event details
     """
     try:
+        from utils.negative_cache import get_miss_state, record_miss, clear_miss
+        
+        miss_state = get_miss_state('event', event_id)
+        if miss_state == 'active':
+            count('cache_hits')
+            logger.info(f"Skipping event known not to exist: {event_id}")
+            return None
+        
         event_url = f"{BASE_URL}/event/{event_id}"
         soup = get_soup(event_url)
         
         if not soup or "Page not found" in soup.text:
             logger.error(f"Event page not found: {event_id}")
+            if is_page_missing(soup):
+                record_miss('event', event_id)
             return None
         
         # Extract event name
@@ -772,18 +931,8 @@ def get_event_details(event_id):
             elif not logo_url.startswith(('http://', 'https://')):
                 logo_url = urljoin(BASE_URL, logo_url)
         
-        # Get matches for this event
-        matches = []
-        match_elems = soup.select('.wf-card.event-group-container')
-        for match_elem in match_elems[:20]:  # Limit to avoid too many requests
-            try:
-                match_link = match_elem.select_one('a.match-item')
-                if match_link and 'href' in match_link.attrs:
-                    match_url = match_link['href']
-                    match_id = match_url.split('/')[-2]  # Format: /123/team1-vs-team2
-                    matches.append(match_id)
-            except Exception as e:
-                logger.error(f"Error parsing match in event: {str(e)}")
+        # Get matches for this event: every match linked on the overview
+        matches = _extract_match_ids(soup)
         
         event_data = {
             'id': event_id,
@@ -798,8 +947,80 @@ def get_event_details(event_id):
             'matches': matches
         }
         
+        if miss_state == 'expired':
+            clear_miss('event', event_id)
+        
         return event_data
     
     except Exception as e:
+        record_error(e)
         logger.error(f"Error in get_event_details: {str(e)}")
         return None
+
+
+def _extract_match_ids(soup):
+    """
+    Extracts the IDs of all matches linked from a page
+    
+    Args:
+        soup (BeautifulSoup): Parsed page
+        
+    Returns:
+        list: Match IDs in page order, without duplicates
+    """
+    match_ids = []
+    
+    for match_link in soup.select('a.match-item, a.wf-module-item.match-item, a.bracket-item-link'):
+        try:
+            match_url = match_link.get('href')
+            if not match_url or not isinstance(match_url, str):
+                continue
+            
+            # Format: /123/team1-vs-team2
+            parts = [part for part in match_url.split('/') if part]
+            if len(parts) >= 2 and parts[0].isdigit() and parts[0] not in match_ids:
+                match_ids.append(parts[0])
+        except Exception as e:
+            logger.error(f"Error parsing match in event: {str(e)}")
+            continue
+    
+    return match_ids
+
+
+def iter_event_match_ids(event_id, max_pages=10):
+    """
+    Walks an event's matches tab one page at a time, following pagination.
+    Pages are only fetched as the caller asks for them, so a caller that has
+    enough matches can stop early.
+    
+    Args:
+        event_id (str): ID of the event
+        max_pages (int): Maximum number of pages to walk
+        
+    Yields:
+        list: Match IDs listed on each page
+    """
+    try:
+        page = 1
+        last_page = 1
+        
+        while page <= min(last_page, max_pages):
+            matches_url = f"{BASE_URL}/event/matches/{event_id}/?series_id=all&group=all"
+            if page > 1:
+                matches_url = f"{matches_url}&page={page}"
+            
+            soup = get_soup(matches_url)
+            if not soup or "Page not found" in soup.text:
+                break
+            
+            # Pagination links show the page numbers available
+            for page_link in soup.select('.action-container-pages a.mod-page, .action-container-pages span.mod-page'):
+                page_text = page_link.text.strip()
+                if page_text.isdigit():
+                    last_page = max(last_page, int(page_text))
+            
+            page += 1
+            yield _extract_match_ids(soup)
+    
+    except Exception as e:
+        logger.error(f"Error in iter_event_match_ids: {str(e)}")
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Backfill historical match results from VLR.gg.
+Walks the /matches/results pages (and optionally event pages) over a date
+range, fetches match details concurrently from the backfill share of the
+rate budget and bulk-loads them. Progress is checkpointed so an interrupted run resumes.
+"""
+
+import os
+import sys
+import logging
+import argparse
+from datetime import datetime, timedelta
+
+# Add parent directory to path to allow importing app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Scripts do their own scraping; importing the app must not start the scheduler
+os.environ.setdefault("APP_ROLE", "script")
+
+# Import the necessary modules
+from app import app, db
+from models import Match, Event
+from scrapers import vlr_scraper
+from utils.db_operations import bulk_upsert_matches
+from utils.dead_letter import record_failure, get_blocked_ids
+from utils.crawl_checkpoint import start_crawl, save_checkpoint, finish_crawl, iter_chunks
+from utils.rate_budget import use_budget, BACKFILL_REQUESTS_PER_MINUTE
+from utils.scheduling import scheduler_budget
+from utils.schedule_config import PRIORITY_BACKFILL
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Safety limit on the number of results pages walked in one run
+MAX_RESULTS_PAGES = 2000
+
+# Consecutive results pages without a parseable match date after which the
+# walk stops, as it could never reach the start of the range
+MAX_UNDATED_PAGES = 3
+
+# Date range backfilled when none is given (in days before today)
+DEFAULT_BACKFILL_DAYS = 365
+
+
+def get_checkpoint_name(kind, start_date=None, end_date=None):
+    """
+    Name the checkpoint of a backfill after the dates given explicitly, so a
+    run with the default range resumes on a later day too
+
+    Args:
+        kind (str): backfill_results or backfill_events
+        start_date (datetime, optional): Explicit range start
+        end_date (datetime, optional): Explicit range end
+
+    Returns:
+        str: Checkpoint name
+    """
+    start = f"{start_date:%Y-%m-%d}" if start_date else "default"
+    end = f"{end_date:%Y-%m-%d}" if end_date else "today"
+    return f"{kind}:{start}:{end}"
+
+
+def resolve_range(start_date=None, end_date=None):
+    """
+    Fill in the default date range for dates that were not given
+
+    Returns:
+        tuple: (start_date, end_date)
+    """
+    now = datetime.utcnow()
+    return start_date or now - timedelta(days=DEFAULT_BACKFILL_DAYS), end_date or now
+
+
+def get_missing_match_ids(match_ids):
+    """
+    Filter out matches that are already stored as completed
+
+    Args:
+        match_ids (list): Match IDs to check
+
+    Returns:
+        list: Match IDs that still need to be fetched
+    """
+    if not match_ids:
+        return []
+
+    completed = {match_id for (match_id,) in db.session.query(Match.id).filter(
+        Match.id.in_(match_ids), Match.status == 'completed'
+    ).all()}
+
+    return [match_id for match_id in match_ids if match_id not in completed]
+
+
+def load_matches(match_ids, budget, workers):
+    """
+    Fetch match details concurrently and bulk-load them
+
+    Args:
+        match_ids (list): Match IDs to fetch
+        budget (RateBudget): Rate budget shared by the fetch workers
+        workers (int): Number of concurrent fetch workers
+
+    Returns:
+        int: Number of matches written
+    """
+    match_ids = get_missing_match_ids(match_ids)
+    blocked = get_blocked_ids('match', match_ids)
+    match_ids = [match_id for match_id in match_ids if match_id not in blocked]
+    if not match_ids:
+        return 0
+
+    failures = {}
+    details = vlr_scraper.get_match_details_batch(match_ids, max_workers=workers, budget=budget, failures=failures)
+
+    if failures:
+        logger.warning(f"Failed to fetch {len(failures)} matches: {', '.join(failures)}")
+        for match_id, fetch in failures.items():
+            record_failure('match', match_id, fetch=fetch)
+
+    return bulk_upsert_matches(list(details.values()))
+
+
+def get_backfill_budget():
+    """
+    Get the backfill's share of the process's rate budget, so its requests
+    are weighed against every other job's instead of adding to them
+
+    Returns:
+        BudgetShare: The backfill share
+    """
+    return scheduler_budget.share('backfill', PRIORITY_BACKFILL)
+
+
+def backfill_results(start_date=None, end_date=None, workers=4, reset=False):
+    """
+    Backfill results listed on /matches/results between two dates
+
+    A resumed run starts again at the last checkpointed page: new results
+    push older ones onto later pages, so results from the end of that page
+    may have moved past it since. A run that keeps finding pages without
+    match dates stops unfinished, so it resumes once parsing is fixed.
+
+    Args:
+        start_date (datetime, optional): Oldest match day to load; a year ago by default
+        end_date (datetime, optional): Newest match day to load; today by default
+        workers (int): Number of concurrent fetch workers
+        reset (bool): Ignore the saved checkpoint and start from the first page
+
+    Returns:
+        dict: Stats about the operation
+    """
+    budget = get_backfill_budget()
+    checkpoint = start_crawl(get_checkpoint_name('backfill_results', start_date, end_date), reset=reset)
+    page = int(checkpoint.cursor) if checkpoint.cursor else 1
+    start_date, end_date = resolve_range(start_date, end_date)
+
+    stats = {"pages": 0, "matches_loaded": 0, "resumed_from_page": page}
+    undated_pages = 0
+
+    while page <= MAX_RESULTS_PAGES:
+        with use_budget(budget):
+            results = vlr_scraper.get_results(page)
+
+        if not results:
+            logger.info(f"No results on page {page}, stopping")
+            break
+
+        match_days = [match['date'] for match in results if match.get('date')]
+        undated_pages = 0 if match_days else undated_pages + 1
+        in_range = [
+            match['id'] for match in results
+            if match.get('date') and start_date <= match['date'] <= end_date
+        ]
+
+        loaded = load_matches(in_range, budget, workers)
+        stats["pages"] += 1
+        stats["matches_loaded"] += loaded
+        logger.info(f"Page {page}: {len(in_range)} matches in range, {loaded} loaded")
+
+        save_checkpoint(checkpoint, str(page), len(results))
+
+        if undated_pages >= MAX_UNDATED_PAGES:
+            logger.error(f"No match dates on the last {undated_pages} pages, stopping at page {page}")
+            return stats
+
+        # Pages are ordered newest first
+        if match_days and max(match_days) < start_date:
+            break
+
+        page += 1
+
+    finish_crawl(checkpoint)
+    return stats
+
+
+def backfill_events(start_date=None, end_date=None, workers=4, reset=False):
+    """
+    Backfill the matches of every stored event overlapping a date range
+
+    Args:
+        start_date (datetime, optional): Range start; a year ago by default
+        end_date (datetime, optional): Range end; today by default
+        workers (int): Number of concurrent fetch workers
+        reset (bool): Ignore the saved checkpoint and start from the first event
+
+    Returns:
+        dict: Stats about the operation
+    """
+    budget = get_backfill_budget()
+    checkpoint_name = get_checkpoint_name('backfill_events', start_date, end_date)
+    start_date, end_date = resolve_range(start_date, end_date)
+
+    events_query = Event.query.filter(
+        (Event.start_date == None) | (Event.start_date <= end_date),  # noqa: E711
+        (Event.end_date == None) | (Event.end_date >= start_date)  # noqa: E711
+    )
+    checkpoint = start_crawl(checkpoint_name, total=events_query.count(), reset=reset)
+
+    stats = {"events": 0, "matches_loaded": 0}
+
+    for events in iter_chunks(events_query, Event.id, cursor=checkpoint.cursor):
+        for event in events:
+            with use_budget(budget):
+                event_details = vlr_scraper.get_event_details(event.id)
+
+            if not event_details:
+                continue
+
+            loaded = load_matches(event_details.get('matches', []), budget, workers)
+            stats["events"] += 1
+            stats["matches_loaded"] += loaded
+            logger.info(f"Event {event.id}: {loaded} matches loaded")
+
+        save_checkpoint(checkpoint, events[-1].id, len(events))
+
+    finish_crawl(checkpoint)
+    return stats
+
+
+def parse_date(value):
+    return datetime.strptime(value, "%Y-%m-%d")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill historical match results from VLR.gg")
+    parser.add_argument("--start", type=parse_date,
+                        help=f"Oldest match day to load (YYYY-MM-DD), {DEFAULT_BACKFILL_DAYS} days ago by default")
+    parser.add_argument("--end", type=parse_date, help="Newest match day to load (YYYY-MM-DD), today by default")
+    parser.add_argument("--workers", type=int, help="Number of concurrent fetch workers", default=4)
+    parser.add_argument("--rate", type=int, default=BACKFILL_REQUESTS_PER_MINUTE,
+                        help="Request budget of this process per minute; it is taken out of the overall "
+                             "budget, so lower the workers' --requests-per-minute by as much")
+    parser.add_argument("--events", action="store_true", help="Also walk the pages of stored events in the range")
+    parser.add_argument("--reset", action="store_true", help="Ignore saved checkpoints and start over")
+
+    args = parser.parse_args()
+
+    scheduler_budget.set_rate(args.rate)
+
+    with app.app_context():
+        start, end = resolve_range(args.start, args.end)
+        logger.info(f"Backfilling results from {start:%Y-%m-%d} to {end:%Y-%m-%d}")
+        stats = backfill_results(args.start, args.end, workers=args.workers, reset=args.reset)
+        logger.info(f"Results backfill: {stats}")
+
+        if args.events:
+            stats = backfill_events(args.start, args.end, workers=args.workers, reset=args.reset)
+            logger.info(f"Event backfill: {stats}")
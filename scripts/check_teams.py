@@ -10,6 +10,9 @@ import logging
 # Add parent directory to path to allow importing app modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# Scripts do their own scraping; importing the app must not start the scheduler
+os.environ.setdefault("APP_ROLE", "script")
+
 # Import the necessary modules
 from app import app, db
 from models import Team, Player
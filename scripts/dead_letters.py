@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+List and replay failed scrapes recorded in the dead-letter table.
+Replayed items are scraped and stored immediately, including quarantined
+ones (e.g. after the scraper selectors have been fixed).
+"""
+
+import os
+import sys
+import logging
+import argparse
+
+# Add parent directory to path to allow importing app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Scripts do their own scraping; importing the app must not start the scheduler
+os.environ.setdefault("APP_ROLE", "script")
+
+# Import the necessary modules
+from app import app
+from models import FailedScrape
+from utils.dead_letter import list_failures, get_failure_counts, replay_failure, retry_due_failures
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def print_failures(status=None, item_type=None, limit=100):
+    """
+    Print dead-letter entries, most recent failure first
+    """
+    print(f"Counts: {get_failure_counts()}")
+
+    for failure in list_failures(status=status, item_type=item_type, limit=limit):
+        print(f"[{failure.id}] {failure.source} {failure.item_type} {failure.item_id}: {failure.status}, "
+              f"{failure.attempts} attempts, {failure.stage} {failure.error_class} "
+              f"(last {failure.last_failed_at:%Y-%m-%d %H:%M}, next {failure.next_retry_at or '-'})")
+
+
+def replay(failure_ids=None, status=None, item_type=None, limit=100):
+    """
+    Replay the given entries, or all entries matching a status and type
+
+    Returns:
+        dict: Stats about the operation
+    """
+    if failure_ids:
+        failures = FailedScrape.query.filter(FailedScrape.id.in_(failure_ids)).all()
+    else:
+        failures = list_failures(status=status, item_type=item_type, limit=limit)
+
+    stats = {"replayed": 0, "recovered": 0}
+    for failure in failures:
+        stats["replayed"] += 1
+        if replay_failure(failure):
+            stats["recovered"] += 1
+            logger.info(f"Recovered {failure.source} {failure.item_type} {failure.item_id}")
+        else:
+            logger.warning(f"Replay failed for {failure.source} {failure.item_type} {failure.item_id}")
+
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List and replay failed scrapes")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = subparsers.add_parser("list", help="List failed scrapes")
+    replay_parser = subparsers.add_parser("replay", help="Replay failed scrapes now")
+    replay_parser.add_argument("ids", type=int, nargs="*", help="Dead-letter entry IDs (default: all matching the filters)")
+    subparsers.add_parser("retry-due", help="Retry pending failures whose backoff has expired")
+
+    for subparser in (list_parser, replay_parser):
+        subparser.add_argument("--status", choices=["pending", "quarantined", "resolved"], help="Filter by status")
+        subparser.add_argument("--type", dest="item_type", choices=["match", "team", "player", "event"], help="Filter by item type")
+        subparser.add_argument("--limit", type=int, help="Maximum number of entries", default=100)
+
+    args = parser.parse_args()
+
+    with app.app_context():
+        if args.command == "list":
+            print_failures(status=args.status, item_type=args.item_type, limit=args.limit)
+        elif args.command == "replay":
+            stats = replay(args.ids, status=args.status, item_type=args.item_type, limit=args.limit)
+            logger.info(f"Replay: {stats}")
+        else:
+            logger.info(f"Recovered {retry_due_failures()} failed scrapes")
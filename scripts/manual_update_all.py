@@ -13,9 +13,13 @@ import time
 # Add parent directory to path to allow importing app modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# Scripts do their own scraping; importing the app must not start the scheduler
+os.environ.setdefault("APP_ROLE", "script")
+
 # Import the necessary modules
 from app import app
 from utils.db_operations import scrape_and_update_recent_matches, update_teams_and_players
+from utils.refresh_jobs import process_jobs
 from scrapers import vlr_scraper, bo3_scraper
 
 # Setup logging
@@ -36,7 +40,7 @@ def run_full_update():
             # Step 1: Update matches
             logger.info("Updating matches")
             match_count = scrape_and_update_recent_matches(vlr_scraper, bo3_scraper, limit=50)
-            logger.info(f"Updated {match_count} matches")
+            logger.info(f"Queued {match_count} matches")
             
             # Add a delay to avoid overwhelming the server
             time.sleep(2)
@@ -44,7 +48,12 @@ def run_full_update():
             # Step 2: Update teams and players
             logger.info("Updating teams and players")
             team_count = update_teams_and_players()
-            logger.info(f"Updated {team_count} teams")
+            logger.info(f"Queued {team_count} teams")
+            
+            # Step 3: Run the queued jobs here instead of waiting for the scheduler's workers
+            logger.info("Running queued jobs")
+            job_count = process_jobs()
+            logger.info(f"Ran {job_count} jobs")
             
             logger.info("Full data update completed successfully")
             return True
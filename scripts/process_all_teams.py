@@ -13,47 +13,54 @@ import argparse
 # Add parent directory to path to allow importing app modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# Scripts do their own scraping; importing the app must not start the scheduler
+os.environ.setdefault("APP_ROLE", "script")
+
 # Import the necessary modules
 from app import app, db
 from models import Team, Player
 from scrapers import player_scraper
 from utils.db_operations import upsert_player
+from utils.crawl_checkpoint import start_crawl, save_checkpoint, finish_crawl, iter_chunks, CRAWL_CHUNK_SIZE
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def process_all_teams(limit=None, sleep_time=5):
+# Checkpoint used to resume an interrupted run
+CHECKPOINT_NAME = "process_all_teams"
+
+def process_all_teams(limit=None, sleep_time=5, reset=False):
     """
-    Process all teams and save their players
+    Process all teams and save their players.
+    
+    Teams are processed in ID order in chunks; progress is checkpointed after
+    each chunk so an interrupted run resumes from the last finished chunk.
     
     Args:
         limit (int, optional): Maximum number of teams to process
         sleep_time (int, optional): Sleep time between team scraping to avoid rate limiting
+        reset (bool, optional): Ignore any saved checkpoint and start from the first team
         
     Returns:
         dict: Stats about the operation
     """
     with app.app_context():
         try:
-            # Get all teams from the database
-            teams_query = Team.query
+            total_teams = Team.query.count()
             
-            # Apply limit if provided
-            if limit and isinstance(limit, int) and limit > 0:
-                teams_query = teams_query.limit(limit)
-                
-            teams = teams_query.all()
-            
-            if not teams:
+            if not total_teams:
                 logger.warning("No teams found in the database")
                 return {"success": False, "error": "No teams found"}
                 
-            logger.info(f"Found {len(teams)} teams in the database")
+            logger.info(f"Found {total_teams} teams in the database")
+            
+            checkpoint = start_crawl(CHECKPOINT_NAME, total=total_teams, reset=reset)
             
             # Initialize counters
             stats = {
-                "total_teams": len(teams),
+                "total_teams": total_teams,
+                "resumed_from": checkpoint.cursor,
                 "processed_teams": 0,
                 "total_players_added": 0,
                 "failed_teams": [],
@@ -61,59 +68,77 @@ def process_all_teams(limit=None, sleep_time=5):
             }
             
             # Process each team
-            for team in teams:
-                try:
-                    logger.info(f"Processing team: {team.name} (ID: {team.id})")
-                    
-                    # Get players for the team
-                    players = player_scraper.get_team_players(team.id)
-                    
-                    if not players:
-                        logger.warning(f"No players found for team: {team.name}")
-                        stats["failed_teams"].append(team.name)
-                        continue
+            remaining = limit if limit and isinstance(limit, int) and limit > 0 else None
+            chunk_size = min(CRAWL_CHUNK_SIZE, remaining) if remaining else CRAWL_CHUNK_SIZE
+            
+            for teams in iter_chunks(Team.query, Team.id, cursor=checkpoint.cursor, chunk_size=chunk_size):
+                if remaining is not None:
+                    teams = teams[:remaining]
+                
+                for team in teams:
+                    try:
+                        logger.info(f"Processing team: {team.name} (ID: {team.id})")
                         
-                    logger.info(f"Found {len(players)} players for team: {team.name}")
-                    
-                    # Add each player
-                    team_players_added = 0
-                    for player_data in players:
-                        try:
-                            # Set the team ID
-                            player_data['team_id'] = team.id
-                            
-                            # Add or update player
-                            result = upsert_player(player_data)
+                        # Get players for the team
+                        players = player_scraper.get_team_players(team.id)
+                        
+                        if not players:
+                            logger.warning(f"No players found for team: {team.name}")
+                            stats["failed_teams"].append(team.name)
+                            continue
                             
-                            if result:
-                                team_players_added += 1
-                                logger.info(f"Added/updated player: {player_data['name']}")
-                            else:
-                                logger.warning(f"Failed to add/update player: {player_data['name']}")
+                        logger.info(f"Found {len(players)} players for team: {team.name}")
+                        
+                        # Add each player
+                        team_players_added = 0
+                        for player_data in players:
+                            try:
+                                # Set the team ID
+                                player_data['team_id'] = team.id
                                 
-                        except Exception as e:
-                            logger.error(f"Error processing player {player_data.get('name', 'unknown')}: {str(e)}")
-                            continue
-                    
-                    # Add to total
-                    stats["total_players_added"] += team_players_added
-                    stats["processed_teams"] += 1
-                    stats["successful_teams"].append(team.name)
-                    
-                    # Update team's last_updated timestamp
-                    team.last_updated = db.func.now()
-                    db.session.commit()
-                    
-                    logger.info(f"Added {team_players_added} players for team: {team.name}")
-                    
-                    # Add a delay to avoid overwhelming the server
-                    logger.info(f"Sleeping for {sleep_time} seconds before next team...")
-                    time.sleep(sleep_time)
-                    
-                except Exception as e:
-                    logger.error(f"Error processing team {team.name}: {str(e)}")
-                    stats["failed_teams"].append(team.name)
-                    continue
+                                # Add or update player
+                                result = upsert_player(player_data)
+                                
+                                if result:
+                                    team_players_added += 1
+                                    logger.info(f"Added/updated player: {player_data['name']}")
+                                else:
+                                    logger.warning(f"Failed to add/update player: {player_data['name']}")
+                                    
+                            except Exception as e:
+                                logger.error(f"Error processing player {player_data.get('name', 'unknown')}: {str(e)}")
+                                continue
+                        
+                        # Add to total
+                        stats["total_players_added"] += team_players_added
+                        stats["processed_teams"] += 1
+                        stats["successful_teams"].append(team.name)
+                        
+                        # Update team's last_updated timestamp
+                        team.last_updated = db.func.now()
+                        db.session.commit()
+                        
+                        logger.info(f"Added {team_players_added} players for team: {team.name}")
+                        
+                        # Add a delay to avoid overwhelming the server
+                        logger.info(f"Sleeping for {sleep_time} seconds before next team...")
+                        time.sleep(sleep_time)
+                        
+                    except Exception as e:
+                        logger.error(f"Error processing team {team.name}: {str(e)}")
+                        stats["failed_teams"].append(team.name)
+                        continue
+                
+                save_checkpoint(checkpoint, teams[-1].id, len(teams))
+                
+                if remaining is not None:
+                    remaining -= len(teams)
+                    if remaining <= 0:
+                        break
+            else:
+                finish_crawl(checkpoint)
+            
+            stats["progress"] = checkpoint.to_dict()
             
             # Summary
             logger.info(f"Processed {stats['processed_teams']} teams")
@@ -133,15 +158,17 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Process all teams and save their players")
     parser.add_argument("--limit", type=int, help="Limit the number of teams to process", default=None)
     parser.add_argument("--sleep", type=int, help="Sleep time between teams in seconds", default=5)
+    parser.add_argument("--reset", action="store_true", help="Ignore the saved checkpoint and start from the first team")
     
     args = parser.parse_args()
     
     logger.info("Starting team player extraction process")
-    stats = process_all_teams(limit=args.limit, sleep_time=args.sleep)
+    stats = process_all_teams(limit=args.limit, sleep_time=args.sleep, reset=args.reset)
     
     if stats["success"]:
         logger.info("Team processing completed successfully")
         logger.info(f"Processed {stats['processed_teams']} of {stats['total_teams']} teams")
+        logger.info(f"Progress: {stats['progress']['processed']}/{stats['progress']['total']} teams")
         logger.info(f"Added {stats['total_players_added']} players")
         
         if stats["failed_teams"]:
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Run the scraper tier on its own, separately from the web processes.
+
+Roles:
+  --scheduler   Run the scheduled jobs that queue scrape work; only the
+                elected leader among all scheduler processes runs them
+  --fetchers N  Run N threads that claim queued jobs and fetch their pages
+  --writer      Store fetched pages on a single writer thread instead of on
+                the fetch threads (e.g. for SQLite, which has one writer)
+
+Without a role flag the process runs the scheduler and the default number
+of fetch workers. Web processes should run with APP_ROLE=web so they never
+import the scrapers.
+"""
+
+import os
+import sys
+import logging
+import argparse
+import time
+
+# Add parent directory to path to allow importing app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The roles below are started explicitly
+os.environ.setdefault("APP_ROLE", "worker")
+
+# Import the necessary modules
+from app import app
+from utils.refresh_jobs import JOB_POLL_INTERVAL
+from utils.scheduling import start_scheduler, scheduler_budget, get_scheduler_stats, get_budget_report, JOB_WORKERS
+from utils.leader import start_leader_election
+from utils.workers import start_workers
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# How often the worker logs its request counts (in seconds)
+STATS_INTERVAL = 300
+
+
+def run_worker(scheduler=True, fetchers=JOB_WORKERS, writer=False, requests_per_minute=None,
+               poll_interval=JOB_POLL_INTERVAL):
+    """
+    Start the requested roles and keep the process alive
+
+    Args:
+        scheduler (bool): Campaign for leadership and run the scheduled jobs when elected
+        fetchers (int): Number of fetch worker threads
+        writer (bool): Use a single writer thread for fetched pages
+        requests_per_minute (int, optional): Outbound request budget of this process
+        poll_interval (int): Seconds an idle fetch worker waits between polls
+    """
+    if requests_per_minute:
+        scheduler_budget.set_rate(requests_per_minute)
+
+    with app.app_context():
+        if fetchers:
+            start_workers(fetchers, scheduler_budget, writer=writer, poll_interval=poll_interval)
+
+        if scheduler:
+            # Fetching is done by this process's own workers above, or by other worker processes
+            start_leader_election(lambda: start_scheduler(job_workers=0))
+
+    logger.info(f"Scraper worker running (scheduler: {scheduler}, fetchers: {fetchers}, writer: {writer})")
+
+    while True:
+        time.sleep(STATS_INTERVAL)
+        logger.info(f"Requests by job: {scheduler_budget.consumed_by}")
+        logger.info(f"Requests by class: {get_budget_report()}")
+        if scheduler:
+            logger.info(f"Scheduled jobs: {get_scheduler_stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the scheduler and scrape job workers")
+    parser.add_argument("--scheduler", action="store_true", help="Run the scheduled jobs (leader only)")
+    parser.add_argument("--fetchers", type=int, default=None, help="Number of fetch worker threads")
+    parser.add_argument("--writer", action="store_true", help="Store fetched pages on a single writer thread")
+    parser.add_argument("--requests-per-minute", type=int, default=None,
+                        help="Outbound request budget of this process")
+    parser.add_argument("--poll-interval", type=float, default=JOB_POLL_INTERVAL,
+                        help="Seconds an idle fetch worker waits between polls")
+    args = parser.parse_args()
+
+    if args.writer and args.fetchers == 0:
+        parser.error("--writer stores pages fetched by this process; it needs --fetchers")
+
+    if not (args.scheduler or args.writer or args.fetchers is not None):
+        # No role given: run everything
+        args.scheduler = True
+        args.fetchers = JOB_WORKERS
+    elif args.fetchers is None:
+        args.fetchers = JOB_WORKERS if args.writer else 0
+
+    run_worker(
+        scheduler=args.scheduler,
+        fetchers=args.fetchers,
+        writer=args.writer,
+        requests_per_minute=args.requests_per_minute,
+        poll_interval=args.poll_interval
+    )
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Replay a match calendar against the match scheduling policy on a virtual
+clock, to tune intervals and windows offline.
+
+Reports, per policy, the freshness lag of matches going live, score changes
+and results (p50/p95/max seconds until a fetch returned the change), the
+requests spent, the share of detail fetches that returned nothing new and
+the budget used per job class. The match jobs share the workers and the
+budget with the event, retry, roster and player work.
+
+Examples:
+  python scripts/simulate_scheduler.py --hours 48 --matches 120
+  python scripts/simulate_scheduler.py --live-interval 120 300 600 --json
+  python scripts/simulate_scheduler.py --calendar recorded_calendar.json
+"""
+
+import os
+import sys
+import json
+import logging
+import argparse
+
+# Add parent directory to path to allow importing app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Scripts do their own scraping; importing the app must not start the scheduler
+os.environ.setdefault("APP_ROLE", "script")
+
+# Import the necessary modules
+from utils.simulation import SchedulerPolicy, generate_calendar, load_calendar, simulate, SIM_SOURCE_LATENCY
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def print_report(report):
+    """
+    Print a simulation report in a readable form
+    """
+    policy = report['policy']
+    print(f"Policy: live every {policy['live_interval']}s (top {policy['live_limit']}), "
+          f"full every {policy['full_interval']}s (top {policy['full_limit']}), "
+          f"{policy['workers']} workers, {policy['requests_per_minute']} requests/min")
+
+    for state, lag in report['freshness'].items():
+        print(f"  {state:<10} {lag['changes']:>5} changes  p50 {lag['p50']}s  p95 {lag['p95']}s  "
+              f"max {lag['max']}s  missed {lag['missed']}")
+
+    requests = report['requests']
+    print(f"  requests   {requests['total']} ({requests['listing']} listings, {requests['detail']} details, "
+          f"{requests['other']} other, {requests['per_minute']}/min), wasted {report['wasted_fetches']} ({report['wasted_share']:.0%}), "
+          f"listings reused {report['listing_reuses']}")
+
+    for budget_class, usage in report['budget'].items():
+        if usage['requests']:
+            print(f"  {budget_class:<10} {usage['requests']:>5} requests ({usage['share']:.0%} of {usage['fair_share']:.0%} share), "
+                  f"average wait {usage['average_wait']}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate the match scheduling policy on a match calendar")
+    parser.add_argument("--calendar", help="Recorded calendar JSON file (default: synthetic calendar)")
+    parser.add_argument("--matches", type=int, default=60, help="Matches in the synthetic calendar")
+    parser.add_argument("--hours", type=float, default=24, help="Simulated hours")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed of the calendar and latency model")
+    parser.add_argument("--latency", type=float, default=SIM_SOURCE_LATENCY, help="Median source response time (s)")
+    parser.add_argument("--live-interval", type=int, nargs="+", default=[None],
+                        help="Quick pass interval(s) in seconds; several values are compared")
+    parser.add_argument("--full-interval", type=int, help="Comprehensive pass interval in seconds")
+    parser.add_argument("--live-limit", type=int, help="Matches queued by the quick pass")
+    parser.add_argument("--full-limit", type=int, help="Matches queued by the comprehensive pass")
+    parser.add_argument("--detail-reuse-window", type=int, help="Seconds a fetched match is not queued again")
+    parser.add_argument("--workers", type=int, help="Job workers")
+    parser.add_argument("--requests-per-minute", type=int, help="Request budget")
+    parser.add_argument("--completed-listed-for", type=int,
+                        help="Seconds a finished match stays on the listing")
+    parser.add_argument("--no-background-load", action="store_true",
+                        help="Leave out the event, retry, roster and player work sharing the budget")
+    parser.add_argument("--json", action="store_true", help="Print the reports as JSON")
+    args = parser.parse_args()
+
+    if args.calendar:
+        calendar = load_calendar(args.calendar)
+    else:
+        calendar = generate_calendar(args.matches, args.hours, seed=args.seed)
+
+    # Run past the last start so matches starting late can finish
+    duration = (args.hours + 3) * 3600
+
+    reports = []
+    for live_interval in args.live_interval:
+        policy = SchedulerPolicy.from_scheduler(
+            live_interval=live_interval,
+            full_interval=args.full_interval,
+            live_limit=args.live_limit,
+            full_limit=args.full_limit,
+            detail_reuse_window=args.detail_reuse_window,
+            workers=args.workers,
+            requests_per_minute=args.requests_per_minute,
+            completed_listed_for=args.completed_listed_for,
+            background={} if args.no_background_load else None
+        )
+        reports.append(simulate(policy, calendar, duration, latency=args.latency, seed=args.seed))
+
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    else:
+        for report in reports:
+            print_report(report)
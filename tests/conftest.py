@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+# Import the app against a throwaway database, without starting the scheduler
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["DATABASE_URL"] = "sqlite://"
+os.environ["APP_ROLE"] = "script"
+
+from app import app as flask_app, db  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    import models  # noqa: F401
+
+    with flask_app.app_context():
+        db.create_all()
+        yield flask_app
+        db.session.remove()
+        db.drop_all()
@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from models import EntityAccess, ScrapeJob, Team
+import utils.access_tracking
+from utils.access_tracking import (
+    ACCESS_HALF_LIFE, COLD_REFRESH_INTERVAL, HOT_REFRESH_INTERVAL, HOT_SCORE, WARM_REFRESH_INTERVAL, WARM_SCORE,
+    decay_score, flush_access_counts, get_access_scores, get_refresh_interval, is_refresh_due, record_access
+)
+from utils.player_refresh import get_player_tier
+
+
+class FakeThread:
+    started = []
+
+    def __init__(self, target, args, name, daemon):
+        self.args = args
+
+    def start(self):
+        FakeThread.started.append(self.args)
+
+
+@pytest.fixture
+def counters(monkeypatch):
+    monkeypatch.setattr(utils.access_tracking, '_pending', {})
+    monkeypatch.setattr(utils.access_tracking, '_flush_thread', None)
+    monkeypatch.setattr(utils.access_tracking.threading, 'Thread', FakeThread)
+    FakeThread.started = []
+
+
+def test_score_halves_every_half_life():
+    assert decay_score(8.0, 0) == 8.0
+    assert decay_score(8.0, ACCESS_HALF_LIFE) == pytest.approx(4.0)
+    assert decay_score(8.0, 3 * ACCESS_HALF_LIFE) == pytest.approx(1.0)
+    assert decay_score(None, ACCESS_HALF_LIFE) == 0.0
+
+
+def test_refresh_interval_tiers():
+    assert get_refresh_interval(HOT_SCORE) == HOT_REFRESH_INTERVAL
+    assert get_refresh_interval(WARM_SCORE) == WARM_REFRESH_INTERVAL
+    assert get_refresh_interval(0.0) == COLD_REFRESH_INTERVAL
+
+    now = datetime(2025, 5, 1)
+    two_days_ago = now - timedelta(days=2)
+    assert is_refresh_due(None, 0.0, now)
+    assert is_refresh_due(two_days_ago, WARM_SCORE, now)
+    assert not is_refresh_due(two_days_ago, 0.0, now)
+
+
+def test_flush_merges_counts_into_the_decayed_stored_score(app, counters):
+    db.session.add(EntityAccess(entity_type='team', entity_id='2', score=8.0,
+                                last_accessed=datetime.utcnow() - timedelta(seconds=ACCESS_HALF_LIFE)))
+    db.session.commit()
+
+    for _ in range(3):
+        record_access('team', '2')
+    record_access('player', '9')
+
+    # Unflushed counts are already visible to the refresh passes
+    assert get_access_scores('team')['2'] == pytest.approx(7.0, rel=1e-3)
+
+    assert flush_access_counts() == 2
+    assert utils.access_tracking._pending == {}
+    stored = EntityAccess.query.filter_by(entity_type='team', entity_id='2').one()
+    assert stored.score == pytest.approx(7.0, rel=1e-3)
+    assert get_access_scores('player') == {'9': pytest.approx(1.0, rel=1e-3)}
+
+
+def test_first_access_starts_the_flush_thread_once(app, counters):
+    record_access('team', '2')
+    record_access('team', '3')
+
+    assert FakeThread.started == [(app, utils.access_tracking.ACCESS_FLUSH_INTERVAL)]
+
+
+def test_player_requested_often_is_hot_on_their_own():
+    assert get_player_tier(None, None, {}, player_score=HOT_SCORE) == 'hot'
+    assert get_player_tier('2', 'sub', {}, player_score=0.0) == 'benched'
+    assert get_player_tier('2', None, {'2': HOT_SCORE}) == 'hot'
+    assert get_player_tier('2', None, {}) == 'active'
+
+
+def test_hot_teams_are_queued_first(app, counters):
+    from utils.db_operations import update_teams_and_players
+
+    for team_id in ('1', '2', '3'):
+        db.session.add(Team(id=team_id, name=f'Team {team_id}', last_updated=datetime(2024, 1, 1)))
+    db.session.commit()
+    for _ in range(int(HOT_SCORE) + 5):
+        record_access('team', '3')
+
+    assert update_teams_and_players(reset=True) == 3
+    jobs = ScrapeJob.query.filter_by(kind='team').order_by(ScrapeJob.id).all()
+    assert [job.target_id for job in jobs] == ['3', '1', '2']
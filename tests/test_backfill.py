@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import CrawlCheckpoint
+from scripts import backfill_results
+
+
+class FakeVlrScraper:
+    def __init__(self, pages, fail_on=None):
+        self.pages = pages
+        self.fail_on = fail_on
+        self.requested = []
+
+    def get_results(self, page):
+        self.requested.append(page)
+        if page == self.fail_on:
+            raise ConnectionError("connection reset")
+        return self.pages.get(page, [])
+
+    def get_match_details_batch(self, match_ids, max_workers=None, budget=None, failures=None):
+        return {}
+
+
+def results_page(first_id, day):
+    return [{'id': str(first_id + offset), 'date': day} for offset in range(3)]
+
+
+def test_checkpoint_name_only_uses_explicit_dates():
+    assert backfill_results.get_checkpoint_name('backfill_results') == 'backfill_results:default:today'
+    assert backfill_results.get_checkpoint_name('backfill_results', datetime(2024, 1, 1)) == \
+        'backfill_results:2024-01-01:today'
+
+
+def test_default_range_resumes_at_the_last_page(app, monkeypatch):
+    yesterday = datetime.utcnow() - timedelta(days=1)
+    pages = {page: results_page(page * 10, yesterday) for page in range(1, 5)}
+
+    monkeypatch.setattr(backfill_results, 'vlr_scraper', FakeVlrScraper(pages, fail_on=3))
+    with pytest.raises(ConnectionError):
+        backfill_results.backfill_results()
+    assert CrawlCheckpoint.query.filter_by(name='backfill_results:default:today').one().cursor == '2'
+
+    # A later run without dates picks up the same checkpoint and re-reads the last page,
+    # whose tail may have shifted onto the next one
+    scraper = FakeVlrScraper(pages)
+    monkeypatch.setattr(backfill_results, 'vlr_scraper', scraper)
+    stats = backfill_results.backfill_results()
+
+    assert stats['resumed_from_page'] == 2
+    assert scraper.requested == [2, 3, 4, 5]
+
+
+def test_walk_stops_on_pages_without_dates(app, monkeypatch):
+    pages = {page: [{'id': str(page), 'date': None}] for page in range(1, 20)}
+    scraper = FakeVlrScraper(pages)
+    monkeypatch.setattr(backfill_results, 'vlr_scraper', scraper)
+
+    stats = backfill_results.backfill_results()
+
+    assert scraper.requested == [1, 2, 3]
+    assert stats['pages'] == backfill_results.MAX_UNDATED_PAGES
+    # Left unfinished, so a run after the parser is fixed resumes where this one stopped
+    assert CrawlCheckpoint.query.one().finished_at is None
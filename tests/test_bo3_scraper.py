@@ -0,0 +1,94 @@
+import json
+import os
+from datetime import datetime
+
+import pytest
+
+from scrapers import bo3_scraper
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'bo3')
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES, f"{name}.json")) as fixture_file:
+        return json.load(fixture_file)
+
+
+@pytest.fixture
+def fixture_dir(monkeypatch):
+    monkeypatch.setattr(bo3_scraper, 'FIXTURE_DIR', FIXTURES)
+
+
+def test_parse_match():
+    match = bo3_scraper.parse_match(load_fixture('match_98211'))
+
+    assert match['id'] == '98211'
+    assert match['team1_id'] == 'sentinels'
+    assert match['team2_id'] == 'g2-esports'
+    assert match['date'] == datetime(2025, 4, 20, 19, 0)
+    assert match['status'] == 'completed'
+    assert match['score'] == '2-1'
+    assert match['match_format'] == 'bo3'
+    assert match['event_name'] == 'VCT 2025: Americas Stage 1'
+
+
+def test_parse_match_upcoming_has_no_score():
+    upcoming = load_fixture('matches')['results'][1]
+    match = bo3_scraper.parse_match(upcoming)
+
+    assert match['status'] == 'upcoming'
+    assert match['score'] == 'TBD'
+
+
+def test_parse_match_incomplete():
+    assert bo3_scraper.parse_match({'id': 1, 'team1': {'name': 'LOUD'}}) is None
+
+
+def test_parse_games_orients_scores_to_team1():
+    data = load_fixture('match_98211')
+    maps = bo3_scraper.parse_games(data['games'], team1_id=data['team1_id'])
+
+    assert [m['map_name'] for m in maps] == ['Ascent', 'Lotus', 'Pearl']
+    assert [(m['team1_score'], m['team2_score']) for m in maps] == [(13, 9), (11, 13), (14, 12)]
+
+
+def test_get_matches_and_details_from_fixtures(fixture_dir):
+    matches = bo3_scraper.get_matches(limit=10)
+    assert [match['id'] for match in matches] == ['98211', '98240']
+
+    details = bo3_scraper.get_match_details('98211')
+    assert details['id'] == '98211'
+    assert len(details['maps']) == 3
+
+
+def test_match_job_carries_the_slug_to_another_worker(app, fixture_dir, monkeypatch):
+    from types import SimpleNamespace
+
+    from models import ScrapeJob
+    from utils.db_operations import scrape_and_update_recent_matches
+    from utils.match_listing import ListingCache
+    from utils.refresh_jobs import fetch_match
+    import utils.match_listing
+
+    monkeypatch.setattr(utils.match_listing, 'listing_cache', ListingCache())
+    scrape_and_update_recent_matches(SimpleNamespace(get_matches=lambda limit: []), bo3_scraper, limit=10)
+    job = ScrapeJob.query.filter_by(kind='match', target_id='98211').one()
+
+    requested = []
+    real_get_json = bo3_scraper.get_json
+
+    def get_json(path, params=None, fixture=None):
+        requested.append(path)
+        return real_get_json(path, params=params, fixture=fixture)
+
+    monkeypatch.setattr(bo3_scraper, 'get_json', get_json)
+    details = fetch_match(job)
+
+    assert requested == ['/matches/sentinels-vs-g2-esports-20-04-2025']
+    assert details['id'] == '98211'
+
+
+def test_dead_letter_replay_reads_the_slug_from_the_failed_url():
+    url = 'https://api.bo3.gg/api/v1/matches/loud-vs-mibr-21-04-2025?with=teams'
+    assert bo3_scraper.get_slug_from_url(url) == 'loud-vs-mibr-21-04-2025'
+    assert bo3_scraper.get_slug_from_url(None) is None
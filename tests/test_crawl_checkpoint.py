@@ -0,0 +1,45 @@
+from app import db
+from models import Team
+from utils.crawl_checkpoint import finish_crawl, get_crawl_progress, iter_chunks, save_checkpoint, start_crawl
+
+
+def add_teams(count):
+    db.session.add_all([Team(id=f'{index:03d}', name=f'Team {index}') for index in range(count)])
+    db.session.commit()
+
+
+def test_interrupted_crawl_resumes_after_the_last_chunk(app):
+    add_teams(7)
+    checkpoint = start_crawl('team_roster', total=7)
+
+    chunks = iter_chunks(Team.query, Team.id, cursor=checkpoint.cursor, chunk_size=3)
+    first = next(chunks)
+    save_checkpoint(checkpoint, first[-1].id, len(first))
+
+    # The process dies here; the next run picks up after the saved cursor
+    checkpoint = start_crawl('team_roster', total=7)
+    assert (checkpoint.cursor, checkpoint.processed) == ('002', 3)
+
+    remaining = [team.id for chunk in iter_chunks(Team.query, Team.id, cursor=checkpoint.cursor, chunk_size=3) for team in chunk]
+    assert remaining == ['003', '004', '005', '006']
+
+
+def test_finished_or_reset_crawl_starts_over(app):
+    add_teams(2)
+    checkpoint = start_crawl('team_roster', total=2)
+    save_checkpoint(checkpoint, '001', 2)
+    finish_crawl(checkpoint)
+
+    assert start_crawl('team_roster').cursor is None
+
+    save_checkpoint(checkpoint, '000', 1)
+    assert start_crawl('team_roster', reset=True).cursor is None
+
+
+def test_progress_reports_an_eta(app):
+    checkpoint = start_crawl('backfill', total=100)
+    save_checkpoint(checkpoint, '10', 10)
+
+    progress = get_crawl_progress('backfill')[0]
+    assert (progress['processed'], progress['total']) == (10, 100)
+    assert progress['eta_seconds'] is not None
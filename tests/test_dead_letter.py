@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta
+
+from app import db
+from models import FailedScrape, ScrapeJob
+from scrapers import player_scraper
+from scrapers.fetch_state import record_fetch
+from utils.dead_letter import (
+    DEAD_LETTER_BASE_DELAY, DEAD_LETTER_MAX_ATTEMPTS, DEAD_LETTER_MAX_DELAY, POISON_REPEATS, get_blocked_ids,
+    get_due_retries, get_retry_delay, record_failure, record_success, requeue_failure
+)
+from utils.refresh_jobs import run_job
+
+
+def running_job(kind, target_id):
+    job = ScrapeJob(kind=kind, target_id=target_id, status='running', priority=4, dedup_key=f'{kind}:{target_id}',
+                    attempts=1, max_attempts=3, lease_owner='test', created_at=datetime.utcnow())
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def test_failure_is_not_filed_with_the_previous_jobs_request(app, monkeypatch):
+    # The previous job on this thread fetched a page that parsed
+    record_fetch('https://www.vlr.gg/player/1/tenz', content=b'<html></html>')
+    monkeypatch.setattr(player_scraper, 'get_player_details', lambda player_id: None)
+
+    assert not run_job(running_job('player', '2'))
+
+    failure = FailedScrape.query.filter_by(item_type='player', item_id='2').one()
+    assert failure.url is None
+    assert failure.page_hash is None
+    assert failure.stage == 'fetch'
+
+
+def test_retry_delay_doubles_up_to_the_maximum():
+    assert get_retry_delay(1) == timedelta(seconds=DEAD_LETTER_BASE_DELAY)
+    assert get_retry_delay(3) == timedelta(seconds=4 * DEAD_LETTER_BASE_DELAY)
+    assert get_retry_delay(30) == timedelta(seconds=DEAD_LETTER_MAX_DELAY)
+
+
+def test_failed_item_waits_for_its_retry(app):
+    failure = record_failure('team', '2', fetch={'url': 'https://www.vlr.gg/team/2', 'error_class': 'ConnectionError'})
+
+    assert failure.status == 'pending'
+    assert failure.stage == 'fetch'
+    assert failure.error_class == 'ConnectionError'
+    assert get_blocked_ids('team', ['2', '3']) == {'2'}
+    assert get_due_retries() == []
+
+    # Once the backoff has passed the item is due and no longer blocked
+    later = failure.next_retry_at + timedelta(seconds=1)
+    assert get_due_retries(now=later) == [failure]
+    assert get_blocked_ids('team', ['2'], now=later) == set()
+
+    second = record_failure('team', '2', fetch={})
+    assert second.attempts == 2
+    assert second.next_retry_at - second.last_failed_at == get_retry_delay(2)
+
+
+def test_item_is_quarantined_after_the_maximum_attempts(app):
+    for _ in range(DEAD_LETTER_MAX_ATTEMPTS):
+        failure = record_failure('match', '12345', fetch={})
+
+    assert failure.status == 'quarantined'
+    assert failure.next_retry_at is None
+    # Quarantined items are never due, and never fetched by scheduled passes
+    assert get_due_retries(now=datetime.utcnow() + timedelta(days=365)) == []
+    assert get_blocked_ids('match', ['12345'], now=datetime.utcnow() + timedelta(days=365)) == {'12345'}
+
+
+def test_unchanged_page_that_keeps_failing_to_parse_is_quarantined(app):
+    fetch = {'url': 'https://www.vlr.gg/player/9', 'page_hash': 'abc'}
+    for _ in range(POISON_REPEATS - 1):
+        failure = record_failure('player', '9', fetch=fetch)
+    assert failure.status == 'pending'
+    assert failure.stage == 'parse'
+
+    failure = record_failure('player', '9', fetch=fetch)
+    assert failure.status == 'quarantined'
+    assert failure.hash_repeats == POISON_REPEATS
+
+
+def test_changed_page_resets_the_poison_count(app):
+    record_failure('player', '9', fetch={'page_hash': 'abc'})
+    record_failure('player', '9', fetch={'page_hash': 'abc'})
+    failure = record_failure('player', '9', fetch={'page_hash': 'def'})
+
+    assert failure.hash_repeats == 1
+    assert failure.status == 'pending'
+
+
+def test_success_resolves_and_requeue_makes_due(app):
+    for _ in range(DEAD_LETTER_MAX_ATTEMPTS):
+        failure = record_failure('team', '2', fetch={})
+
+    requeued = requeue_failure(failure.id)
+    assert requeued.status == 'pending'
+    assert get_due_retries() == [failure]
+
+    record_success('team', '2')
+    assert db.session.get(FailedScrape, failure.id).status == 'resolved'
+    assert get_blocked_ids('team', ['2']) == set()
+
+    # A new failure after recovery starts counting from scratch
+    assert record_failure('team', '2', fetch={}).attempts == 1
@@ -0,0 +1,56 @@
+from app import db
+from models import Match
+from utils.event_crawler import fetch_event_matches
+
+
+class FakeVlrScraper:
+    def __init__(self, pages):
+        self.pages = pages
+        self.pages_fetched = []
+        self.fetched_matches = []
+
+    def iter_event_match_ids(self, event_id):
+        for number, page in enumerate(self.pages.get(event_id, []), start=1):
+            self.pages_fetched.append((event_id, number))
+            yield page
+
+    def get_match_details_batch(self, match_ids, max_workers=None, budget=None, failures=None):
+        self.fetched_matches.extend(match_ids)
+        return {}
+
+
+def test_matches_tab_paging_stops_at_the_fetch_limit(app):
+    scraper = FakeVlrScraper({
+        '100': [['1', '2'], ['3', '4'], ['5', '6']],
+        '200': [['7', '8']]
+    })
+
+    fetch_event_matches(scraper, {'100': [], '200': []}, limit=3)
+
+    assert scraper.pages_fetched == [('100', 1), ('100', 2)]
+    assert scraper.fetched_matches == ['1', '2', '3']
+
+
+def test_completed_matches_do_not_count_towards_the_limit(app):
+    db.session.add_all([Match(id='1', status='completed'), Match(id='2', status='completed')])
+    db.session.commit()
+    scraper = FakeVlrScraper({'100': [['3', '4'], ['5']]})
+
+    fetch_event_matches(scraper, {'100': ['1', '2']}, limit=3)
+
+    assert scraper.pages_fetched == [('100', 1), ('100', 2)]
+    assert scraper.fetched_matches == ['3', '4', '5']
+
+
+def test_matches_tab_paging_stops_at_a_page_of_known_matches(app):
+    db.session.add(Match(id='3', status='completed'))
+    db.session.commit()
+    scraper = FakeVlrScraper({
+        '100': [['1', '2', '4'], ['2', '3'], ['5', '6']],
+        '200': [['1', '2'], ['7', '8']]
+    })
+
+    fetch_event_matches(scraper, {'100': ['1', '2'], '200': []}, limit=10)
+
+    assert scraper.pages_fetched == [('100', 1), ('100', 2), ('200', 1)]
+    assert scraper.fetched_matches == ['1', '2', '4']
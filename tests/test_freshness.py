@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from models import Match, SchedulerJobState
+import utils.freshness
+from utils.freshness import FRESHNESS_CLASSES, FRESHNESS_LAG_TOLERANCE
+
+
+@pytest.fixture(autouse=True)
+def no_cached_report(monkeypatch):
+    monkeypatch.setattr(utils.freshness, '_cache', {'report': None, 'at': 0})
+
+
+def test_fresh_data_is_healthy(app):
+    db.session.add(Match(id='1', status='live', last_updated=datetime.utcnow()))
+    db.session.commit()
+
+    response = app.test_client().get('/api/status/freshness')
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['ok'] is True
+    assert body['classes']['live']['count'] == 1
+
+
+def test_stale_class_returns_503(app):
+    target = FRESHNESS_CLASSES['live']['target']
+    db.session.add(Match(id='1', status='live', last_updated=datetime.utcnow() - timedelta(seconds=target * 2)))
+    db.session.commit()
+
+    response = app.test_client().get('/api/status/freshness')
+
+    assert response.status_code == 503
+    live = response.get_json()['classes']['live']
+    assert live['stale'] is True
+    assert live['p95'] > target
+
+
+def test_job_behind_schedule_returns_503(app):
+    overdue = datetime.utcnow() - timedelta(seconds=FRESHNESS_LAG_TOLERANCE * 3)
+    db.session.add(SchedulerJobState(name='events', runs=1, failures=0, next_run_at=overdue))
+    db.session.commit()
+
+    response = app.test_client().get('/api/status/freshness')
+
+    assert response.status_code == 503
+    events = response.get_json()['classes']['events']
+    assert (events['behind'], events['stale']) == (True, False)
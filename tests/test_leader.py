@@ -0,0 +1,47 @@
+import pytest
+
+import utils.leader
+from utils.leader import LeaderElection
+
+
+@pytest.fixture
+def lock_file(tmp_path, monkeypatch):
+    path = tmp_path / 'scheduler.lock'
+    monkeypatch.setattr(utils.leader, 'LOCK_FILE', str(path))
+    return path
+
+
+def test_only_one_process_holds_the_lock_file(app, lock_file):
+    leader = LeaderElection()
+    follower = LeaderElection()
+
+    assert leader.try_acquire()
+    assert leader.backend == 'lock_file'
+    assert leader.to_dict()['leader'] is True
+    assert not follower.try_acquire()
+    assert not follower.check()
+
+    # The lock is released when the leader dies; the follower takes over on its next try
+    leader.lock_file.close()
+    assert follower.try_acquire()
+    assert follower.check()
+
+
+def test_leader_that_lost_its_database_session_steps_down(app):
+    class BrokenConnection:
+        closed = False
+
+        def execute(self, statement):
+            raise ConnectionError("server closed the connection")
+
+        def close(self):
+            self.closed = True
+
+    election = LeaderElection()
+    connection = BrokenConnection()
+    election.is_leader = True
+    election.connection = connection
+
+    assert not election.check()
+    assert connection.closed
+    assert election.connection is None
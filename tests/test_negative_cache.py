@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from models import NegativeCacheEntry, Player
+import utils.negative_cache
+from utils.negative_cache import (
+    NEGATIVE_CACHE_MAX_TTL, NEGATIVE_CACHE_TTL, clear_miss, get_miss_state, get_miss_ttl, missing_ids_subquery,
+    record_miss
+)
+
+
+@pytest.fixture(autouse=True)
+def empty_process_cache(monkeypatch):
+    monkeypatch.setattr(utils.negative_cache, '_active', {})
+
+
+def test_ttl_doubles_with_every_miss_up_to_the_maximum():
+    assert get_miss_ttl(1) == NEGATIVE_CACHE_TTL
+    assert get_miss_ttl(2) == 2 * NEGATIVE_CACHE_TTL
+    assert get_miss_ttl(3) == 4 * NEGATIVE_CACHE_TTL
+    assert get_miss_ttl(20) == NEGATIVE_CACHE_MAX_TTL
+
+
+def test_repeated_miss_extends_the_entry(app):
+    first = record_miss('team', 'gone')
+    second = record_miss('team', 'gone')
+
+    entry = NegativeCacheEntry.query.filter_by(entity_type='team', entity_id='gone').one()
+    assert entry.misses == 2
+    assert second - first >= NEGATIVE_CACHE_TTL
+    assert entry.expires_at - entry.last_missed_at == 2 * NEGATIVE_CACHE_TTL
+
+
+def test_miss_is_active_until_it_expires(app, monkeypatch):
+    expires_at = record_miss('player', '404')
+
+    assert get_miss_state('player', '404') == 'active'
+    assert get_miss_state('player', '405') is None
+
+    # Another process that never saw the miss reads it from the database
+    monkeypatch.setattr(utils.negative_cache, '_active', {})
+    assert get_miss_state('player', '404') == 'active'
+    assert get_miss_state('player', '404', now=expires_at + timedelta(seconds=1)) == 'expired'
+
+
+def test_found_entity_forgets_its_miss(app):
+    record_miss('event', '77')
+    clear_miss('event', '77')
+
+    assert get_miss_state('event', '77') is None
+    assert NegativeCacheEntry.query.count() == 0
+
+
+def test_refresh_queries_leave_out_known_missing_ids(app):
+    db.session.add_all([Player(id='1', name='TenZ'), Player(id='404', name='Gone')])
+    db.session.commit()
+    record_miss('player', '404')
+
+    remaining = Player.query.filter(~Player.id.in_(missing_ids_subquery('player'))).all()
+    assert [player.id for player in remaining] == ['1']
+
+    later = datetime.utcnow() + NEGATIVE_CACHE_TTL + timedelta(minutes=1)
+    assert Player.query.filter(~Player.id.in_(missing_ids_subquery('player', later))).count() == 2
+
+
+def test_process_cache_is_bounded(app, monkeypatch):
+    monkeypatch.setattr(utils.negative_cache, 'NEGATIVE_CACHE_MAX_ENTRIES', 3)
+    active = utils.negative_cache._active
+    active[('team', 'old')] = datetime.utcnow() - timedelta(minutes=1)
+
+    for team_id in ('1', '2', '3'):
+        record_miss('team', team_id)
+    # The expired entry goes first, then the oldest one
+    assert list(active) == [('team', '1'), ('team', '2'), ('team', '3')]
+
+    record_miss('team', '4')
+    assert list(active) == [('team', '2'), ('team', '3'), ('team', '4')]
+
+    # An entry dropped from memory is still read from the database
+    assert get_miss_state('team', '1') == 'active'
+    assert len(active) == 3
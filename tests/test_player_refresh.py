@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+
+from app import db
+from models import Player, Team
+from utils.access_tracking import record_access, HOT_SCORE
+from utils.negative_cache import record_miss
+from utils.player_refresh import PLAYER_TIER_STALENESS, get_stale_players
+
+NOW = datetime(2025, 5, 1, 12, 0)
+
+
+def add_player(player_id, team_id=None, role=None, age=None):
+    db.session.add(Player(id=player_id, name=player_id, team_id=team_id, role=role,
+                          last_updated=NOW - timedelta(seconds=age) if age is not None else None))
+    if age is None:
+        # The column default fills in an explicit None on insert
+        db.session.flush()
+        Player.query.filter_by(id=player_id).update({'last_updated': None})
+
+
+def test_players_are_due_by_their_tier(app):
+    db.session.add(Team(id='2', name='Sentinels'))
+    day = 86400
+    add_player('active-due', '2', age=3 * day)  # Active tier: 2 days
+    add_player('active-fresh', '2', age=1 * day)
+    add_player('benched-fresh', '2', role='sub', age=3 * day)  # Benched tier: 7 days
+    add_player('free-agent-fresh', age=10 * day)  # Inactive tier: 30 days
+    add_player('never-fetched', '2')
+    db.session.commit()
+
+    due = get_stale_players(now=NOW)
+
+    # Never-fetched players first, then by how far past their tier's staleness
+    assert due == [('never-fetched', 'active'), ('active-due', 'active')]
+
+
+def test_hot_team_players_and_batch_size(app, monkeypatch):
+    import utils.access_tracking
+
+    monkeypatch.setattr(utils.access_tracking, '_pending', {})
+    monkeypatch.setattr(utils.access_tracking, '_flush_thread', object())
+    db.session.add_all([Team(id='2', name='Sentinels'), Team(id='3', name='LOUD')])
+    hot_age = PLAYER_TIER_STALENESS['hot'] * 2
+    add_player('hot', '2', age=hot_age)
+    add_player('cold', '3', age=hot_age)
+    add_player('very-stale', '3', age=PLAYER_TIER_STALENESS['active'] * 5)
+    db.session.commit()
+    for _ in range(int(HOT_SCORE) + 1):
+        record_access('team', '2')
+
+    due = get_stale_players(now=NOW)
+    assert due == [('very-stale', 'active'), ('hot', 'hot')]
+    assert get_stale_players(batch_size=1, now=NOW) == [('very-stale', 'active')]
+
+
+def test_known_missing_players_are_left_out(app):
+    add_player('gone')
+    db.session.commit()
+    record_miss('player', 'gone')
+
+    assert get_stale_players() == []
+
+
+def test_player_without_stats_is_fresh_after_its_upsert(app):
+    from utils.db_operations import upsert_player
+
+    add_player('no-stats', age=40 * 86400)
+    db.session.commit()
+
+    assert upsert_player({'id': 'no-stats', 'name': 'no-stats', 'stats': {}})
+    assert get_stale_players() == []
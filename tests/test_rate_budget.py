@@ -0,0 +1,97 @@
+import threading
+import time
+
+from utils.rate_budget import BudgetAllocator
+from utils.refresh_jobs import PRIORITY_BUDGET_CLASSES, PRIORITY_LIVE, PRIORITY_ON_DEMAND, PRIORITY_READS, PRIORITY_MATCHES, PRIORITY_PLAYERS
+
+
+class HeldAllocator:
+    """
+    Allocator whose tokens are handed out one at a time by the test, so the
+    order in which waiting requests are served is deterministic
+    """
+
+    def __init__(self):
+        # No token is earned on its own during a test
+        self.budget = BudgetAllocator('test', 0.001, classes=PRIORITY_BUDGET_CLASSES)
+        self.budget.tokens = 0
+        self.served = []
+        self.threads = []
+
+    def request(self, priority, count=1):
+        budget_class = self.budget.get_class(priority)
+        waiting = len(self.budget.waiting_by_class.get(budget_class, []))
+
+        for _ in range(count):
+            thread = threading.Thread(target=self._acquire, args=(priority,), daemon=True)
+            thread.start()
+            self.threads.append(thread)
+            waiting += 1
+            self.wait_for(lambda: len(self.budget.waiting_by_class.get(budget_class, [])) == waiting)
+
+    def _acquire(self, priority):
+        self.budget.acquire(priority)
+        self.served.append(self.budget.get_class(priority))
+
+    def release(self, tokens):
+        for _ in range(tokens):
+            served = len(self.served)
+            with self.budget.condition:
+                self.budget.tokens += 1
+                self.budget.condition.notify_all()
+            self.wait_for(lambda: len(self.served) == served + 1)
+        return self.served[-tokens:]
+
+    def wait_for(self, condition, timeout=5):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            assert time.monotonic() < deadline, "allocator did not make progress"
+            time.sleep(0.001)
+
+
+def test_live_work_preempts_every_share():
+    allocator = HeldAllocator()
+    allocator.request(PRIORITY_PLAYERS, 3)
+    allocator.release(1)
+    allocator.request(PRIORITY_LIVE, 2)
+    allocator.request(PRIORITY_ON_DEMAND, 1)
+
+    assert allocator.release(5) == ['live', 'live', 'live', 'players', 'players']
+
+
+def test_implicit_refreshes_do_not_preempt():
+    allocator = HeldAllocator()
+    allocator.request(PRIORITY_PLAYERS, 4)
+    allocator.request(PRIORITY_READS, 4)
+
+    # Equal weights alternate instead of draining the reads first
+    assert sorted(allocator.release(4)) == ['players', 'players', 'reads', 'reads']
+
+
+def test_backlogged_classes_share_by_weight():
+    allocator = HeldAllocator()
+    allocator.request(PRIORITY_MATCHES, 20)
+    allocator.request(PRIORITY_PLAYERS, 20)
+
+    served = allocator.release(15)
+    # upcoming weighs 20 and players 10
+    assert served.count('upcoming') == 10
+    assert served.count('players') == 5
+
+
+def test_idle_capacity_is_borrowed_without_credit():
+    allocator = HeldAllocator()
+    allocator.request(PRIORITY_PLAYERS, 12)
+
+    # Nothing else is waiting, so players use the whole budget
+    assert allocator.release(6) == ['players'] * 6
+
+    # A class back from idle gets its share from now on, not the tokens it left unused
+    allocator.request(PRIORITY_MATCHES, 6)
+    served = allocator.release(6)
+    assert served.count('upcoming') == 4
+    assert served.count('players') == 2
+
+    report = allocator.budget.report()
+    assert report['players']['requests'] == 8
+    assert report['players']['borrowed'] > 0
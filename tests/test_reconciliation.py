@@ -0,0 +1,128 @@
+from datetime import datetime, timedelta
+
+from app import db
+from models import Match, MatchSourceLink, MapStatistic, Team
+from utils.reconciliation import canonicalize_match, is_source_team_id, reconcile_listings
+
+
+def listing(match_id, team1, team2, date=None, status='upcoming'):
+    return {'id': match_id, 'team1_name': team1, 'team2_name': team2, 'date': date, 'status': status}
+
+
+def test_listings_of_the_same_match_are_merged(app):
+    start = datetime(2025, 5, 1, 18, 0)
+    plan = reconcile_listings({
+        'vlr': [listing('1001', 'Sentinels', 'G2 Esports', start)],
+        'bo3': [listing('55', 'SEN', 'G2', start + timedelta(minutes=30))]
+    })
+
+    assert len(plan) == 1
+    assert plan[0]['match_id'] == '1001'
+    assert sorted(plan[0]['links']) == [('bo3', '55'), ('vlr', '1001')]
+
+
+def test_undated_listing_does_not_join_a_rematch(app):
+    # Last week's completed meeting on bo3, and a new VLR listing of the same teams without a date
+    plan = reconcile_listings({
+        'vlr': [listing('2002', 'Sentinels', 'G2 Esports')],
+        'bo3': [listing('66', 'Sentinels', 'G2', datetime.utcnow() - timedelta(days=7), status='completed')]
+    })
+
+    assert len(plan) == 2
+    vlr_item = next(item for item in plan if item['links'] == [('vlr', '2002')])
+    assert vlr_item['source'] == 'vlr'
+    assert vlr_item['match_id'] == '2002'
+
+
+def test_known_date_of_a_stored_match_is_used(app):
+    start = datetime(2025, 5, 1, 18, 0)
+    db.session.add(Match(id='3003', date=start, status='upcoming'))
+    db.session.commit()
+
+    plan = reconcile_listings({
+        'vlr': [listing('3003', 'Fnatic', 'Team Heretics')],
+        'bo3': [listing('77', 'FNC', 'TH', start)]
+    })
+
+    assert len(plan) == 1
+    assert plan[0]['match_id'] == '3003'
+
+
+def test_same_id_on_both_sources_is_not_confused(app):
+    # VLR match 4004 is stored; bo3's match 4004 is an unrelated, undated listing
+    db.session.add(Match(id='4004', date=datetime(2025, 5, 1, 18, 0), status='completed'))
+    db.session.commit()
+
+    plan = reconcile_listings({
+        'vlr': [listing('4004', 'Paper Rex', 'DRX')],
+        'bo3': [listing('4004', 'Paper Rex', 'DRX')]
+    })
+
+    assert len(plan) == 2
+    assert {item['match_id'] for item in plan} == {'4004', 'bo3-4004'}
+
+
+def test_bo3_listing_takes_the_date_of_its_linked_match(app):
+    start = datetime(2025, 5, 1, 18, 0)
+    db.session.add(Match(id='5005', date=start, status='live'))
+    db.session.add(MatchSourceLink(source='bo3', source_id='88', match_id='5005'))
+    db.session.commit()
+
+    plan = reconcile_listings({
+        'vlr': [listing('5005', 'Paper Rex', 'DRX', start)],
+        'bo3': [listing('88', 'PRX', 'DRX')]
+    })
+
+    assert len(plan) == 1
+    assert plan[0]['match_id'] == '5005'
+
+
+def test_stored_canonical_match_is_fetched_from_the_canonical_source(app):
+    start = datetime(2025, 5, 1, 18, 0)
+    db.session.add(Match(id='4004', date=start, status='live', match_url='https://www.vlr.gg/4004'))
+    db.session.commit()
+
+    # bo3 is further along and cheaper, but its details would replace VLR's maps and stats
+    plan = reconcile_listings({
+        'vlr': [listing('4004', 'Sentinels', 'G2 Esports', start, status='live')],
+        'bo3': [listing('88', 'SEN', 'G2', start, status='completed')]
+    })
+
+    assert len(plan) == 1
+    assert plan[0]['source'] == 'vlr'
+
+
+def test_other_source_details_keep_the_stored_match_fields(app):
+    db.session.add(Team(id='2', name='Sentinels'))
+    db.session.add(Match(id='5005', team1_id='2', team2_id='11058', status='live', match_url='https://www.vlr.gg/5005'))
+    db.session.add(MapStatistic(match_id='5005', map_name='Ascent', team1_score=13, team2_score=9))
+    db.session.commit()
+
+    details = canonicalize_match({
+        'id': '99', 'team1_id': 'sentinels', 'team2_id': 'g2-esports', 'team1_name': 'Sentinels',
+        'team2_name': 'G2 Esports', 'status': 'completed', 'score': '2-1',
+        'match_url': 'https://bo3.gg/valorant/matches/99', 'maps': [{'map_name': 'Ascent'}]
+    }, '5005', 'bo3')
+
+    assert details['status'] == 'completed'
+    assert details['match_url'] == 'https://www.vlr.gg/5005'
+    assert (details['team1_id'], details['team2_id']) == ('2', '11058')
+    assert 'maps' not in details
+
+
+def test_teams_only_known_from_bo3_are_not_queued(app):
+    from models import ScrapeJob
+    from utils.db_operations import update_teams_and_players
+
+    details = canonicalize_match({'id': '99', 'team1_id': 'newteam', 'team1_name': 'New Team'}, 'bo3-99', 'bo3')
+    assert details['team1_id'] == 'bo3-newteam'
+    assert is_source_team_id(details['team1_id'])
+    assert not is_source_team_id('2')
+
+    # Both teams are long overdue
+    db.session.add(Team(id='2', name='Sentinels', last_updated=datetime(2024, 1, 1)))
+    db.session.add(Team(id='bo3-newteam', name='New Team', last_updated=datetime(2024, 1, 1)))
+    db.session.commit()
+    update_teams_and_players(reset=True)
+
+    assert [job.target_id for job in ScrapeJob.query.filter_by(kind='team').all()] == ['2']
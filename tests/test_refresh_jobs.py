@@ -0,0 +1,183 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import app_routes
+from app import db
+from models import JobRun, ScrapeJob
+import utils.refresh_jobs
+from utils.refresh_jobs import JOB_LEASE_SECONDS, claim_next_job, finish_job, requeue_expired_jobs
+
+
+def add_job(client=None, kind='team', target_id='2', status='succeeded'):
+    job = ScrapeJob(kind=kind, target_id=target_id, client=client, status=status, priority=1,
+                    dedup_key=f'{kind}:{target_id}', attempts=1, max_attempts=3, created_at=datetime.utcnow(),
+                    result='{"team_id": "2", "players": 5}')
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def test_job_is_only_readable_by_its_client(app, monkeypatch):
+    monkeypatch.setattr(app_routes, 'ADMIN_TOKEN', 'secret')
+    client = app.test_client()
+    own = add_job(client='127.0.0.1')
+    other = add_job(client='10.0.0.9', target_id='3')
+
+    assert client.get(f'/api/jobs/{own.id}').status_code == 200
+    assert client.get(f'/api/jobs/{other.id}').status_code == 404
+    assert client.get(f'/api/jobs/{other.id}?token=guess').status_code == 404
+    assert client.get(f'/api/jobs/{other.id}', headers={'X-Admin-Token': 'secret'}).status_code == 200
+
+
+def test_refresh_merged_into_another_clients_job_can_be_polled(app):
+    client = app.test_client()
+    job = add_job(client='10.0.0.9', status='queued')
+
+    response = client.post('/api/refresh/team/2')
+    assert response.status_code == 202
+    assert response.get_json()['deduplicated'] is True
+
+    location = response.headers['Location']
+    assert location.startswith(f'/api/jobs/{job.id}?token=')
+    assert client.get(location).get_json()['id'] == job.id
+
+
+def queue_job(target_id, priority=6, run_after=None):
+    job = ScrapeJob(kind='team', target_id=target_id, status='queued', priority=priority,
+                    dedup_key=f'team:{target_id}', attempts=0, max_attempts=3, run_after=run_after,
+                    created_at=datetime.utcnow())
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def test_most_urgent_due_job_is_leased_once(app):
+    queue_job('1', priority=6)
+    urgent = queue_job('2', priority=1)
+    queue_job('3', priority=0, run_after=datetime.utcnow() + timedelta(minutes=5))
+
+    job = claim_next_job('worker-a')
+    assert job.id == urgent.id
+    assert (job.status, job.lease_owner, job.attempts) == ('running', 'worker-a', 1)
+    assert job.lease_expires_at - job.started_at == timedelta(seconds=JOB_LEASE_SECONDS)
+
+    # The next worker gets the next job, never the leased one; the job waiting for its retry is left alone
+    assert claim_next_job('worker-b').target_id == '1'
+    assert claim_next_job('worker-c') is None
+
+
+def test_job_taken_by_another_worker_is_skipped(app, monkeypatch):
+    first = queue_job('1')
+    second = queue_job('2')
+
+    # Another worker leases the first candidate between the lookup and the update
+    lookup = utils.refresh_jobs.get_claimable_jobs
+
+    def racing_lookup(now):
+        candidates = lookup(now)
+        ScrapeJob.query.filter_by(id=first.id).update({'status': 'running', 'lease_owner': 'worker-b'})
+        db.session.commit()
+        return candidates
+
+    monkeypatch.setattr(utils.refresh_jobs, 'get_claimable_jobs', racing_lookup)
+    job = claim_next_job('worker-a')
+
+    assert job.id == second.id
+    assert db.session.get(ScrapeJob, first.id).lease_owner == 'worker-b'
+
+
+def test_skip_locked_claim_on_postgresql(app, monkeypatch):
+    queue_job('1')
+    locks = []
+    lookup = utils.refresh_jobs.get_claimable_jobs
+
+    class LockRecordingQuery:
+        def __init__(self, query):
+            self.query = query
+
+        def with_for_update(self, **kwargs):
+            locks.append(kwargs)
+            return self.query.with_for_update(**kwargs)
+
+        def __getattr__(self, name):
+            return getattr(self.query, name)
+
+    # SQLite accepts and ignores FOR UPDATE, so the PostgreSQL path runs as is
+    monkeypatch.setattr(db.engine.dialect, 'name', 'postgresql')
+    monkeypatch.setattr(utils.refresh_jobs, 'get_claimable_jobs', lambda now: LockRecordingQuery(lookup(now)))
+
+    job = claim_next_job('worker-a')
+    assert (job.target_id, job.status, job.lease_owner, job.attempts) == ('1', 'running', 'worker-a', 1)
+    assert claim_next_job('worker-b') is None
+    assert locks == [{'skip_locked': True}, {'skip_locked': True}]
+
+
+def test_expired_lease_is_requeued_or_failed(app):
+    queue_job('1')
+    job = claim_next_job('dead-worker')
+    later = job.lease_expires_at + timedelta(seconds=1)
+
+    assert requeue_expired_jobs(now=job.lease_expires_at - timedelta(seconds=1)) == 0
+    assert requeue_expired_jobs(now=later) == 1
+    job = db.session.get(ScrapeJob, job.id)
+    assert (job.status, job.lease_owner) == ('queued', None)
+
+    # A job out of attempts is failed instead of requeued
+    job.attempts = job.max_attempts
+    db.session.commit()
+    job = claim_next_job('dead-worker')
+    requeue_expired_jobs(now=job.lease_expires_at + timedelta(seconds=1))
+    assert db.session.get(ScrapeJob, job.id).status == 'failed'
+
+
+def test_worker_that_lost_its_lease_cannot_finish_the_job(app):
+    queue_job('1')
+    job = claim_next_job('worker-a')
+    # What the hung worker still holds in memory
+    stale = SimpleNamespace(id=job.id, kind=job.kind, lease_owner=job.lease_owner)
+    requeue_expired_jobs(now=job.lease_expires_at + timedelta(seconds=1))
+    retaken = claim_next_job('worker-b')
+
+    assert not finish_job(stale, status='succeeded', finished_at=datetime.utcnow())
+    assert db.session.get(ScrapeJob, retaken.id).lease_owner == 'worker-b'
+
+
+def test_failed_job_in_a_batch_does_not_fail_the_run(app, monkeypatch):
+    from scrapers.fetch_state import record_fetch
+    from utils.job_metrics import track_run
+
+    def fetch(job):
+        if job.target_id == '404':
+            record_fetch('https://www.vlr.gg/team/404', error=ConnectionError("404 Not Found"))
+            return None
+        return {'team_id': job.target_id}
+
+    monkeypatch.setitem(utils.refresh_jobs.JOB_HANDLERS, 'team', (fetch, lambda job, payload: payload))
+    queue_job('404')
+    queue_job('2')
+
+    with track_run('teams') as run:
+        results = [utils.refresh_jobs.run_job(claim_next_job('worker-a')) for _ in range(2)]
+
+    assert sorted(results) == [False, True]
+    assert db.session.get(ScrapeJob, 1).status == 'failed'
+    job_run = JobRun.query.one()
+    assert (job_run.status, job_run.errors) == ('succeeded', 1)
+    assert run.error is None
+
+
+def test_store_failure_on_the_writer_keeps_the_fetched_url(app, monkeypatch):
+    from models import FailedScrape
+    from scrapers.fetch_state import clear_last_fetch
+
+    monkeypatch.setitem(utils.refresh_jobs.JOB_HANDLERS, 'team', (lambda job: {}, lambda job, payload: None))
+    queue_job('2')
+    job = claim_next_job('worker-a')
+
+    # The writer thread made no request of its own
+    clear_last_fetch()
+    fetch = {'url': 'https://www.vlr.gg/team/2', 'page_hash': 'abc123'}
+    assert utils.refresh_jobs.store_job(job, {}, fetch=fetch) is False
+
+    failure = FailedScrape.query.one()
+    assert (failure.stage, failure.url, failure.page_hash) == ('store', 'https://www.vlr.gg/team/2', 'abc123')
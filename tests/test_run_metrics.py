@@ -0,0 +1,42 @@
+from scrapers.fetch_state import record_fetch, record_error
+from utils.run_metrics import RunMetrics, use_run
+from utils.stats import percentile
+
+
+def test_failed_fetches_and_parse_errors_count_as_errors():
+    run = RunMetrics('matches')
+
+    with use_run(run):
+        record_fetch('https://www.vlr.gg/matches', content=b'<html></html>')
+        record_error(ValueError("unexpected markup"))
+        record_fetch('https://www.vlr.gg/12345', error=ConnectionError("reset"))
+
+    assert run.counters['errors'] == 2
+    assert run.error is None
+
+
+def test_percentile_uses_nearest_rank():
+    assert percentile([], 0.5) is None
+    assert percentile([3, 1, 2], 0.5) == 2
+    assert percentile(list(range(1, 101)), 0.95) == 95
+    assert percentile([5, 7], 1.0) == 7
+
+
+def test_run_with_partial_errors_succeeds(app):
+    from utils.job_metrics import get_job_run_summary, save_run
+
+    run = RunMetrics('teams')
+    with use_run(run):
+        record_fetch('https://www.vlr.gg/team/1', content=b'<html></html>')
+        record_fetch('https://www.vlr.gg/team/404', error=ConnectionError("404 Not Found"))
+
+    job_run = save_run(run)
+    assert job_run.status == 'succeeded'
+    assert job_run.errors == 1
+
+    current = get_job_run_summary()['teams']['current']
+    assert (current['failed'], current['errors']) == (0, 1)
+
+    run = RunMetrics('teams')
+    run.fail("database is locked")
+    assert save_run(run).status == 'failed'
@@ -0,0 +1,33 @@
+from datetime import datetime, timedelta
+
+from models import SchedulerJobState
+from utils.scheduler_state import get_job_states, get_next_run, record_job_finish, record_job_start
+
+
+def test_job_that_never_ran_is_due_now(app):
+    now = datetime(2025, 5, 1, 12, 0)
+    assert get_next_run('teams', 14400, now=now) == now
+
+
+def test_restarted_scheduler_waits_out_the_interval(app):
+    started = datetime(2025, 5, 1, 12, 0)
+    record_job_start('teams', started, 14400)
+
+    # A restart an hour later runs the job three hours later, not right away
+    assert get_next_run('teams', 14400, now=started + timedelta(hours=1)) == started + timedelta(hours=4)
+    # An overdue job runs at once
+    assert get_next_run('teams', 14400, now=started + timedelta(hours=5)) == started + timedelta(hours=5)
+
+    state = SchedulerJobState.query.filter_by(name='teams').one()
+    assert state.next_run_at == started + timedelta(hours=4)
+
+
+def test_run_outcomes_are_counted(app):
+    started = datetime(2025, 5, 1, 12, 0)
+    record_job_start('events', started)
+    record_job_finish('events', started + timedelta(seconds=30), 30.0)
+    record_job_finish('events', started + timedelta(seconds=90), 20.0, error="timeout")
+
+    state = SchedulerJobState.query.filter_by(name='events').one()
+    assert (state.runs, state.failures, state.last_error) == (2, 1, "timeout")
+    assert 'events' in get_job_states()
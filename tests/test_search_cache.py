@@ -0,0 +1,86 @@
+import json
+from datetime import datetime
+
+from app import db
+from models import ScrapeJob
+from scrapers.fetch_state import record_error
+from utils.background_refresh import enqueue_refresh
+from utils.refresh_jobs import READ_JOB_QUOTA_ACTIVE
+from utils.search_cache import SearchCache, cached_search, get_cached_search
+import utils.search_cache
+
+
+def add_search_job(query, results, status='succeeded'):
+    job = ScrapeJob(kind='search_teams', target_id=query, status=status, priority=2,
+                    dedup_key=f'search_teams:{query}', attempts=1, max_attempts=3,
+                    created_at=datetime.utcnow(), finished_at=datetime.utcnow(),
+                    result=json.dumps({'added': 0, 'results': results}))
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def test_failed_search_is_not_cached(monkeypatch):
+    monkeypatch.setattr(utils.search_cache, 'search_cache', SearchCache())
+
+    def broken_search(query, limit=10):
+        record_error(ValueError("unexpected markup"))
+        return []
+
+    assert cached_search('teams', 'sentinels', broken_search) is None
+    assert utils.search_cache.search_cache.get('teams', 'sentinels', 10) is None
+    # Nor does it answer longer queries through prefix reuse
+    assert utils.search_cache.search_cache.get('teams', 'sentinels-gc', 10) is None
+
+
+def test_empty_search_is_cached_as_complete(monkeypatch):
+    monkeypatch.setattr(utils.search_cache, 'search_cache', SearchCache())
+
+    assert cached_search('teams', 'nobody', lambda query, limit=10: []) == []
+    assert utils.search_cache.search_cache.get('teams', 'nobody', 10) == []
+
+
+def test_search_run_by_a_worker_is_read_from_its_job(app, monkeypatch):
+    # The web process's cache never saw the search the worker ran
+    monkeypatch.setattr(utils.search_cache, 'search_cache', SearchCache())
+    add_search_job('sentinels', [{'id': '2', 'name': 'Sentinels'}])
+    add_search_job('nobody', [])
+
+    assert get_cached_search('teams', 'Sentinels') == [{'id': '2', 'name': 'Sentinels'}]
+    # A search that found nothing is an answer too, not a miss to queue again
+    assert get_cached_search('teams', 'nobody') == []
+    assert get_cached_search('teams', 'fnatic') is None
+
+
+def test_search_route_answers_from_the_finished_job(app, monkeypatch):
+    monkeypatch.setattr(utils.search_cache, 'search_cache', SearchCache())
+    client = app.test_client()
+
+    response = client.get('/api/search/teams?q=sentinels')
+    assert response.status_code == 200
+    assert response.headers['X-Refresh-Queued'] == 'true'
+    job = db.session.get(ScrapeJob, int(response.headers['X-Refresh-Job']))
+    assert job.client == '127.0.0.1'
+
+    job.status = 'succeeded'
+    job.finished_at = datetime.utcnow()
+    job.result = json.dumps({'added': 0, 'results': [{'id': '2', 'name': 'Sentinels'}]})
+    db.session.commit()
+
+    response = client.get('/api/search/teams?q=sentinels')
+    assert response.get_json() == [{'id': '2', 'name': 'Sentinels'}]
+    assert 'X-Refresh-Queued' not in response.headers
+
+
+def test_implicit_refreshes_count_against_the_client_quota(app):
+    for index in range(READ_JOB_QUOTA_ACTIVE):
+        assert enqueue_refresh('search_teams', f'query {index}', '127.0.0.1')
+
+    assert enqueue_refresh('search_teams', 'one too many', '127.0.0.1') is None
+    # Joining an unfinished refresh queues nothing new
+    assert enqueue_refresh('search_teams', 'query 0', '127.0.0.1') is not None
+    assert enqueue_refresh('search_teams', 'one too many', '10.0.0.2') is not None
+
+    # Reads have their own quota; the client's explicit refreshes are untouched
+    response = app.test_client().post('/api/refresh/team/2')
+    assert response.status_code == 202
@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+
+from utils.simulation import SchedulerPolicy, SchedulerSimulation, SimulatedMatch, generate_calendar, simulate
+from utils.schedule_config import PRIORITY_LIVE, PRIORITY_MATCHES
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_simulator_does_not_load_the_app():
+    code = "import sys, utils.simulation; sys.exit(any(name in sys.modules for name in ('app', 'models', 'scrapers')))"
+    assert subprocess.run([sys.executable, '-c', code], cwd=ROOT).returncode == 0
+
+
+def test_match_in_flight_is_not_queued_again():
+    match = SimulatedMatch(1, 0.0, 3600.0, [600.0])
+    simulation = SchedulerSimulation([match], SchedulerPolicy(workers=1, background={}), seed=1)
+
+    simulation.enqueue(0.0, [match], PRIORITY_MATCHES)
+    assert match.id in simulation.in_flight
+
+    # The live pass lists the match again while its fetch is under way
+    simulation.enqueue(1.0, [match], PRIORITY_LIVE)
+    assert simulation.queue == []
+    assert simulation.deduplicated == 1
+
+
+def test_match_jobs_share_the_budget_with_other_work():
+    calendar = generate_calendar(20, 6, seed=1)
+    report = simulate(SchedulerPolicy(), calendar, 8 * 3600, seed=1)
+
+    assert report['requests']['other'] > 0
+    budget = report['budget']
+    assert budget['live']['requests'] and budget['players']['requests']
+    # Live work preempts the shares, so it waits less than the roster jobs behind it
+    assert budget['live']['average_wait'] < budget['rosters']['average_wait']
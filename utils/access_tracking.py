@@ -0,0 +1,223 @@
+import logging
+import math
+import threading
+import time
+from datetime import datetime
+from flask import current_app, has_app_context
+from app import db
+from models import EntityAccess
+
+# Setup logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# Access tracking parameters
+ACCESS_HALF_LIFE = 3 * 24 * 3600  # Request counts halve every 3 days (in seconds)
+ACCESS_FLUSH_INTERVAL = 300  # Flush in-memory counters every 5 minutes (in seconds)
+
+# Score thresholds and refresh intervals per popularity tier
+HOT_SCORE = 20.0
+WARM_SCORE = 1.0
+HOT_REFRESH_INTERVAL = 10800  # Hot entities are refreshed on every 4-hour team run
+WARM_REFRESH_INTERVAL = 86400  # Warm entities once a day
+COLD_REFRESH_INTERVAL = 14 * 86400  # Entities nobody asks for every two weeks
+
+# Pending access counts not yet flushed: (entity_type, entity_id) -> (score, timestamp)
+_pending = {}
+_pending_lock = threading.Lock()
+
+# Thread flushing this process's counters, started by the first recorded access
+_flush_thread = None
+
+
+def decay_score(score, elapsed):
+    """
+    Decay an access score over the elapsed time
+
+    Args:
+        score (float): Score at the start of the interval
+        elapsed (float): Elapsed time in seconds
+
+    Returns:
+        float: Decayed score
+    """
+    if not score or elapsed <= 0:
+        return score or 0.0
+    return score * math.pow(0.5, elapsed / ACCESS_HALF_LIFE)
+
+
+def record_access(entity_type, entity_id, weight=1.0):
+    """
+    Record a client request for an entity. Counts are kept in memory and
+    written to the database every ACCESS_FLUSH_INTERVAL seconds by the
+    process's flush thread, never on the request path.
+
+    Args:
+        entity_type (str): Entity type (team, player)
+        entity_id (str): Entity ID
+        weight (float): Amount to add to the score
+    """
+    if not entity_id:
+        return
+
+    now = time.time()
+    key = (entity_type, str(entity_id))
+
+    with _pending_lock:
+        score, timestamp = _pending.get(key, (0.0, now))
+        _pending[key] = (decay_score(score, now - timestamp) + weight, now)
+
+    # Counters live in each web worker, so every process flushes its own
+    if _flush_thread is None and has_app_context():
+        start_flush_thread(current_app._get_current_object())
+
+
+def start_flush_thread(app, interval=ACCESS_FLUSH_INTERVAL):
+    """
+    Start flushing this process's counters on a fixed interval, so counts
+    recorded by a worker that then goes idle still reach the database
+
+    Args:
+        app (Flask): App whose database the counters are written to
+        interval (int): Seconds between flushes
+
+    Returns:
+        bool: True if the thread was started by this call
+    """
+    global _flush_thread
+
+    with _pending_lock:
+        if _flush_thread is not None:
+            return False
+        _flush_thread = threading.Thread(target=_flush_forever, args=(app, interval), name='access-flush', daemon=True)
+
+    _flush_thread.start()
+    return True
+
+
+def _flush_forever(app, interval):
+    with app.app_context():
+        while True:
+            time.sleep(interval)
+            flush_access_counts()
+
+
+def flush_access_counts():
+    """
+    Merge the in-memory access counters into the entity_access table
+
+    Returns:
+        int: Number of entities flushed
+    """
+    global _pending
+
+    with _pending_lock:
+        pending = _pending
+        _pending = {}
+
+    if not pending:
+        return 0
+
+    try:
+        now = time.time()
+        now_dt = datetime.utcfromtimestamp(now)
+
+        for (entity_type, entity_id), (score, timestamp) in pending.items():
+            score = decay_score(score, now - timestamp)
+
+            access = EntityAccess.query.filter_by(entity_type=entity_type, entity_id=entity_id).first()
+
+            if not access:
+                access = EntityAccess(
+                    entity_type=entity_type,
+                    entity_id=entity_id,
+                    score=score,
+                    last_accessed=datetime.utcfromtimestamp(timestamp)
+                )
+            else:
+                elapsed = (now_dt - access.last_accessed).total_seconds() if access.last_accessed else 0
+                access.score = decay_score(access.score, elapsed) + score
+                access.last_accessed = datetime.utcfromtimestamp(timestamp)
+
+            db.session.add(access)
+
+        db.session.commit()
+        logger.info(f"Flushed access counts for {len(pending)} entities")
+        return len(pending)
+
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error in flush_access_counts: {str(e)}")
+
+        # Put the counts back so they are not lost
+        with _pending_lock:
+            for key, (score, timestamp) in pending.items():
+                current_score, current_timestamp = _pending.get(key, (0.0, timestamp))
+                _pending[key] = (current_score + score, max(timestamp, current_timestamp))
+        return 0
+
+
+def get_access_scores(entity_type):
+    """
+    Get the current decayed access score of every tracked entity of a type,
+    including counts that have not been flushed yet
+
+    Args:
+        entity_type (str): Entity type (team, player)
+
+    Returns:
+        dict: Mapping of entity ID to score
+    """
+    now = time.time()
+    now_dt = datetime.utcfromtimestamp(now)
+    scores = {}
+
+    try:
+        for access in EntityAccess.query.filter_by(entity_type=entity_type).all():
+            elapsed = (now_dt - access.last_accessed).total_seconds() if access.last_accessed else 0
+            scores[access.entity_id] = decay_score(access.score, elapsed)
+    except Exception as e:
+        logger.error(f"Error in get_access_scores: {str(e)}")
+
+    with _pending_lock:
+        for (pending_type, entity_id), (score, timestamp) in _pending.items():
+            if pending_type == entity_type:
+                scores[entity_id] = scores.get(entity_id, 0.0) + decay_score(score, now - timestamp)
+
+    return scores
+
+
+def get_refresh_interval(score):
+    """
+    Get how often an entity should be refreshed given its access score
+
+    Args:
+        score (float): Decayed access score
+
+    Returns:
+        int: Refresh interval in seconds
+    """
+    if score >= HOT_SCORE:
+        return HOT_REFRESH_INTERVAL
+    if score >= WARM_SCORE:
+        return WARM_REFRESH_INTERVAL
+    return COLD_REFRESH_INTERVAL
+
+
+def is_refresh_due(last_updated, score, now=None):
+    """
+    Check whether an entity is due for a refresh
+
+    Args:
+        last_updated (datetime): Time of the last successful refresh
+        score (float): Decayed access score
+        now (datetime, optional): Current time
+
+    Returns:
+        bool: True if the entity should be refreshed
+    """
+    if not last_updated:
+        return True
+
+    now = now or datetime.utcnow()
+    return (now - last_updated).total_seconds() >= get_refresh_interval(score)
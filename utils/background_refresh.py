@@ -0,0 +1,79 @@
+import logging
+from datetime import datetime, timedelta
+
+# Setup logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# Age after which data served by the API is flagged as stale (in seconds)
+TEAM_STALE_AFTER = 86400
+
+
+def is_stale(last_updated, max_age, now=None):
+    """
+    Check whether stored data is older than it should be
+
+    Args:
+        last_updated (datetime): When the data was last fetched, or None if never
+        max_age (int): Maximum age in seconds
+
+    Returns:
+        bool: True if the data is stale
+    """
+    if last_updated is None:
+        return True
+    now = now or datetime.utcnow()
+    return now - last_updated > timedelta(seconds=max_age)
+
+
+def is_team_stale(team):
+    return is_stale(team.last_updated, TEAM_STALE_AFTER)
+
+
+def is_event_stale(event):
+    from utils.event_crawler import EVENT_REFRESH_INTERVALS
+
+    return is_stale(event.last_updated, EVENT_REFRESH_INTERVALS.get(event.status, min(EVENT_REFRESH_INTERVALS.values())))
+
+
+def enqueue_refresh(kind, key=None, client=None):
+    """
+    Queue a background refresh as a refresh job run by the scraper workers;
+    identical unfinished refreshes are merged. A new job counts against the
+    client's read quota, which is larger than and separate from the quota of
+    POST /api/refresh, so reads cannot queue unlimited jobs nor use up the
+    client's explicit refreshes. It runs in the reads budget class, which
+    never preempts scheduled work.
+
+    Args:
+        kind (str): team, event, events, search_teams or search_players
+        key (str, optional): Team/event ID or search query
+        client (str, optional): Address of the client whose read triggered the refresh
+
+    Returns:
+        ScrapeJob: The queued job, or None if it could not be queued or the quota is exceeded
+    """
+    try:
+        from utils.refresh_jobs import create_job, find_active_job, check_job_quota, PRIORITY_READS
+        from utils.reconciliation import is_source_team_id
+
+        # Teams only known from another source's listings have no VLR page
+        if kind == 'team' and is_source_team_id(key):
+            return None
+
+        # Joining an unfinished refresh is free; only new jobs are counted
+        if client and not find_active_job(kind, key):
+            quota_error = check_job_quota(client, origin='read')
+            if quota_error:
+                logger.info(f"Not queueing {kind} refresh for {key} requested by {client}: {quota_error}")
+                return None
+
+        job, _ = create_job(kind, key, client=client, priority=PRIORITY_READS, origin='read' if client else None)
+        return job
+
+    except Exception as e:
+        from app import db
+
+        db.session.rollback()
+        logger.error(f"Error queueing {kind} refresh for {key}: {str(e)}")
+        return None
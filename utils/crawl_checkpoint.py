@@ -0,0 +1,136 @@
+import logging
+from datetime import datetime
+from app import db
+from models import CrawlCheckpoint
+
+# Setup logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# Number of rows loaded and checkpointed at a time
+CRAWL_CHUNK_SIZE = 25
+
+
+def start_crawl(name, total=None, reset=False):
+    """
+    Resume an unfinished crawl or start a new one
+
+    Args:
+        name (str): Crawl name
+        total (int, optional): Total number of items to process
+        reset (bool): Discard any unfinished checkpoint and start over
+
+    Returns:
+        CrawlCheckpoint: The checkpoint to continue from
+    """
+    checkpoint = CrawlCheckpoint.query.filter_by(name=name).first()
+    now = datetime.utcnow()
+
+    if checkpoint and not checkpoint.finished_at and not reset:
+        logger.info(f"Resuming crawl {name} after {checkpoint.cursor} ({checkpoint.processed} done)")
+        if total is not None:
+            checkpoint.total = total
+    else:
+        if not checkpoint:
+            checkpoint = CrawlCheckpoint(name=name)
+        checkpoint.cursor = None
+        checkpoint.processed = 0
+        checkpoint.total = total
+        checkpoint.started_at = now
+        checkpoint.finished_at = None
+        logger.info(f"Starting crawl {name} ({total} items)")
+
+    checkpoint.updated_at = now
+    db.session.add(checkpoint)
+    db.session.commit()
+
+    return checkpoint
+
+
+def save_checkpoint(checkpoint, cursor, processed):
+    """
+    Persist progress after a chunk has been processed
+
+    Args:
+        checkpoint (CrawlCheckpoint): Checkpoint to update
+        cursor (str): Key of the last processed item
+        processed (int): Number of items processed in the chunk
+    """
+    try:
+        checkpoint.cursor = cursor
+        checkpoint.processed = (checkpoint.processed or 0) + processed
+        checkpoint.updated_at = datetime.utcnow()
+        db.session.add(checkpoint)
+        db.session.commit()
+
+        progress = checkpoint.to_dict()
+        logger.info(f"Crawl {checkpoint.name}: {progress['processed']}/{progress['total']} "
+                    f"processed, ETA {progress['eta_seconds']}s")
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error in save_checkpoint: {str(e)}")
+
+
+def finish_crawl(checkpoint):
+    """
+    Mark a crawl as finished so the next run starts from the beginning
+
+    Args:
+        checkpoint (CrawlCheckpoint): Checkpoint to finish
+    """
+    try:
+        checkpoint.finished_at = datetime.utcnow()
+        checkpoint.updated_at = checkpoint.finished_at
+        db.session.add(checkpoint)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error in finish_crawl: {str(e)}")
+
+
+def iter_chunks(query, key_column, cursor=None, chunk_size=CRAWL_CHUNK_SIZE):
+    """
+    Iterate a query in key order, one chunk at a time.
+
+    Each chunk is a fresh keyset query rather than one long yield_per
+    cursor, because callers commit between chunks and a commit closes
+    server-side cursors.
+
+    Args:
+        query: SQLAlchemy query to iterate
+        key_column: Unique column to order and resume by
+        cursor (str, optional): Only return rows with a key after this one
+        chunk_size (int): Number of rows per chunk
+
+    Yields:
+        list: Rows of the next chunk
+    """
+    while True:
+        chunk_query = query
+        if cursor is not None:
+            chunk_query = chunk_query.filter(key_column > cursor)
+
+        chunk = chunk_query.order_by(key_column).limit(chunk_size).all()
+        if not chunk:
+            break
+
+        yield chunk
+
+        cursor = getattr(chunk[-1], key_column.key)
+
+
+def get_crawl_progress(name=None):
+    """
+    Get progress and ETA of crawls
+
+    Args:
+        name (str, optional): Only return this crawl
+
+    Returns:
+        list: Crawl progress dictionaries
+    """
+    query = CrawlCheckpoint.query
+    if name:
+        query = query.filter_by(name=name)
+
+    return [checkpoint.to_dict() for checkpoint in query.order_by(CrawlCheckpoint.name).all()]
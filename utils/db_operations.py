@@ -41,7 +41,13 @@ def upsert_team(team_data):
         if 'stats' in team_data and team_data['stats']:
             team.stats = json.dumps(team_data['stats'])
         
-        team.last_updated = datetime.utcnow()
+        # Only a full team page (with roster) counts as a refresh; minimal
+        # team stubs coming from match pages must not make a team look fresh
+        if 'players' in team_data:
+            team.last_updated = datetime.utcnow()
+        elif team.last_updated is None:
+            # Set explicitly so the column default does not stamp new stubs
+            team.last_updated = None
         
         # Add to session and commit
         db.session.add(team)
@@ -96,6 +102,8 @@ def upsert_player(player_data):
         if 'stats' in player_data and player_data['stats']:
             player.stats = json.dumps(player_data['stats'])
         
+        # Every successful upsert is a refresh, including detail pages of
+        # players without stats, which would otherwise stay due forever
         player.last_updated = datetime.utcnow()
         
         # Add to session and commit
@@ -138,6 +146,10 @@ def upsert_match(match_data):
             }
             upsert_team(team2_data)
         
+        # Make sure the linked event exists so event_id can be stored
+        if match_data.get('event_id'):
+            ensure_events([match_data])
+        
         if not match:
             # Create new match
             match = Match(
@@ -145,10 +157,12 @@ def upsert_match(match_data):
                 team1_id=match_data.get('team1_id'),
                 team2_id=match_data.get('team2_id'),
                 date=match_data.get('date'),
+                event_id=match_data.get('event_id'),
                 event_name=match_data.get('event_name'),
                 status=match_data.get('status'),
                 score=match_data.get('score'),
-                match_url=match_data.get('match_url')
+                match_url=match_data.get('match_url'),
+                match_format=match_data.get('match_format')
             )
             logger.info(f"Creating new match: {match_data['id']}")
         else:
@@ -157,9 +171,13 @@ def upsert_match(match_data):
             match.team2_id = match_data.get('team2_id')
             match.date = match_data.get('date')
             match.event_name = match_data.get('event_name')
+            if match_data.get('event_id'):
+                match.event_id = match_data['event_id']
             match.status = match_data.get('status')
             match.score = match_data.get('score')
             match.match_url = match_data.get('match_url')
+            if match_data.get('match_format'):
+                match.match_format = match_data['match_format']
             logger.info(f"Updating existing match: {match_data['id']}")
         
         match.last_updated = datetime.utcnow()
@@ -226,161 +244,308 @@ def upsert_map_statistic(match_id, map_data):
         return None
 
 
-def scrape_and_update_recent_matches(vlr_scraper, bo3_scraper, limit=20):
+def ensure_events(matches_data, commit=True):
+    """
+    Create stub events for event links found on match pages that are not
+    in the database yet. Stubs have no last_updated, so the events crawler
+    fetches their details on its next run.
+    
+    Args:
+        matches_data (list): Match dictionaries with event_id/event_title/event_url
+        commit (bool): Commit the new events
+        
+    Returns:
+        int: Number of events created
+    """
+    events = {}
+    for match_data in matches_data:
+        if match_data.get('event_id'):
+            events.setdefault(match_data['event_id'], match_data)
+    
+    if not events:
+        return 0
+    
+    existing_ids = {event_id for (event_id,) in db.session.query(Event.id).filter(Event.id.in_(list(events))).all()}
+    
+    created = 0
+    for event_id, match_data in events.items():
+        if event_id in existing_ids:
+            continue
+        
+        db.session.add(Event(
+            id=event_id,
+            name=match_data.get('event_title') or match_data.get('event_name') or event_id,
+            event_url=match_data.get('event_url'),
+            last_updated=None
+        ))
+        created += 1
+        logger.info(f"Creating stub event: {event_id}")
+    
+    if created and commit:
+        db.session.commit()
+    
+    return created
+
+
+def bulk_upsert_matches(matches_data):
     """
-    Scrape recent matches from both sources and update the database
+    Insert or update many matches in a single transaction.
+    
+    Used by bulk loaders such as the historical backfill, where committing
+    every match (and both of its teams) separately dominates the run time.
+    
+    Args:
+        matches_data (list): Match detail dictionaries
+        
+    Returns:
+        int: Number of matches written
+    """
+    try:
+        matches_data = [match_data for match_data in matches_data if match_data and match_data.get('id')]
+        if not matches_data:
+            return 0
+        
+        match_ids = [match_data['id'] for match_data in matches_data]
+        existing_matches = {match.id: match for match in Match.query.filter(Match.id.in_(match_ids)).all()}
+        
+        # Create stubs for teams that are not in the database yet
+        team_names = {}
+        for match_data in matches_data:
+            for side in ('team1', 'team2'):
+                if match_data.get(f'{side}_id') and match_data.get(f'{side}_name'):
+                    team_names[match_data[f'{side}_id']] = match_data[f'{side}_name']
+        
+        existing_team_ids = {team_id for (team_id,) in db.session.query(Team.id).filter(Team.id.in_(list(team_names))).all()}
+        for team_id, team_name in team_names.items():
+            if team_id not in existing_team_ids:
+                db.session.add(Team(id=team_id, name=team_name, last_updated=None))
+        
+        ensure_events(matches_data, commit=False)
+        
+        now = datetime.utcnow()
+        
+        for match_data in matches_data:
+            match = existing_matches.get(match_data['id'])
+            if not match:
+                match = Match(id=match_data['id'])
+            
+            match.team1_id = match_data.get('team1_id')
+            match.team2_id = match_data.get('team2_id')
+            match.date = match_data.get('date')
+            match.event_name = match_data.get('event_name')
+            match.status = match_data.get('status')
+            match.score = match_data.get('score')
+            match.match_url = match_data.get('match_url')
+            if match_data.get('event_id'):
+                match.event_id = match_data['event_id']
+            if match_data.get('match_format'):
+                match.match_format = match_data['match_format']
+            match.last_updated = now
+            db.session.add(match)
+        
+        # Replace map statistics of every match that came with maps
+        map_match_ids = [match_data['id'] for match_data in matches_data if match_data.get('maps')]
+        if map_match_ids:
+            MapStatistic.query.filter(MapStatistic.match_id.in_(map_match_ids)).delete(synchronize_session=False)
+        
+        for match_data in matches_data:
+            for map_data in match_data.get('maps') or []:
+                map_stat = MapStatistic(
+                    match_id=match_data['id'],
+                    map_name=map_data.get('map_name'),
+                    team1_score=map_data.get('team1_score'),
+                    team2_score=map_data.get('team2_score'),
+                    team1_attack=map_data.get('team1_attack'),
+                    team1_defense=map_data.get('team1_defense'),
+                    team2_attack=map_data.get('team2_attack'),
+                    team2_defense=map_data.get('team2_defense'),
+                    player_stats=json.dumps(map_data['player_stats']) if map_data.get('player_stats') else None,
+                    last_updated=now
+                )
+                db.session.add(map_stat)
+        
+        db.session.commit()
+        logger.info(f"Bulk upserted {len(matches_data)} matches")
+        return len(matches_data)
+    
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error in bulk_upsert_matches: {str(e)}")
+        return 0
+
+
+def scrape_and_update_recent_matches(vlr_scraper, bo3_scraper, limit=20, priority=None):
+    """
+    Scrape recent match listings from both sources and queue a match job
+    for every match found; the job workers fetch and store the details.
+    
+    The quick and comprehensive passes share work: a listing fetched by
+    one pass (or still being fetched) is reused by the other, matches the
+    other pass updated moments ago are not queued again, and matches it
+    queued but not yet fetched are merged into its jobs.
+    
+    Listings from both sources are reconciled first so a match listed by
+    both is fetched once, from the fresher or cheaper source, and stored
+    under a single canonical match ID.
     
     Args:
         vlr_scraper: VLR scraper module
         bo3_scraper: BO3 scraper module
         limit (int): Maximum number of matches to fetch from each source
+        priority (int, optional): Priority of the queued jobs
         
     Returns:
-        int: Number of matches updated
+        int: Number of matches queued
     """
     try:
-        updated_count = 0
+        from utils.reconciliation import reconcile_listings
+        from utils.dead_letter import get_blocked_ids
+        from utils.refresh_jobs import create_job, get_dedup_key, get_recently_succeeded_keys, PRIORITY_MATCHES
+        from utils.match_listing import listing_cache
+        from utils.schedule_config import MATCH_DETAIL_REUSE_WINDOW
+        from utils.run_metrics import count
+        
+        queued_count = 0
+        merged_count = 0
+        sources = ('vlr', 'bo3')
         
         # Get matches from VLR.gg
         logger.info("Fetching matches from VLR.gg")
-        vlr_matches = vlr_scraper.get_matches(limit=limit)
+        vlr_matches = listing_cache.get('vlr', vlr_scraper.get_matches, limit)
         logger.info(f"Found {len(vlr_matches)} matches on VLR.gg")
         
-        for match_data in vlr_matches:
-            try:
-                match_id = match_data.get('id')
-                if not match_id:
-                    logger.error("Match data missing ID: %s", match_data)
-                    continue
-                    
-                logger.info(f"Processing match ID: {match_id}")
-                
-                # Get detailed match information
-                match_details = vlr_scraper.get_match_details(match_id)
-                
-                if not match_details:
-                    logger.error(f"Failed to get details for match {match_id}")
-                    continue
-                    
-                logger.info(f"Got details for match {match_id}, team1: {match_details.get('team1_name')}, team2: {match_details.get('team2_name')}")
-                
-                result = upsert_match(match_details)
-                if result:
-                    updated_count += 1
-                    logger.info(f"Successfully updated match {match_id}")
-                else:
-                    logger.error(f"Failed to upsert match {match_id}")
-            except Exception as e:
-                logger.error(f"Error processing VLR match {match_data.get('id', 'unknown')}: {str(e)}")
-                continue
-        
         # Get matches from BO3.gg
         logger.info("Fetching matches from BO3.gg")
-        bo3_matches = bo3_scraper.get_matches(limit=limit)
+        bo3_matches = listing_cache.get('bo3', bo3_scraper.get_matches, limit)
         logger.info(f"Found {len(bo3_matches)} matches on BO3.gg")
         
-        for match_data in bo3_matches:
+        for match_data in vlr_matches + bo3_matches:
+            if not match_data.get('id'):
+                logger.error("Match data missing ID: %s", match_data)
+        
+        plan = reconcile_listings({'vlr': vlr_matches, 'bo3': bo3_matches})
+        
+        # Matches that failed recently wait for their retry instead of being refetched every pass
+        blocked = {
+            (source, source_id)
+            for source in sources
+            for source_id in get_blocked_ids('match', [item['source_id'] for item in plan if item['source'] == source], source)
+        }
+        
+        # Matches the other pass has just updated are not fetched again
+        recent = get_recently_succeeded_keys(
+            [get_dedup_key('match', item['source_id'], item) for item in plan], MATCH_DETAIL_REUSE_WINDOW
+        )
+        
+        for item in plan:
+            source = item['source']
+            source_id = item['source_id']
+            
+            if (source, source_id) in blocked:
+                logger.info(f"Skipping {source} match {source_id} until its dead-letter retry")
+                continue
+            
+            if get_dedup_key('match', source_id, item) in recent:
+                count('cache_hits')
+                logger.info(f"Skipping {source} match {source_id}: updated by another pass moments ago")
+                continue
+            
             try:
-                match_id = match_data.get('id')
-                if not match_id:
-                    logger.error("Match data missing ID: %s", match_data)
-                    continue
-                    
-                logger.info(f"Processing BO3 match ID: {match_id}")
-                
-                # Get detailed match information
-                match_details = bo3_scraper.get_match_details(match_id)
-                
-                if not match_details:
-                    logger.error(f"Failed to get details for BO3 match {match_id}")
-                    continue
-                    
-                logger.info(f"Got details for BO3 match {match_id}")
-                
-                result = upsert_match(match_details)
-                if result:
-                    updated_count += 1
-                    logger.info(f"Successfully updated BO3 match {match_id}")
+                _, created = create_job(
+                    'match', source_id,
+                    priority=PRIORITY_MATCHES if priority is None else priority,
+                    params={'source': source, 'slug': item['slug'], 'match_id': item['match_id'], 'links': item['links']}
+                )
+                if created:
+                    queued_count += 1
                 else:
-                    logger.error(f"Failed to upsert BO3 match {match_id}")
+                    merged_count += 1
             except Exception as e:
-                logger.error(f"Error processing BO3 match {match_data.get('id', 'unknown')}: {str(e)}")
+                db.session.rollback()
+                logger.error(f"Error queueing {source} match {source_id}: {str(e)}")
                 continue
         
-        logger.info(f"Updated {updated_count} matches")
-        return updated_count
+        logger.info(f"Queued {queued_count} matches ({merged_count} merged into unfinished jobs)")
+        return queued_count
     
     except Exception as e:
         logger.error(f"Error in scrape_and_update_recent_matches: {str(e)}")
         return 0
 
 
-def update_teams_and_players():
+def update_teams_and_players(reset=False):
     """
-    Update team and player information for teams in the database
+    Queue a job for every team in the database that is due for a roster
+    refresh, then for the stalest players.
+    
+    Hot teams (those clients request most) are queued first, so the workers
+    claim them ahead of the rest of the roster jobs. The remaining teams are
+    walked in ID order one chunk at a time and a checkpoint is saved after
+    every chunk, so an interrupted run resumes where it stopped.
+    
+    Args:
+        reset (bool): Ignore an unfinished checkpoint and start from the first team
     
     Returns:
-        int: Number of teams updated
+        int: Number of teams queued
     """
     try:
-        from scrapers import vlr_scraper
-        from scrapers import player_scraper
+        from utils.access_tracking import get_access_scores, is_refresh_due, HOT_SCORE
+        from utils.crawl_checkpoint import start_crawl, save_checkpoint, finish_crawl, iter_chunks
+        from utils.player_refresh import refresh_stale_players
+        from utils.dead_letter import get_blocked_ids
+        from utils.refresh_jobs import create_job, PRIORITY_ROSTERS
+        from utils.reconciliation import is_source_team_id
+        
+        # Teams already looked at this run, and the number of teams queued
+        seen_ids = set()
+        queued_count = 0
+        skipped_count = 0
+        
+        # Skip teams whose popularity tier says they are not due yet
+        scores = get_access_scores('team')
+        
+        def queue_due_teams(teams):
+            nonlocal queued_count, skipped_count
+            blocked = get_blocked_ids('team', [team.id for team in teams])
+            
+            for team in teams:
+                if team.id in seen_ids:
+                    continue
+                seen_ids.add(team.id)
+                
+                # Teams only known from bo3 listings have no VLR page to refresh
+                if is_source_team_id(team.id) or team.id in blocked or not is_refresh_due(team.last_updated, scores.get(team.id, 0.0)):
+                    skipped_count += 1
+                    continue
+                
+                try:
+                    # Player pages are refreshed by staleness below, not per roster
+                    create_job('team', team.id, priority=PRIORITY_ROSTERS, params={'players': False})
+                    queued_count += 1
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f"Error queueing team {team.id}: {str(e)}")
         
-        updated_count = 0
-        player_count = 0
+        # Jobs of a priority are claimed in the order they were queued
+        hot_ids = sorted((team_id for team_id, score in scores.items() if score >= HOT_SCORE), key=lambda team_id: -scores[team_id])
+        if hot_ids:
+            hot_teams = {team.id: team for team in Team.query.filter(Team.id.in_(hot_ids)).all()}
+            queue_due_teams([hot_teams[team_id] for team_id in hot_ids if team_id in hot_teams])
         
-        # Get all teams in the database
-        teams = Team.query.all()
+        checkpoint = start_crawl('team_roster', total=Team.query.count(), reset=reset)
         
-        for team in teams:
-            try:
-                # Get team details from VLR.gg
-                team_details = vlr_scraper.get_team_details(team.id)
-                
-                # If no players or limited player info in team_details, try dedicated player scraper
-                if not team_details or len(team_details.get('players', [])) == 0:
-                    logger.info(f"Using dedicated player scraper for team: {team.id}")
-                    players = player_scraper.get_team_players(team.id)
-                    
-                    if players:
-                        # Add players to team_details
-                        if not team_details:
-                            team_details = {
-                                'id': team.id,
-                                'name': team.name,
-                                'region': team.region,
-                                'logo_url': team.logo_url,
-                                'stats': json.loads(team.stats) if team.stats else {},
-                                'players': players
-                            }
-                        else:
-                            team_details['players'] = players
-                
-                if team_details:
-                    result = upsert_team(team_details)
-                    if result:
-                        updated_count += 1
-                        players_added = len(team_details.get('players', []))
-                        player_count += players_added
-                        logger.info(f"Updated team: {team.name} with {players_added} players")
-                        
-                        # Fetch detailed player info for each player
-                        for player in team_details.get('players', []):
-                            try:
-                                player_detail = player_scraper.get_player_details(player['id'])
-                                if player_detail:
-                                    upsert_player(player_detail)
-                                    logger.info(f"Updated player details for: {player['name']}")
-                            except Exception as e:
-                                logger.error(f"Error updating player {player['id']}: {str(e)}")
-                    else:
-                        logger.warning(f"Failed to update team: {team.name}")
-            except Exception as e:
-                logger.error(f"Error updating team {team.id}: {str(e)}")
-                continue
+        for teams in iter_chunks(Team.query, Team.id, cursor=checkpoint.cursor):
+            queue_due_teams(teams)
+            save_checkpoint(checkpoint, teams[-1].id, len(teams))
         
-        logger.info(f"Updated {updated_count} teams and {player_count} players")
-        return updated_count
+        finish_crawl(checkpoint)
+        logger.info(f"Queued {queued_count} teams ({skipped_count} teams not due)")
+        
+        # Player detail pages are refreshed in bounded, staleness-tiered batches
+        refresh_stale_players()
+        
+        return queued_count
     
     except Exception as e:
         logger.error(f"Error in update_teams_and_players: {str(e)}")
@@ -426,7 +591,13 @@ def upsert_event(event_data):
             event.logo_url = event_data.get('logo_url')
             logger.info(f"Updating existing event: {event_data['name']}")
         
-        event.last_updated = datetime.utcnow()
+        # Only a full event page (with its match list) counts as a refresh;
+        # listing entries must not hide an event from the events crawler
+        if 'matches' in event_data:
+            event.last_updated = datetime.utcnow()
+        elif event.last_updated is None:
+            # Set explicitly so the column default does not stamp new events
+            event.last_updated = None
         
         # Add to session and commit
         db.session.add(event)
@@ -440,6 +611,35 @@ def upsert_event(event_data):
         return None
 
 
+def link_matches_to_event(event_id, match_ids):
+    """
+    Set the event of stored matches that are not linked to one yet
+    
+    Args:
+        event_id (str): Event ID
+        match_ids (list): IDs of the event's matches
+        
+    Returns:
+        int: Number of matches linked
+    """
+    try:
+        if not match_ids:
+            return 0
+        
+        linked = Match.query.filter(
+            Match.id.in_(match_ids),
+            Match.event_id == None  # noqa: E711
+        ).update({'event_id': event_id}, synchronize_session=False)
+        db.session.commit()
+        
+        return linked
+    
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error in link_matches_to_event: {str(e)}")
+        return 0
+
+
 def update_specific_team(team_id):
     """
     Update a specific team's information and its players
@@ -453,6 +653,7 @@ def update_specific_team(team_id):
     try:
         from scrapers import vlr_scraper
         from scrapers import player_scraper
+        from utils.negative_cache import get_miss_state
         
         # Get the team
         team = Team.query.filter_by(id=team_id).first()
@@ -464,6 +665,10 @@ def update_specific_team(team_id):
         # Get team details
         team_details = vlr_scraper.get_team_details(team.id)
         
+        # A team known not to exist has no roster page either; keep what is stored
+        if not team_details and get_miss_state('team', team.id) == 'active':
+            return False
+        
         # If no players or limited player info in team_details, try dedicated player scraper
         if not team_details or len(team_details.get('players', [])) == 0:
             logger.info(f"Using dedicated player scraper for team: {team_id}")
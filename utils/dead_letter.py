@@ -0,0 +1,347 @@
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from app import db
+from models import FailedScrape, MatchSourceLink
+from scrapers.fetch_state import get_last_fetch, clear_last_fetch
+
+# Setup logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# Retry backoff: the delay doubles with every failed attempt up to the maximum (in seconds)
+DEAD_LETTER_BASE_DELAY = 900
+DEAD_LETTER_MAX_DELAY = 86400
+
+# Items are quarantined after this many failed attempts
+DEAD_LETTER_MAX_ATTEMPTS = 8
+
+# Items whose unchanged page failed to parse this many times in a row are
+# quarantined: the selectors no longer match and retrying cannot help
+POISON_REPEATS = 3
+
+# Maximum number of failed items retried per scheduler run
+DEAD_LETTER_RETRY_BATCH = 10
+
+# Error class used when a scraper returned nothing without raising
+DEFAULT_ERROR_CLASSES = {
+    'fetch': 'FetchError',
+    'parse': 'SelectorMismatch',
+    'store': 'StoreError'
+}
+
+
+def get_retry_delay(attempts):
+    """
+    Get the backoff delay before the next retry
+
+    Args:
+        attempts (int): Number of failed attempts so far
+
+    Returns:
+        timedelta: Delay before the next retry
+    """
+    return timedelta(seconds=min(DEAD_LETTER_BASE_DELAY * 2 ** max(attempts - 1, 0), DEAD_LETTER_MAX_DELAY))
+
+
+def record_failure(item_type, item_id, source='vlr', stage=None, error=None, fetch=None):
+    """
+    Record a failed scrape in the dead-letter table and schedule its retry
+
+    The failure stage is taken from the last request on the current thread
+    unless given: no page means the fetch failed, a page means it did not parse.
+
+    Args:
+        item_type (str): match, team, player or event
+        item_id (str): ID of the item
+        source (str): Source the item was scraped from
+        stage (str, optional): fetch, parse or store
+        error (Exception, optional): Error that caused the failure
+        fetch (dict, optional): Fetch outcome from get_last_fetch(), for
+            failures that happened on another thread
+
+    Returns:
+        FailedScrape: The dead-letter entry, or None on error
+    """
+    try:
+        fetch = fetch if fetch is not None else get_last_fetch()
+        now = datetime.utcnow()
+        item_id = str(item_id)
+
+        if stage is None:
+            stage = 'parse' if fetch.get('page_hash') else 'fetch'
+
+        failure = FailedScrape.query.filter_by(item_type=item_type, item_id=item_id, source=source).first()
+        if not failure:
+            failure = FailedScrape(item_type=item_type, item_id=item_id, source=source, attempts=0,
+                                   hash_repeats=0, first_failed_at=now)
+        elif failure.status == 'resolved':
+            failure.attempts = 0
+            failure.hash_repeats = 0
+            failure.first_failed_at = now
+
+        page_hash = fetch.get('page_hash')
+        if stage == 'parse' and page_hash and page_hash == failure.page_hash and failure.stage == 'parse':
+            failure.hash_repeats = (failure.hash_repeats or 0) + 1
+        else:
+            failure.hash_repeats = 1 if stage == 'parse' and page_hash else 0
+
+        failure.stage = stage
+        failure.error_class = type(error).__name__ if error else fetch.get('error_class') or DEFAULT_ERROR_CLASSES.get(stage)
+        failure.error_message = str(error) if error else fetch.get('error')
+        failure.url = fetch.get('url') or failure.url
+        failure.page_hash = page_hash
+        failure.attempts = (failure.attempts or 0) + 1
+        failure.last_failed_at = now
+
+        if failure.hash_repeats >= POISON_REPEATS or failure.attempts >= DEAD_LETTER_MAX_ATTEMPTS:
+            failure.status = 'quarantined'
+            failure.next_retry_at = None
+            logger.warning(f"Quarantined {source} {item_type} {item_id} after {failure.attempts} attempts ({failure.error_class})")
+        else:
+            failure.status = 'pending'
+            failure.next_retry_at = now + get_retry_delay(failure.attempts)
+
+        db.session.add(failure)
+        db.session.commit()
+        return failure
+
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error in record_failure: {str(e)}")
+        return None
+
+
+def record_success(item_type, item_id, source='vlr'):
+    """
+    Mark a dead-letter entry as resolved after the item was stored successfully
+
+    Args:
+        item_type (str): match, team, player or event
+        item_id (str): ID of the item
+        source (str): Source the item was scraped from
+    """
+    try:
+        updated = FailedScrape.query.filter(
+            FailedScrape.item_type == item_type,
+            FailedScrape.item_id == str(item_id),
+            FailedScrape.source == source,
+            FailedScrape.status != 'resolved'
+        ).update({'status': 'resolved', 'next_retry_at': None}, synchronize_session=False)
+
+        if updated:
+            db.session.commit()
+            logger.info(f"Resolved dead-letter entry for {source} {item_type} {item_id}")
+
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error in record_success: {str(e)}")
+
+
+def get_blocked_ids(item_type, item_ids, source='vlr', now=None):
+    """
+    Find items that scheduled passes should not fetch: quarantined items and
+    items still waiting for their retry time
+
+    Args:
+        item_type (str): match, team, player or event
+        item_ids (list): IDs to check
+        source (str): Source the items are scraped from
+        now (datetime, optional): Current time
+
+    Returns:
+        set: Blocked item IDs
+    """
+    item_ids = [str(item_id) for item_id in item_ids]
+    if not item_ids:
+        return set()
+
+    now = now or datetime.utcnow()
+    rows = db.session.query(FailedScrape.item_id).filter(
+        FailedScrape.item_type == item_type,
+        FailedScrape.source == source,
+        FailedScrape.item_id.in_(item_ids),
+        (FailedScrape.status == 'quarantined') |
+        ((FailedScrape.status == 'pending') & (FailedScrape.next_retry_at > now))
+    ).all()
+
+    return {item_id for (item_id,) in rows}
+
+
+def get_due_retries(limit=DEAD_LETTER_RETRY_BATCH, now=None):
+    """
+    Find pending failures whose retry time has come, oldest first
+
+    Returns:
+        list: Due FailedScrape entries
+    """
+    now = now or datetime.utcnow()
+    return FailedScrape.query.filter(
+        FailedScrape.status == 'pending',
+        FailedScrape.next_retry_at <= now
+    ).order_by(FailedScrape.next_retry_at.asc()).limit(limit).all()
+
+
+def _fetch_item(failure):
+    """
+    Scrape a failed item again from its source
+    """
+    from scrapers import vlr_scraper, bo3_scraper, player_scraper
+
+    if failure.item_type == 'match':
+        if failure.source == 'bo3':
+            # The API URL of the failed request holds the match slug
+            return bo3_scraper.get_match_details(failure.item_id, slug=bo3_scraper.get_slug_from_url(failure.url))
+        return vlr_scraper.get_match_details(failure.item_id)
+    if failure.item_type == 'team':
+        return vlr_scraper.get_team_details(failure.item_id)
+    if failure.item_type == 'player':
+        return player_scraper.get_player_details(failure.item_id)
+    if failure.item_type == 'event':
+        return vlr_scraper.get_event_details(failure.item_id)
+
+    raise ValueError(f"Unknown item type: {failure.item_type}")
+
+
+def _store_item(failure, details):
+    """
+    Store a scraped item the way the scheduled job that failed would have
+    """
+    from utils.db_operations import upsert_match, upsert_team, upsert_player, upsert_event, link_matches_to_event
+
+    if failure.item_type == 'match':
+        if failure.source != 'vlr':
+            from utils.reconciliation import canonicalize_match, record_source_links
+
+            link = MatchSourceLink.query.filter_by(source=failure.source, source_id=failure.item_id).first()
+            match_id = link.match_id if link else f"{failure.source}-{failure.item_id}"
+            result = upsert_match(canonicalize_match(details, match_id, failure.source))
+            if result:
+                record_source_links(result.id, [(failure.source, failure.item_id)])
+            return result
+        return upsert_match(details)
+    if failure.item_type == 'team':
+        return upsert_team(details)
+    if failure.item_type == 'player':
+        return upsert_player(details)
+    if failure.item_type == 'event':
+        result = upsert_event(details)
+        if result:
+            link_matches_to_event(failure.item_id, details.get('matches', []))
+        return result
+
+    return None
+
+
+def replay_failure(failure):
+    """
+    Retry a failed item now, regardless of its status and retry time
+
+    Args:
+        failure (FailedScrape): Dead-letter entry to replay
+
+    Returns:
+        bool: True if the item was scraped and stored
+    """
+    try:
+        clear_last_fetch()
+        details = _fetch_item(failure)
+    except Exception as e:
+        record_failure(failure.item_type, failure.item_id, failure.source, error=e)
+        return False
+
+    if not details:
+        record_failure(failure.item_type, failure.item_id, failure.source)
+        return False
+
+    try:
+        stored = _store_item(failure, details)
+    except Exception as e:
+        db.session.rollback()
+        record_failure(failure.item_type, failure.item_id, failure.source, stage='store', error=e)
+        return False
+
+    if not stored:
+        record_failure(failure.item_type, failure.item_id, failure.source, stage='store')
+        return False
+
+    record_success(failure.item_type, failure.item_id, failure.source)
+    return True
+
+
+def retry_due_failures(limit=DEAD_LETTER_RETRY_BATCH):
+    """
+    Scheduled dead-letter job: replay failures whose backoff has expired
+
+    Args:
+        limit (int): Maximum number of items to retry
+
+    Returns:
+        int: Number of items recovered
+    """
+    try:
+        due = get_due_retries(limit=limit)
+        recovered = sum(1 for failure in due if replay_failure(failure))
+
+        if due:
+            logger.info(f"Retried {len(due)} failed scrapes, {recovered} recovered")
+        return recovered
+
+    except Exception as e:
+        logger.error(f"Error in retry_due_failures: {str(e)}")
+        return 0
+
+
+def requeue_failure(failure_id):
+    """
+    Make a failure (including a quarantined one) due for retry on the next
+    scheduler run, e.g. after the scraper selectors have been fixed
+
+    Args:
+        failure_id (int): ID of the dead-letter entry
+
+    Returns:
+        FailedScrape: The requeued entry, or None if it does not exist
+    """
+    failure = FailedScrape.query.filter_by(id=failure_id).first()
+    if not failure:
+        return None
+
+    failure.status = 'pending'
+    failure.hash_repeats = 0
+    failure.next_retry_at = datetime.utcnow()
+    db.session.commit()
+
+    return failure
+
+
+def list_failures(status=None, item_type=None, limit=100):
+    """
+    List dead-letter entries, most recent failure first
+
+    Args:
+        status (str, optional): pending, quarantined or resolved
+        item_type (str, optional): match, team, player or event
+        limit (int): Maximum number of entries
+
+    Returns:
+        list: FailedScrape entries
+    """
+    query = FailedScrape.query
+    if status:
+        query = query.filter(FailedScrape.status == status)
+    if item_type:
+        query = query.filter(FailedScrape.item_type == item_type)
+
+    return query.order_by(FailedScrape.last_failed_at.desc()).limit(limit).all()
+
+
+def get_failure_counts():
+    """
+    Count dead-letter entries per status
+
+    Returns:
+        dict: Mapping of status to number of entries
+    """
+    rows = db.session.query(FailedScrape.status, func.count(FailedScrape.id)).group_by(FailedScrape.status).all()
+    return {status: count for status, count in rows}
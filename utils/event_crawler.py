@@ -0,0 +1,246 @@
+import logging
+from datetime import datetime, timedelta
+from app import db
+from models import Event, Match
+from utils.db_operations import upsert_event, bulk_upsert_matches, link_matches_to_event
+from utils.dead_letter import record_failure, record_success, get_blocked_ids
+from utils.negative_cache import get_miss_state, missing_ids_subquery
+from utils.rate_budget import RateBudget, get_current_budget
+
+# Setup logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# Maximum number of /events listing pages walked per run
+EVENT_LISTING_MAX_PAGES = 5
+
+# How long an event's details stay fresh, per event status (in seconds)
+EVENT_REFRESH_INTERVALS = {
+    'ongoing': 3600,
+    'upcoming': 6 * 3600,
+    'completed': 7 * 86400
+}
+
+# Maximum number of event detail pages refreshed per run
+EVENT_REFRESH_BATCH = 20
+
+# Maximum number of match pages fetched from event match lists per run
+# (large enough for a whole event, which often has 60-100 matches)
+EVENT_MATCH_FETCH_LIMIT = 150
+EVENT_MATCH_FETCH_WORKERS = 3
+EVENT_MATCH_REQUESTS_PER_MINUTE = 20
+
+
+def crawl_event_listings(vlr_scraper, max_pages=EVENT_LISTING_MAX_PAGES):
+    """
+    Walk the /events listing pages and store events that are not known yet.
+
+    The crawl is incremental: it stops at the first page that has nothing
+    new and lists only completed events, since older pages can only contain
+    older events.
+
+    Args:
+        vlr_scraper: VLR scraper module
+        max_pages (int): Maximum number of listing pages to walk
+
+    Returns:
+        list: IDs of newly discovered events
+    """
+    new_event_ids = []
+
+    for page in range(1, max_pages + 1):
+        listed_events = vlr_scraper.get_events(limit=100, page=page)
+        if not listed_events:
+            break
+
+        listed_ids = [event_data['id'] for event_data in listed_events]
+        known_ids = {event_id for (event_id,) in db.session.query(Event.id).filter(Event.id.in_(listed_ids)).all()}
+
+        page_new = [event_data for event_data in listed_events if event_data['id'] not in known_ids]
+        for event_data in page_new:
+            # Store the listing data now; details follow in refresh_due_events
+            if upsert_event(event_data):
+                new_event_ids.append(event_data['id'])
+
+        if not page_new and all(event_data.get('status') == 'completed' for event_data in listed_events):
+            break
+
+    logger.info(f"Discovered {len(new_event_ids)} new events")
+    return new_event_ids
+
+
+def get_due_events(batch_size=EVENT_REFRESH_BATCH, now=None):
+    """
+    Find events whose details are due for a refresh, most urgent first
+
+    Args:
+        batch_size (int): Maximum number of events to return
+        now (datetime, optional): Current time
+
+    Returns:
+        list: Due Event objects
+    """
+    now = now or datetime.utcnow()
+
+    # Events whose page is known not to exist are left out until the miss expires
+    missing = missing_ids_subquery('event', now)
+
+    # Never-fetched events (including stubs created from match pages) first
+    due = Event.query.filter(Event.last_updated == None, ~Event.id.in_(missing)).limit(batch_size).all()  # noqa: E711
+
+    # Then ongoing before upcoming before completed, stalest first
+    for status, interval in EVENT_REFRESH_INTERVALS.items():
+        if len(due) >= batch_size:
+            break
+
+        cutoff = now - timedelta(seconds=interval)
+        events = Event.query.filter(
+            Event.status == status,
+            Event.last_updated < cutoff,
+            ~Event.id.in_(missing)
+        ).order_by(Event.last_updated.asc()).limit(batch_size - len(due)).all()
+        due.extend(events)
+
+    return due
+
+
+def refresh_due_events(vlr_scraper, batch_size=EVENT_REFRESH_BATCH):
+    """
+    Refresh the details of due events and collect their matches
+
+    Args:
+        vlr_scraper: VLR scraper module
+        batch_size (int): Maximum number of event pages to fetch
+
+    Returns:
+        dict: Mapping of event ID to the match IDs listed on its page
+    """
+    event_matches = {}
+
+    due_events = get_due_events(batch_size=batch_size)
+    blocked = get_blocked_ids('event', [event.id for event in due_events])
+
+    for event in due_events:
+        if event.id in blocked:
+            continue
+
+        try:
+            event_details = vlr_scraper.get_event_details(event.id)
+            if not event_details:
+                if get_miss_state('event', event.id) != 'active':
+                    record_failure('event', event.id)
+                continue
+
+            if upsert_event(event_details):
+                event_matches[event.id] = event_details.get('matches', [])
+                link_matches_to_event(event.id, event_matches[event.id])
+                record_success('event', event.id)
+                logger.info(f"Refreshed event {event.id} ({event_details.get('status')})")
+            else:
+                record_failure('event', event.id, stage='store')
+        except Exception as e:
+            logger.error(f"Error refreshing event {event.id}: {str(e)}")
+            record_failure('event', event.id, error=e)
+            continue
+
+    return event_matches
+
+
+def fetch_event_matches(vlr_scraper, event_matches, limit=EVENT_MATCH_FETCH_LIMIT):
+    """
+    Follow event match lists: complete each event's overview matches with
+    the full list on its matches tab, then fetch matches that are missing
+    or not yet completed and store them linked to their event.
+
+    Matches tab pages are walked only until the run has `limit` matches to
+    fetch, or until a page lists nothing new to fetch (only matches already
+    seen, completed or blocked), so listing pages are bounded as well.
+
+    Args:
+        vlr_scraper: VLR scraper module
+        event_matches (dict): Mapping of event ID to the match IDs linked on its overview
+        limit (int): Maximum number of match pages to fetch
+
+    Returns:
+        int: Number of matches written
+    """
+    match_events = {}
+    frontier = []
+
+    def add_matches(event_id, match_ids):
+        new_ids = [match_id for match_id in match_ids if match_id not in match_events]
+        if not new_ids:
+            return 0
+
+        for match_id in new_ids:
+            match_events[match_id] = event_id
+
+        completed = {match_id for (match_id,) in db.session.query(Match.id).filter(
+            Match.id.in_(new_ids), Match.status == 'completed'
+        ).all()}
+        blocked = get_blocked_ids('match', [match_id for match_id in new_ids if match_id not in completed])
+        due = [match_id for match_id in new_ids if match_id not in completed and match_id not in blocked]
+        frontier.extend(due)
+        return len(due)
+
+    for event_id, match_ids in event_matches.items():
+        add_matches(event_id, match_ids)
+        if len(frontier) >= limit:
+            break
+
+        known = set(match_ids)
+        for page_ids in vlr_scraper.iter_event_match_ids(event_id):
+            listed = [match_id for match_id in page_ids if match_id not in known]
+            known.update(listed)
+            if listed:
+                link_matches_to_event(event_id, listed)
+
+            # Stop before the next page once there is enough to fetch, or
+            # once a page only lists matches that are already known
+            if not add_matches(event_id, listed) or len(frontier) >= limit:
+                break
+
+    frontier = frontier[:limit]
+    if not frontier:
+        return 0
+
+    # Fetch workers draw from the caller's budget (the scheduler's shared
+    # budget) when there is one, so concurrency does not add traffic
+    budget = get_current_budget() or RateBudget('events', EVENT_MATCH_REQUESTS_PER_MINUTE, burst=EVENT_MATCH_FETCH_WORKERS)
+    failures = {}
+    details = vlr_scraper.get_match_details_batch(frontier, max_workers=EVENT_MATCH_FETCH_WORKERS, budget=budget, failures=failures)
+
+    for match_id, fetch in failures.items():
+        record_failure('match', match_id, fetch=fetch)
+
+    matches_data = []
+    for match_id, match_details in details.items():
+        if match_details:
+            match_details['event_id'] = match_events[match_id]
+            matches_data.append(match_details)
+
+    return bulk_upsert_matches(matches_data)
+
+
+def update_events(vlr_scraper):
+    """
+    Scheduled events job: discover new events, refresh due events and
+    follow their match lists
+
+    Args:
+        vlr_scraper: VLR scraper module
+
+    Returns:
+        int: Number of events refreshed
+    """
+    try:
+        crawl_event_listings(vlr_scraper)
+        event_matches = refresh_due_events(vlr_scraper)
+        match_count = fetch_event_matches(vlr_scraper, event_matches)
+
+        logger.info(f"Refreshed {len(event_matches)} events and {match_count} event matches")
+        return len(event_matches)
+
+    except Exception as e:
+        logger.error(f"Error in update_events: {str(e)}")
+        return 0
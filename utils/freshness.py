@@ -0,0 +1,238 @@
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+from app import db
+from models import Match, Team, Player, Event, ScrapeJob, SchedulerJobState
+from utils.access_tracking import COLD_REFRESH_INTERVAL
+from utils.event_crawler import EVENT_REFRESH_INTERVALS
+from utils.player_refresh import PLAYER_TIER_STALENESS
+from utils.refresh_jobs import PRIORITY_LIVE, PRIORITY_MATCHES, PRIORITY_EVENTS, PRIORITY_ROSTERS, PRIORITY_PLAYERS
+
+# Setup logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# Upcoming matches starting further out than this are not listed by the match passes (in seconds)
+FRESHNESS_UPCOMING_HORIZON = 86400
+
+# How far a scheduled job may be overdue before its classes count as behind (in seconds)
+FRESHNESS_LAG_TOLERANCE = 300
+
+# How long a freshness report is reused, so frequent health checks cost no queries (in seconds)
+FRESHNESS_CACHE_SECONDS = 15
+
+# Entity classes: the rows they cover, the p95 age they should stay under
+# (in seconds), the scheduled job refreshing them and the priority of their queued jobs
+FRESHNESS_CLASSES = {
+    'live': {
+        'model': Match,
+        'filters': lambda now: [Match.status == 'live'],
+        'target': 600,  # Two quick match passes
+        'job': 'live_matches',
+        'priority': PRIORITY_LIVE
+    },
+    'upcoming': {
+        'model': Match,
+        'filters': lambda now: [Match.status == 'upcoming',
+                                Match.date <= now + timedelta(seconds=FRESHNESS_UPCOMING_HORIZON)],
+        'target': 3600,  # Two comprehensive match passes
+        'job': 'matches',
+        'priority': PRIORITY_MATCHES
+    },
+    'rosters': {
+        'model': Team,
+        'filters': lambda now: [],
+        'target': COLD_REFRESH_INTERVAL,
+        'job': 'teams',
+        'priority': PRIORITY_ROSTERS
+    },
+    'players': {
+        'model': Player,
+        'filters': lambda now: [Player.team_id.isnot(None)],
+        'target': PLAYER_TIER_STALENESS['benched'],
+        'job': 'teams',
+        'priority': PRIORITY_PLAYERS
+    },
+    'events': {
+        'model': Event,
+        'filters': lambda now: [Event.status.in_(('ongoing', 'upcoming'))],
+        'target': EVENT_REFRESH_INTERVALS['upcoming'],
+        'job': 'events',
+        'priority': PRIORITY_EVENTS
+    }
+}
+
+_cache = {'report': None, 'at': 0}
+_cache_lock = threading.Lock()
+
+
+def get_age_percentiles(model, filters, now):
+    """
+    Get the p50/p95/max age since the last successful refresh of a class.
+
+    Percentiles are read by offset along the last_updated index instead of
+    loading every row: the p95 age is the row 5% in from the oldest.
+
+    Args:
+        model: Model with a last_updated column
+        filters (list): Filter expressions selecting the class
+        now (datetime): Current time
+
+    Returns:
+        dict: count, never_refreshed, and p50/p95/max ages in seconds (None if empty)
+    """
+    base = db.session.query(model.last_updated).filter(*filters)
+    refreshed = base.filter(model.last_updated.isnot(None))
+
+    total = refreshed.count()
+    ages = {
+        'count': total,
+        'never_refreshed': base.filter(model.last_updated.is_(None)).count(),
+        'p50': None,
+        'p95': None,
+        'max': None
+    }
+    if not total:
+        return ages
+
+    for name, fraction in (('p50', 0.5), ('p95', 0.95), ('max', 1.0)):
+        # Rows ordered oldest first; the age exceeded by the newest fraction of the class
+        offset = total - int(math.ceil(fraction * total))
+        last_updated = refreshed.order_by(model.last_updated).offset(offset).limit(1).scalar()
+        ages[name] = max((now - last_updated).total_seconds(), 0)
+
+    return ages
+
+
+def get_schedule_lag(state, now):
+    """
+    Get how far a scheduled job is behind its schedule
+
+    Args:
+        state (SchedulerJobState): Persisted state of the job, or None if it never ran
+        now (datetime): Current time
+
+    Returns:
+        float: Seconds past the time the job was due (0 if on time), None if it never ran
+    """
+    if not state or not state.next_run_at:
+        return None
+    return max((now - state.next_run_at).total_seconds(), 0)
+
+
+def get_queue_lag(priority, now):
+    """
+    Get the age of the oldest queued job of a priority, read along the claim index
+
+    Returns:
+        float: Seconds the oldest job has waited (0 if none is queued)
+    """
+    created_at = db.session.query(ScrapeJob.created_at).filter(
+        ScrapeJob.status == 'queued', ScrapeJob.priority == priority
+    ).order_by(ScrapeJob.id).limit(1).scalar()
+
+    if not created_at:
+        return 0
+    return max((now - created_at).total_seconds(), 0)
+
+
+def build_freshness_report(now=None):
+    """
+    Measure every entity class against its freshness objective
+
+    Args:
+        now (datetime, optional): Current time
+
+    Returns:
+        dict: ok, generated_at and a report per class
+    """
+    now = now or datetime.utcnow()
+    states = {state.name: state for state in SchedulerJobState.query.all()}
+
+    classes = {}
+    for name, entity_class in FRESHNESS_CLASSES.items():
+        ages = get_age_percentiles(entity_class['model'], entity_class['filters'](now), now)
+        schedule_lag = get_schedule_lag(states.get(entity_class['job']), now)
+
+        stale = ages['p95'] is not None and ages['p95'] > entity_class['target']
+        # A job that never ran shows up through the ages of its class instead
+        behind = schedule_lag is not None and schedule_lag > FRESHNESS_LAG_TOLERANCE
+
+        classes[name] = dict(
+            ages,
+            target=entity_class['target'],
+            job=entity_class['job'],
+            schedule_lag=schedule_lag,
+            queue_lag=get_queue_lag(entity_class['priority'], now),
+            stale=stale,
+            behind=behind,
+            ok=not (stale or behind)
+        )
+
+    return {
+        'ok': all(entity_class['ok'] for entity_class in classes.values()),
+        'generated_at': now.isoformat(),
+        'classes': classes
+    }
+
+
+def get_freshness_report(max_age=FRESHNESS_CACHE_SECONDS):
+    """
+    Get the freshness report, reusing one built within the last few seconds
+
+    Args:
+        max_age (int): Seconds a report is reused
+
+    Returns:
+        dict: Output of build_freshness_report
+    """
+    with _cache_lock:
+        if _cache['report'] and time.monotonic() - _cache['at'] <= max_age:
+            return _cache['report']
+
+    report = build_freshness_report()
+
+    with _cache_lock:
+        _cache['report'] = report
+        _cache['at'] = time.monotonic()
+
+    return report
+
+
+def render_freshness_metrics(report):
+    """
+    Render a freshness report in the Prometheus text exposition format
+
+    Args:
+        report (dict): Output of get_freshness_report
+
+    Returns:
+        str: Metrics text
+    """
+    lines = [
+        '# HELP vlr_freshness_age_seconds Age since the last successful refresh, by entity class',
+        '# TYPE vlr_freshness_age_seconds gauge'
+    ]
+    for name, entity_class in report['classes'].items():
+        for quantile, key in (('0.5', 'p50'), ('0.95', 'p95'), ('1', 'max')):
+            if entity_class[key] is not None:
+                lines.append(f'vlr_freshness_age_seconds{{class="{name}",quantile="{quantile}"}} {entity_class[key]}')
+
+    gauges = [
+        ('vlr_freshness_target_seconds', 'p95 age the entity class should stay under', 'target'),
+        ('vlr_freshness_entities', 'Refreshed entities in the class', 'count'),
+        ('vlr_freshness_never_refreshed', 'Entities in the class never refreshed', 'never_refreshed'),
+        ('vlr_freshness_schedule_lag_seconds', 'How far the job refreshing the class is behind schedule', 'schedule_lag'),
+        ('vlr_freshness_queue_lag_seconds', 'Age of the oldest queued job of the class', 'queue_lag'),
+        ('vlr_freshness_ok', '1 if the class meets its freshness objective', 'ok')
+    ]
+    for metric, help_text, key in gauges:
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} gauge')
+        for name, entity_class in report['classes'].items():
+            if entity_class[key] is not None:
+                lines.append(f'{metric}{{class="{name}"}} {int(entity_class[key]) if key == "ok" else entity_class[key]}')
+
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,260 @@
+import logging
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from app import db
+from models import JobRun
+from utils.run_metrics import RunMetrics, use_run, JOB_RUN_COUNTERS
+from utils.stats import percentile
+
+# Setup logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# How long job runs are kept (in days)
+JOB_RUN_RETENTION_DAYS = 14
+
+# Runs summarized by the admin endpoint and the exported metrics (in seconds);
+# the window before it is reported alongside as the baseline
+JOB_METRICS_WINDOW = 3600
+
+
+@contextmanager
+def track_run(job_name, run_type='scheduled', scrape_job_id=None, run=None):
+    """
+    Collect the pages, cache hits, stage times and rows changed by the code
+    in the block into a job run, and save the run when the block exits. An
+    exception raised in the block fails the run and is re-raised.
+
+    A run handed off to another thread in the block (run.handed_off) is
+    saved by the thread that continues it instead.
+
+    Args:
+        job_name (str): Scheduled job name, or queued job kind
+        run_type (str): scheduled or queue
+        scrape_job_id (int, optional): ID of the queued job being run
+        run (RunMetrics, optional): Run handed off by another thread to continue
+
+    Yields:
+        RunMetrics: The run
+    """
+    run = run or RunMetrics(job_name, run_type, scrape_job_id)
+    run.handed_off = False
+    started = time.perf_counter()
+
+    try:
+        with use_run(run):
+            yield run
+    except Exception as e:
+        run.fail(str(e))
+        raise
+    finally:
+        run.elapsed += time.perf_counter() - started
+        if not run.handed_off:
+            save_run(run)
+
+
+def save_run(run):
+    """
+    Persist a finished run. Only an exception fails the run; fetch and
+    parse errors of single pages (including expected 404s) are counted in
+    its errors counter instead
+
+    Args:
+        run (RunMetrics): Run to save
+
+    Returns:
+        JobRun: Saved run, or None on error
+    """
+    try:
+        job_run = JobRun(
+            job_name=run.job_name,
+            run_type=run.run_type,
+            scrape_job_id=run.scrape_job_id,
+            status='failed' if run.error else 'succeeded',
+            started_at=run.started_at,
+            finished_at=datetime.utcnow(),
+            duration=run.elapsed,
+            error=run.error,
+            **run.snapshot()
+        )
+        db.session.add(job_run)
+        db.session.commit()
+        return job_run
+
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error saving run of job {run.job_name}: {str(e)}")
+        return None
+
+
+def list_job_runs(job_name=None, run_type=None, status=None, limit=100):
+    """
+    List job runs, most recent first
+
+    Args:
+        job_name (str, optional): Only runs of this job
+        run_type (str, optional): Only scheduled or queue runs
+        status (str, optional): Only succeeded or failed runs
+        limit (int): Maximum number of runs
+
+    Returns:
+        list: JobRun objects
+    """
+    query = JobRun.query
+    if job_name:
+        query = query.filter_by(job_name=job_name)
+    if run_type:
+        query = query.filter_by(run_type=run_type)
+    if status:
+        query = query.filter_by(status=status)
+
+    return query.order_by(JobRun.started_at.desc()).limit(limit).all()
+
+
+def summarize_runs(runs):
+    """
+    Aggregate runs of one job: counts, duration percentiles and the mean of
+    every counter per run, so a slower job shows which stage grew
+
+    Args:
+        runs (list): JobRun objects
+
+    Returns:
+        dict: Summary, None if there were no runs
+    """
+    if not runs:
+        return None
+
+    durations = [run.duration for run in runs if run.duration is not None]
+    summary = {
+        'runs': len(runs),
+        'failed': sum(1 for run in runs if run.status == 'failed'),
+        'errors': sum(run.errors or 0 for run in runs),
+        'duration_p50': percentile(durations, 0.5),
+        'duration_p95': percentile(durations, 0.95),
+        'duration_max': max(durations) if durations else None
+    }
+    for name in JOB_RUN_COUNTERS:
+        summary[f'{name}_mean'] = sum(getattr(run, name) or 0 for run in runs) / len(runs)
+
+    return summary
+
+
+def get_job_run_summary(window=JOB_METRICS_WINDOW, job_name=None, now=None):
+    """
+    Summarize the runs of every job that started within the window, next to
+    the window before it and the job's latest run
+
+    Args:
+        window (int): Window in seconds
+        job_name (str, optional): Only this job
+        now (datetime, optional): Current time
+
+    Returns:
+        dict: job name -> current, baseline and last run
+    """
+    now = now or datetime.utcnow()
+    since = now - timedelta(seconds=window)
+    baseline_since = since - timedelta(seconds=window)
+
+    query = JobRun.query.filter(JobRun.started_at >= baseline_since)
+    if job_name:
+        query = query.filter_by(job_name=job_name)
+
+    runs_by_job = {}
+    for run in query.order_by(JobRun.started_at).all():
+        runs_by_job.setdefault(run.job_name, []).append(run)
+
+    summary = {}
+    for name, runs in runs_by_job.items():
+        summary[name] = {
+            'run_type': runs[-1].run_type,
+            'current': summarize_runs([run for run in runs if run.started_at >= since]),
+            'baseline': summarize_runs([run for run in runs if run.started_at < since]),
+            'last_run': runs[-1].to_dict()
+        }
+
+    return summary
+
+
+def prune_job_runs(retention_days=JOB_RUN_RETENTION_DAYS, now=None):
+    """
+    Delete runs older than the retention period
+
+    Args:
+        retention_days (int): Days to keep
+        now (datetime, optional): Current time
+
+    Returns:
+        int: Number of runs deleted
+    """
+    now = now or datetime.utcnow()
+
+    try:
+        deleted = JobRun.query.filter(
+            JobRun.started_at < now - timedelta(days=retention_days)
+        ).delete(synchronize_session=False)
+        db.session.commit()
+
+        if deleted:
+            logger.info(f"Deleted {deleted} job runs older than {retention_days} days")
+        return deleted
+
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error pruning job runs: {str(e)}")
+        return 0
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_metrics(summary):
+    """
+    Render a job run summary in the Prometheus text exposition format
+
+    Args:
+        summary (dict): Output of get_job_run_summary
+
+    Returns:
+        str: Metrics text
+    """
+    gauges = [
+        ('vlr_job_runs', 'Runs started in the metrics window', 'runs'),
+        ('vlr_job_failed_runs', 'Failed runs started in the metrics window', 'failed'),
+        ('vlr_job_errors', 'Fetch and parse errors in runs started in the metrics window', 'errors'),
+        ('vlr_job_duration_p50_seconds', 'Median run duration in the metrics window', 'duration_p50'),
+        ('vlr_job_duration_p95_seconds', '95th percentile run duration in the metrics window', 'duration_p95'),
+        ('vlr_job_duration_max_seconds', 'Longest run in the metrics window', 'duration_max')
+    ]
+    gauges += [(f'vlr_job_{name}_mean', f'Mean {name.replace("_", " ")} per run in the metrics window',
+                f'{name}_mean') for name in JOB_RUN_COUNTERS]
+
+    lines = []
+    for metric, help_text, key in gauges:
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} gauge')
+        for job_name, job in sorted(summary.items()):
+            current = job['current']
+            if not current or current[key] is None:
+                continue
+            lines.append(f'{metric}{{job="{escape_label(job_name)}",type="{job["run_type"]}"}} {current[key]}')
+
+    last_runs = [
+        ('vlr_job_last_run_timestamp_seconds', 'Start time of the latest run',
+         lambda run: (datetime.fromisoformat(run['started_at']) - datetime(1970, 1, 1)).total_seconds()),
+        ('vlr_job_last_run_duration_seconds', 'Duration of the latest run', lambda run: run['duration'])
+    ]
+    for metric, help_text, value in last_runs:
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} gauge')
+        for job_name, job in sorted(summary.items()):
+            last_run = job['last_run']
+            if value(last_run) is None:
+                continue
+            lines.append(f'{metric}{{job="{escape_label(job_name)}",type="{job["run_type"]}",'
+                         f'status="{last_run["status"]}"}} {value(last_run)}')
+
+    return '\n'.join(lines) + '\n'
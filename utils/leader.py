@@ -0,0 +1,179 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import text
+from app import app, db
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Setup logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# PostgreSQL advisory lock key of the scheduler leader ("VALS")
+ADVISORY_LOCK_KEY = 0x56414C53
+
+# Lock file used instead of an advisory lock on other databases (e.g. SQLite)
+LOCK_FILE = os.environ.get("SCHEDULER_LOCK_FILE")
+
+# How often followers try to take over and the leader checks it still holds the lock (in seconds)
+LEADER_RETRY_INTERVAL = 15
+
+
+class LeaderElection:
+    """
+    Elects one process to run the scheduler.
+
+    On PostgreSQL the leader holds a session-level advisory lock on a
+    dedicated connection; elsewhere it holds an exclusive lock on a lock
+    file. Both are released by the operating system or the database when
+    the leader process dies, so a follower takes over on its next try.
+    """
+
+    def __init__(self):
+        self.is_leader = False
+        self.backend = None
+        self.connection = None
+        self.lock_file = None
+        self.elected_at = None
+
+    def try_acquire(self):
+        """
+        Try to become the leader
+
+        Returns:
+            bool: True if this process is now the leader
+        """
+        if db.engine.dialect.name == 'postgresql':
+            self.backend = 'advisory_lock'
+            self.is_leader = self._acquire_advisory_lock()
+        else:
+            self.backend = 'lock_file'
+            self.is_leader = self._acquire_lock_file()
+
+        if self.is_leader:
+            self.elected_at = datetime.utcnow()
+            logger.info(f"Process {os.getpid()} elected scheduler leader ({self.backend})")
+        return self.is_leader
+
+    def _acquire_advisory_lock(self):
+        connection = db.engine.connect()
+        try:
+            acquired = connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {'key': ADVISORY_LOCK_KEY}).scalar()
+            # Advisory locks are held by the session, not the transaction; do not sit idle in a transaction
+            connection.commit()
+        except Exception:
+            connection.close()
+            raise
+
+        if not acquired:
+            connection.close()
+            return False
+
+        self.connection = connection
+        return True
+
+    def _acquire_lock_file(self):
+        if fcntl is None:
+            logger.warning("File locks are not supported on this platform; assuming a single process")
+            return True
+
+        path = LOCK_FILE or os.path.join(app.instance_path, 'scheduler.lock')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        lock_file = open(path, 'a+')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+
+        # Record the holder for operators; the lock itself is the flock
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(f"{os.getpid()} {datetime.utcnow().isoformat()}\n")
+        lock_file.flush()
+
+        self.lock_file = lock_file
+        return True
+
+    def check(self):
+        """
+        Check that the leader still holds its lock; a lost database
+        connection means the advisory lock is gone
+
+        Returns:
+            bool: True if this process is still the leader
+        """
+        if not self.is_leader or self.connection is None:
+            return self.is_leader
+
+        try:
+            self.connection.execute(text("SELECT 1"))
+            self.connection.commit()
+        except Exception as e:
+            logger.error(f"Lost scheduler leadership: {str(e)}")
+            self.is_leader = False
+            try:
+                self.connection.close()
+            except Exception:
+                pass
+            self.connection = None
+
+        return self.is_leader
+
+    def run(self, on_elected):
+        """
+        Campaign for leadership forever; call on_elected the first time
+        this process becomes the leader
+
+        Args:
+            on_elected: Function starting the scheduler
+        """
+        started = False
+
+        with app.app_context():
+            while True:
+                try:
+                    if not self.check() and self.try_acquire() and not started:
+                        on_elected()
+                        started = True
+                except Exception as e:
+                    logger.error(f"Error in leader election: {str(e)}")
+
+                time.sleep(LEADER_RETRY_INTERVAL)
+
+    def to_dict(self):
+        return {
+            'pid': os.getpid(),
+            'leader': self.is_leader,
+            'backend': self.backend,
+            'elected_at': self.elected_at.isoformat() if self.elected_at else None
+        }
+
+
+election = LeaderElection()
+
+
+def is_leader():
+    """
+    Check whether this process is the scheduler leader
+    """
+    return election.is_leader
+
+
+def start_leader_election(on_elected):
+    """
+    Start campaigning for leadership in a background thread
+
+    Args:
+        on_elected: Function starting the scheduler once this process leads
+    """
+    thread = threading.Thread(target=election.run, args=(on_elected,), name="leader-election", daemon=True)
+    thread.start()
+    return thread
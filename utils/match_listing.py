@@ -0,0 +1,86 @@
+import logging
+import threading
+import time
+from scrapers.fetch_state import get_last_fetch, clear_last_fetch
+from utils.run_metrics import count
+from utils.schedule_config import MATCH_LISTING_LIMIT, MATCH_LISTING_REUSE_WINDOW
+
+# Setup logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+
+class ListingCache:
+    """
+    Latest match listing of every source, shared by the match passes.
+
+    Only one pass fetches a source's listing at a time: a pass asking while
+    the other is fetching waits for that fetch and reuses its result instead
+    of queueing a second request behind it.
+    """
+
+    def __init__(self, max_age=MATCH_LISTING_REUSE_WINDOW):
+        self.max_age = max_age
+        self.entries = {}
+        self.fetching = set()
+        self.condition = threading.Condition()
+        self.fetches = 0
+        self.reuses = 0
+
+    def _get_fresh(self, source, limit):
+        entry = self.entries.get(source)
+        if entry and time.monotonic() - entry['fetched_at'] <= self.max_age and entry['limit'] >= limit:
+            return entry['matches'][:limit]
+        return None
+
+    def get(self, source, fetch, limit):
+        """
+        Get a source's listing, fetching it only if no fresh copy is cached or in flight
+
+        Args:
+            source (str): vlr or bo3
+            fetch: Scraper get_matches function taking limit
+            limit (int): Number of matches wanted
+
+        Returns:
+            list: Match listing dictionaries
+        """
+        with self.condition:
+            while True:
+                matches = self._get_fresh(source, limit)
+                if matches is not None:
+                    self.reuses += 1
+                    count('cache_hits')
+                    logger.info(f"Reusing {source} match listing fetched by another pass")
+                    return matches
+
+                if source not in self.fetching:
+                    break
+                self.condition.wait()
+
+            self.fetching.add(source)
+
+        fetch_limit = max(limit, MATCH_LISTING_LIMIT)
+        matches = []
+        try:
+            clear_last_fetch()
+            matches = fetch(limit=fetch_limit)
+
+            # Failed requests are not shared; the next pass tries again
+            if not get_last_fetch().get('error_class'):
+                with self.condition:
+                    self.entries[source] = {'matches': matches, 'limit': fetch_limit, 'fetched_at': time.monotonic()}
+                    self.fetches += 1
+        finally:
+            with self.condition:
+                self.fetching.discard(source)
+                self.condition.notify_all()
+
+        return matches[:limit]
+
+    def stats(self):
+        with self.condition:
+            return {'fetches': self.fetches, 'reuses': self.reuses}
+
+
+listing_cache = ListingCache()
@@ -0,0 +1,177 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+from app import db
+from models import NegativeCacheEntry
+
+# Setup logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# How long a "Page not found" is remembered; every repeated miss doubles it up to the maximum
+NEGATIVE_CACHE_TTL = timedelta(days=1)
+NEGATIVE_CACHE_MAX_TTL = timedelta(days=30)
+
+# Maximum number of active entries kept in process memory
+NEGATIVE_CACHE_MAX_ENTRIES = 10000
+
+# Active entries already seen by this process, so repeated lookups skip the database
+_active = {}
+_lock = threading.Lock()
+
+
+def get_miss_ttl(misses):
+    """
+    Get how long a miss is cached after a number of consecutive misses
+
+    Args:
+        misses (int): Number of consecutive misses
+
+    Returns:
+        timedelta: Time to live of the entry
+    """
+    return min(NEGATIVE_CACHE_TTL * 2 ** max(misses - 1, 0), NEGATIVE_CACHE_MAX_TTL)
+
+
+def _remember(key, expires_at, now):
+    """
+    Keep an active entry in process memory. When the cache is full, expired
+    entries are dropped first, then the oldest ones; a dropped entry is
+    read from the database again on its next lookup.
+
+    Args:
+        key (tuple): (entity type, entity ID)
+        expires_at (datetime): When the cached miss expires
+        now (datetime): Current time
+    """
+    with _lock:
+        _active.pop(key, None)
+        if len(_active) >= NEGATIVE_CACHE_MAX_ENTRIES:
+            for expired in [other for other, other_expires_at in _active.items() if other_expires_at <= now]:
+                del _active[expired]
+
+        while len(_active) >= NEGATIVE_CACHE_MAX_ENTRIES:
+            del _active[next(iter(_active))]
+
+        _active[key] = expires_at
+
+
+def get_miss_state(entity_type, entity_id, now=None):
+    """
+    Check whether an entity is known not to exist
+
+    Lookups made outside an application context (e.g. a scraper used on
+    its own) are never cached.
+
+    Args:
+        entity_type (str): team, player or event
+        entity_id (str): ID (slug) of the entity
+        now (datetime, optional): Current time
+
+    Returns:
+        str: 'active' if the miss is cached, 'expired' if an old miss should
+            be checked again, or None if the entity never missed
+    """
+    now = now or datetime.utcnow()
+    key = (entity_type, str(entity_id))
+
+    with _lock:
+        expires_at = _active.get(key)
+    if expires_at and expires_at > now:
+        return 'active'
+
+    try:
+        entry = NegativeCacheEntry.query.filter_by(entity_type=entity_type, entity_id=str(entity_id)).first()
+    except RuntimeError:
+        return None
+    except Exception as e:
+        logger.error(f"Error in get_miss_state: {str(e)}")
+        return None
+
+    if not entry:
+        return None
+
+    if entry.expires_at and entry.expires_at > now:
+        _remember(key, entry.expires_at, now)
+        return 'active'
+
+    return 'expired'
+
+
+def missing_ids_subquery(entity_type, now=None):
+    """
+    Get a subquery of the IDs with an active cached miss, for excluding
+    known-missing entities from refresh queries, e.g.
+    ``Player.query.filter(~Player.id.in_(missing_ids_subquery('player')))``
+
+    Args:
+        entity_type (str): team, player or event
+        now (datetime, optional): Current time
+
+    Returns:
+        Select: Subquery selecting entity IDs
+    """
+    now = now or datetime.utcnow()
+    return db.session.query(NegativeCacheEntry.entity_id).filter(
+        NegativeCacheEntry.entity_type == entity_type,
+        NegativeCacheEntry.expires_at > now
+    ).scalar_subquery()
+
+
+def record_miss(entity_type, entity_id):
+    """
+    Remember that an entity was not found; repeated misses extend the TTL
+
+    Args:
+        entity_type (str): team, player or event
+        entity_id (str): ID (slug) of the entity
+
+    Returns:
+        datetime: When the cached miss expires, or None if it was not stored
+    """
+    try:
+        now = datetime.utcnow()
+        entry = NegativeCacheEntry.query.filter_by(entity_type=entity_type, entity_id=str(entity_id)).first()
+        if not entry:
+            entry = NegativeCacheEntry(entity_type=entity_type, entity_id=str(entity_id), misses=0, first_missed_at=now)
+
+        entry.misses = (entry.misses or 0) + 1
+        entry.last_missed_at = now
+        entry.expires_at = now + get_miss_ttl(entry.misses)
+
+        db.session.add(entry)
+        db.session.commit()
+
+        _remember((entity_type, str(entity_id)), entry.expires_at, now)
+
+        logger.info(f"Cached miss for {entity_type} {entity_id} until {entry.expires_at} ({entry.misses} misses)")
+        return entry.expires_at
+
+    except RuntimeError:
+        return None
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error in record_miss: {str(e)}")
+        return None
+
+
+def clear_miss(entity_type, entity_id):
+    """
+    Forget a cached miss after the entity was found again
+
+    Args:
+        entity_type (str): team, player or event
+        entity_id (str): ID (slug) of the entity
+    """
+    try:
+        with _lock:
+            _active.pop((entity_type, str(entity_id)), None)
+
+        NegativeCacheEntry.query.filter_by(entity_type=entity_type, entity_id=str(entity_id)).delete()
+        db.session.commit()
+
+    except RuntimeError:
+        return
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error in clear_miss: {str(e)}")
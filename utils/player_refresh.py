@@ -0,0 +1,132 @@
+import logging
+from datetime import datetime, timedelta
+from app import db
+from models import Player
+from utils.access_tracking import get_access_scores, HOT_SCORE
+from utils.negative_cache import missing_ids_subquery
+
+# Setup logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# Maximum staleness per player tier (in seconds)
+PLAYER_TIER_STALENESS = {
+    'hot': 6 * 3600,  # Players clients are looking at, and active rosters of such teams
+    'active': 2 * 86400,  # Active roster of every other team
+    'benched': 7 * 86400,  # Substitutes, inactive players and staff
+    'inactive': 30 * 86400  # Players without a team
+}
+
+# Maximum number of player pages fetched per run
+PLAYER_REFRESH_BATCH = 40
+
+# Roles that mark a player as not part of the active five
+BENCH_ROLE_KEYWORDS = ('sub', 'bench', 'inactive', 'stand-in', 'coach', 'manager', 'analyst')
+
+
+def get_player_tier(team_id, role, team_scores, player_score=0.0):
+    """
+    Classify a player into a refresh tier
+
+    Args:
+        team_id (str): Team ID of the player
+        role (str): Player role as scraped from the roster
+        team_scores (dict): Team access scores from get_access_scores
+        player_score (float): Access score of the player's own page
+
+    Returns:
+        str: Tier name (hot, active, benched, inactive)
+    """
+    if player_score >= HOT_SCORE:
+        return 'hot'
+
+    if not team_id:
+        return 'inactive'
+
+    if role and any(keyword in role.lower() for keyword in BENCH_ROLE_KEYWORDS):
+        return 'benched'
+
+    if team_scores.get(team_id, 0.0) >= HOT_SCORE:
+        return 'hot'
+
+    return 'active'
+
+
+def get_stale_players(batch_size=PLAYER_REFRESH_BATCH, now=None):
+    """
+    Find the players whose details are most overdue for a refresh
+
+    Args:
+        batch_size (int): Maximum number of players to return
+        now (datetime, optional): Current time
+
+    Returns:
+        list: (player_id, tier) tuples, stalest first
+    """
+    now = now or datetime.utcnow()
+    team_scores = get_access_scores('team')
+    player_scores = get_access_scores('player')
+
+    # Nothing fresher than the shortest tier can be due, so let the
+    # database discard those rows
+    min_staleness = min(PLAYER_TIER_STALENESS.values())
+    cutoff = now - timedelta(seconds=min_staleness)
+
+    # Players whose page is known not to exist are left out until the miss expires
+    rows = db.session.query(Player.id, Player.team_id, Player.role, Player.last_updated).filter(
+        (Player.last_updated == None) | (Player.last_updated < cutoff),  # noqa: E711
+        ~Player.id.in_(missing_ids_subquery('player', now))
+    ).all()
+
+    overdue = []
+    for player_id, team_id, role, last_updated in rows:
+        tier = get_player_tier(team_id, role, team_scores, player_scores.get(player_id, 0.0))
+        max_staleness = PLAYER_TIER_STALENESS[tier]
+
+        if last_updated is None:
+            # Never fetched: most urgent
+            ratio = float('inf')
+        else:
+            ratio = (now - last_updated).total_seconds() / max_staleness
+
+        if ratio >= 1:
+            overdue.append((ratio, player_id, tier))
+
+    overdue.sort(key=lambda item: item[0], reverse=True)
+
+    return [(player_id, tier) for _, player_id, tier in overdue[:batch_size]]
+
+
+def refresh_stale_players(batch_size=PLAYER_REFRESH_BATCH):
+    """
+    Queue a job for a bounded batch of the stalest players
+
+    Args:
+        batch_size (int): Maximum number of player pages to fetch
+
+    Returns:
+        int: Number of players queued
+    """
+    try:
+        from utils.dead_letter import get_blocked_ids
+        from utils.refresh_jobs import create_job, PRIORITY_PLAYERS
+
+        stale_players = get_stale_players(batch_size=batch_size)
+        blocked = get_blocked_ids('player', [player_id for player_id, tier in stale_players])
+        stale_players = [(player_id, tier) for player_id, tier in stale_players if player_id not in blocked]
+        logger.info(f"Queueing {len(stale_players)} stale players")
+
+        queued_count = 0
+        for player_id, tier in stale_players:
+            try:
+                create_job('player', player_id, priority=PRIORITY_PLAYERS)
+                queued_count += 1
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Error queueing player {player_id} (tier: {tier}): {str(e)}")
+
+        return queued_count
+
+    except Exception as e:
+        logger.error(f"Error in refresh_stale_players: {str(e)}")
+        return 0
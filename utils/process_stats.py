@@ -0,0 +1,50 @@
+import gc
+import os
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def get_rss_mb():
+    """
+    Get the resident memory of the current process
+
+    Returns:
+        float: Resident set size in MB, or None if it cannot be measured
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        pass
+
+    if resource is not None:
+        # Peak rather than current RSS, in KB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    return None
+
+
+def get_process_stats(app):
+    """
+    Get boot time and memory figures of the current process
+
+    Args:
+        app: Flask app, whose config holds its boot time
+
+    Returns:
+        dict: Process stats
+    """
+    from app import APP_ROLE
+
+    rss = get_rss_mb()
+    return {
+        'pid': os.getpid(),
+        'role': APP_ROLE,
+        'app_boot_seconds': round(app.config.get('BOOT_SECONDS', 0), 4),
+        'worker_boot_seconds': app.config.get('WORKER_BOOT_SECONDS'),
+        'rss_mb': round(rss, 1) if rss is not None else None,
+        'gc_frozen_objects': gc.get_freeze_count()
+    }
@@ -0,0 +1,339 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+# Setup logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# Budget used by bulk jobs (e.g. historical backfill) so they cannot starve live updates
+BACKFILL_REQUESTS_PER_MINUTE = 12
+
+# Budget shared by all scheduled jobs: the rate the single sequential scheduler
+# loop used to make requests at (one request per 2 seconds)
+SCHEDULER_REQUESTS_PER_MINUTE = 30
+
+# Weighted shares of the scheduler budget per job class. Under contention a
+# class gets at least its weight's fraction of the requests; capacity a class
+# leaves unused is borrowed by the others. Live work preempts every share.
+BUDGET_CLASS_WEIGHTS = {
+    'live': 40,
+    'upcoming': 20,
+    'reads': 10,
+    'events': 10,
+    'rosters': 10,
+    'players': 10,
+    'retries': 10,
+    'backfill': 10
+}
+PREEMPTIVE_BUDGET_CLASSES = ('live',)
+
+_local = threading.local()
+
+
+class RateBudget:
+    """
+    Thread-safe token bucket limiting outbound requests per minute
+    """
+
+    def __init__(self, name, requests_per_minute, burst=1):
+        self.name = name
+        self.interval = 60.0 / requests_per_minute
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.consumed = 0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self.updated
+        self.tokens = min(self.capacity, self.tokens + elapsed / self.interval)
+        self.updated = now
+
+    def set_rate(self, requests_per_minute):
+        """
+        Change the rate, e.g. from a command line flag, keeping the tokens earned so far
+        """
+        with self.lock:
+            self._refill(time.monotonic())
+            self.interval = 60.0 / requests_per_minute
+
+    def acquire(self):
+        """
+        Block until a request may be made
+        """
+        while True:
+            with self.lock:
+                self._refill(time.monotonic())
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    self.consumed += 1
+                    return
+                wait = (1 - self.tokens) * self.interval
+
+            time.sleep(wait)
+
+
+class PriorityRateBudget(RateBudget):
+    """
+    Token bucket shared by several jobs. When requests are waiting for a
+    token, the one with the highest priority (lowest number) gets it first,
+    so a long low-priority crawl cannot delay a high-priority job by more
+    than one request.
+    """
+
+    def __init__(self, name, requests_per_minute, burst=1):
+        super().__init__(name, requests_per_minute, burst)
+        self.condition = threading.Condition(self.lock)
+        self.waiting = []
+        self.sequence = itertools.count()
+        self.consumed_by = {}
+
+    def acquire(self, priority=0, share_name=None):
+        """
+        Block until a request of the given priority may be made
+
+        Args:
+            priority (int): Lower numbers are served first
+            share_name (str, optional): Name the request is counted under
+        """
+        ticket = (priority, next(self.sequence))
+
+        with self.condition:
+            heapq.heappush(self.waiting, ticket)
+            try:
+                while True:
+                    self._refill(time.monotonic())
+                    if self.waiting[0] == ticket and self.tokens >= 1:
+                        heapq.heappop(self.waiting)
+                        self.tokens -= 1
+                        self.consumed += 1
+                        if share_name:
+                            self.consumed_by[share_name] = self.consumed_by.get(share_name, 0) + 1
+                        self.condition.notify_all()
+                        return
+
+                    if self.waiting[0] == ticket:
+                        self.condition.wait((1 - self.tokens) * self.interval)
+                    else:
+                        self.condition.wait()
+            except BaseException:
+                if ticket in self.waiting:
+                    self.waiting.remove(ticket)
+                    heapq.heapify(self.waiting)
+                    self.condition.notify_all()
+                raise
+
+    def share(self, name, priority):
+        """
+        Get a view of the budget for one job, usable wherever a RateBudget is
+
+        Args:
+            name (str): Job name, for consumption stats
+            priority (int): Priority of the job's requests
+
+        Returns:
+            BudgetShare: The job's share
+        """
+        return BudgetShare(self, name, priority)
+
+
+class BudgetShare:
+    """
+    A job's view of a PriorityRateBudget: acquire() draws from the shared
+    budget at the job's priority
+    """
+
+    def __init__(self, budget, name, priority):
+        self.budget = budget
+        self.name = name
+        self.priority = priority
+
+    def acquire(self):
+        self.budget.acquire(self.priority, self.name)
+
+    @property
+    def consumed(self):
+        return self.budget.consumed_by.get(self.name, 0)
+
+
+class BudgetAllocator(PriorityRateBudget):
+    """
+    Token bucket shared by job classes with weighted shares.
+
+    Waiting requests of a preemptive class (live) are always served first.
+    Otherwise the next token goes to the waiting class that has used the
+    least of its share (weighted fair queueing), so every class is
+    guaranteed its fraction under contention, and a class with nothing to do
+    leaves its tokens to the others. A class coming back from idle does not
+    get credit for the time it did not use. Within a class, requests are
+    served by priority.
+    """
+
+    def __init__(self, name, requests_per_minute, weights=None, classes=None, default_class='backfill',
+                 preemptive=PREEMPTIVE_BUDGET_CLASSES, burst=1):
+        """
+        Args:
+            name (str): Budget name
+            requests_per_minute (int): Total rate
+            weights (dict, optional): Weight of every class
+            classes (dict, optional): Class of every request priority
+            default_class (str): Class of priorities missing from classes
+            preemptive (tuple): Classes served before any share is considered
+            burst (int): Bucket capacity
+        """
+        super().__init__(name, requests_per_minute, burst)
+        self.weights = dict(weights or BUDGET_CLASS_WEIGHTS)
+        self.classes = dict(classes or {})
+        self.default_class = default_class
+        self.preemptive = tuple(preemptive)
+        self.waiting_by_class = {budget_class: [] for budget_class in self.weights}
+        self.virtual_time = {budget_class: 0.0 for budget_class in self.weights}
+        self.clock = 0.0
+        self.consumed_by_class = {budget_class: 0 for budget_class in self.weights}
+        self.wait_by_class = {budget_class: 0.0 for budget_class in self.weights}
+
+    def get_class(self, priority):
+        return self.classes.get(priority, self.default_class)
+
+    def _next_ticket(self):
+        backlogged = [budget_class for budget_class, tickets in self.waiting_by_class.items() if tickets]
+        if not backlogged:
+            return None
+
+        preemptive = [budget_class for budget_class in backlogged if budget_class in self.preemptive]
+        if preemptive:
+            budget_class = min(preemptive, key=lambda name: self.waiting_by_class[name][0])
+        else:
+            budget_class = min(backlogged, key=lambda name: (self.virtual_time[name], -self.weights.get(name, 1)))
+
+        return budget_class, self.waiting_by_class[budget_class][0]
+
+    def _add_waiter(self, budget_class, ticket):
+        """
+        Queue a request ticket in its class; the caller holds the lock
+
+        Returns:
+            list: Waiting tickets of the class
+        """
+        tickets = self.waiting_by_class.setdefault(budget_class, [])
+        self.virtual_time.setdefault(budget_class, 0.0)
+        if not tickets:
+            # Unused share is not saved up while the class is idle
+            self.virtual_time[budget_class] = max(self.virtual_time[budget_class], self.clock)
+        heapq.heappush(tickets, ticket)
+        return tickets
+
+    def _serve_next(self, budget_class, waited, share_name=None):
+        """
+        Hand a token to the head ticket of a class, the one _next_ticket
+        chose, and charge it to the class's share; the caller holds the lock
+
+        Args:
+            budget_class (str): Class of the ticket
+            waited (float): Seconds the ticket waited
+            share_name (str, optional): Name the request is counted under
+        """
+        heapq.heappop(self.waiting_by_class[budget_class])
+        self.consumed += 1
+        self.clock = self.virtual_time[budget_class]
+        self.virtual_time[budget_class] += 1.0 / self.weights.get(budget_class, 1)
+        self.consumed_by_class[budget_class] = self.consumed_by_class.get(budget_class, 0) + 1
+        self.wait_by_class[budget_class] = self.wait_by_class.get(budget_class, 0.0) + waited
+        if share_name:
+            self.consumed_by[share_name] = self.consumed_by.get(share_name, 0) + 1
+
+    def acquire(self, priority=0, share_name=None):
+        """
+        Block until a request of the given priority may be made
+
+        Args:
+            priority (int): Request priority, which selects the class
+            share_name (str, optional): Name the request is counted under
+        """
+        budget_class = self.get_class(priority)
+        ticket = (priority, next(self.sequence))
+        queued_at = time.monotonic()
+
+        with self.condition:
+            tickets = self._add_waiter(budget_class, ticket)
+
+            try:
+                while True:
+                    self._refill(time.monotonic())
+                    is_next = self._next_ticket() == (budget_class, ticket)
+                    if is_next and self.tokens >= 1:
+                        self.tokens -= 1
+                        self._serve_next(budget_class, time.monotonic() - queued_at, share_name)
+                        self.condition.notify_all()
+                        return
+
+                    if is_next:
+                        self.condition.wait((1 - self.tokens) * self.interval)
+                    else:
+                        self.condition.wait()
+            except BaseException:
+                if ticket in tickets:
+                    tickets.remove(ticket)
+                    heapq.heapify(tickets)
+                    self.condition.notify_all()
+                raise
+
+    def report(self):
+        """
+        Report consumption per class against its share
+
+        Returns:
+            dict: Per class: weight, requests, share of all requests, fair
+                share, requests borrowed beyond the fair share, average wait
+                and current waiters
+        """
+        with self.condition:
+            total_weight = sum(self.weights.values()) or 1
+            total = sum(self.consumed_by_class.values())
+            report = {}
+
+            for budget_class in sorted(set(self.weights) | set(self.consumed_by_class)):
+                consumed = self.consumed_by_class.get(budget_class, 0)
+                fair_share = self.weights.get(budget_class, 0) / total_weight
+                report[budget_class] = {
+                    'weight': self.weights.get(budget_class, 0),
+                    'requests': consumed,
+                    'share': round(consumed / total, 3) if total else 0.0,
+                    'fair_share': round(fair_share, 3),
+                    'borrowed': max(round(consumed - fair_share * total), 0),
+                    'average_wait': round(self.wait_by_class.get(budget_class, 0.0) / consumed, 2) if consumed else None,
+                    'waiting': len(self.waiting_by_class.get(budget_class, []))
+                }
+
+            return report
+
+
+@contextmanager
+def use_budget(budget):
+    """
+    Make scraper requests on the current thread draw from a budget instead
+    of the scraper's fixed REQUEST_DELAY
+
+    Args:
+        budget (RateBudget): Budget to use
+    """
+    previous = getattr(_local, 'budget', None)
+    _local.budget = budget
+    try:
+        yield budget
+    finally:
+        _local.budget = previous
+
+
+def get_current_budget():
+    """
+    Get the budget active on the current thread
+
+    Returns:
+        RateBudget: Active budget, or None if the scraper default applies
+    """
+    return getattr(_local, 'budget', None)
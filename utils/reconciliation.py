@@ -0,0 +1,352 @@
+import logging
+import re
+import unicodedata
+from datetime import datetime, timedelta
+from app import db
+from models import Match, Team, MatchSourceLink, MapStatistic
+
+# Setup logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# Two listings of the same team pair starting within this window are the same match
+MATCH_TIME_WINDOW = timedelta(hours=3)
+
+# Relative cost of a detail fetch per source; the cheaper source wins ties
+SOURCE_COST = {
+    'bo3': 1,  # JSON API
+    'vlr': 2  # Full HTML page
+}
+
+# Sources whose match IDs are used as canonical match IDs
+CANONICAL_SOURCE = 'vlr'
+
+# How far a match has progressed per status; a more advanced listing is fresher
+STATUS_RANK = {
+    'upcoming': 0,
+    'live': 1,
+    'completed': 2
+}
+
+# Words that do not identify a team
+TEAM_NAME_NOISE = {'team', 'esports', 'esport', 'gaming', 'club', 'gg', 'the'}
+
+# Short names and alternative spellings, keyed by normalized alias
+TEAM_ALIASES = {
+    'sen': 'sentinels',
+    '100t': '100 thieves',
+    'eg': 'evil geniuses',
+    'c9': 'cloud9',
+    'cloud 9': 'cloud9',
+    'fnc': 'fnatic',
+    'prx': 'paper rex',
+    'th': 'heretics',
+    'tl': 'liquid',
+    'navi': 'natus vincere',
+    'na vi': 'natus vincere',
+    'kc': 'karmine corp',
+    'geng': 'gen g',
+    'lev': 'leviatan',
+    'edg': 'edward',
+    'zeta': 'zeta division',
+    'dfm': 'detonation focusme',
+    'tln': 'talon',
+    'gx': 'giantx',
+    'giants': 'giantx'
+}
+
+
+def normalize_team_name(name):
+    """
+    Normalize a team name so spellings from different sources compare equal
+
+    Args:
+        name (str): Team name as scraped
+
+    Returns:
+        str: Normalized name
+    """
+    if not name:
+        return ''
+
+    # Strip accents, punctuation and case
+    name = unicodedata.normalize('NFKD', name)
+    name = ''.join(char for char in name if not unicodedata.combining(char)).lower()
+    name = re.sub(r'[^a-z0-9]+', ' ', name).strip()
+
+    if name in TEAM_ALIASES:
+        return TEAM_ALIASES[name]
+
+    words = [word for word in name.split() if word not in TEAM_NAME_NOISE]
+    name = ' '.join(words) or name
+
+    return TEAM_ALIASES.get(name, name)
+
+
+def get_team_key(team1_name, team2_name):
+    """
+    Get an order-independent key for a team pair
+
+    Returns:
+        frozenset: Normalized team names
+    """
+    return frozenset((normalize_team_name(team1_name), normalize_team_name(team2_name)))
+
+
+class MatchIndex:
+    """
+    Lookup of listed matches by team pair and start time window
+    """
+
+    def __init__(self, window=MATCH_TIME_WINDOW):
+        self.window = window
+        self.entries = {}
+
+    def add(self, team1_name, team2_name, date, value):
+        key = get_team_key(team1_name, team2_name)
+        self.entries.setdefault(key, []).append((date, value))
+
+    def find(self, team1_name, team2_name, date):
+        """
+        Find a match of the same teams starting within the time window.
+        Listings without a start time never match: the same two teams meet
+        again (rematches, later rounds), so a team pair alone is not enough.
+
+        Returns:
+            The stored value, or None
+        """
+        if date is None:
+            return None
+
+        key = get_team_key(team1_name, team2_name)
+
+        for entry_date, value in self.entries.get(key, []):
+            if entry_date is not None and abs(entry_date - date) <= self.window:
+                return value
+
+        return None
+
+
+class ReconciledMatch:
+    """
+    One real match seen by one or more sources
+    """
+
+    def __init__(self, source, listing):
+        self.listings = {source: listing}
+
+    def get_match_id(self, linked_ids):
+        """
+        Get the canonical match ID: an existing link, the canonical
+        source's ID, or a source-prefixed ID
+        """
+        for source, listing in self.listings.items():
+            linked_id = linked_ids.get((source, str(listing['id'])))
+            if linked_id:
+                return linked_id
+
+        if CANONICAL_SOURCE in self.listings:
+            return str(self.listings[CANONICAL_SOURCE]['id'])
+
+        source, listing = next(iter(self.listings.items()))
+        return f"{source}-{listing['id']}"
+
+    def choose_source(self, stored=False):
+        """
+        Pick the source to fetch details from: the canonical source if the
+        match is already stored from it, else the one whose listing is
+        furthest along (freshest), then the cheapest
+
+        Args:
+            stored (bool): Whether the canonical match is already stored
+        """
+        # Other sources have no player stats; they must not replace a stored match's details
+        if stored and CANONICAL_SOURCE in self.listings:
+            return CANONICAL_SOURCE
+
+        return min(
+            self.listings,
+            key=lambda source: (
+                -STATUS_RANK.get(self.listings[source].get('status'), 0),
+                SOURCE_COST.get(source, 99)
+            )
+        )
+
+
+def reconcile_listings(listings_by_source):
+    """
+    Group listings from several sources into canonical matches
+
+    Args:
+        listings_by_source (dict): Mapping of source name to listing dictionaries
+
+    Returns:
+        list: Fetch plan dictionaries with source, source_id, match_id and links
+    """
+    linked_ids = {}
+    for source, listings in listings_by_source.items():
+        source_ids = [str(listing['id']) for listing in listings if listing.get('id')]
+        if source_ids:
+            for link in MatchSourceLink.query.filter(MatchSourceLink.source == source, MatchSourceLink.source_id.in_(source_ids)).all():
+                linked_ids[(link.source, link.source_id)] = link.match_id
+
+    # Known start times help matching listings that only show a time of day.
+    # Source IDs are resolved to stored matches through their links; only the
+    # canonical source's IDs are match IDs themselves (the sources' ID spaces overlap)
+    stored_ids = {}
+    for source, listings in listings_by_source.items():
+        for listing in listings:
+            if not listing.get('id'):
+                continue
+            source_id = str(listing['id'])
+            match_id = linked_ids.get((source, source_id)) or (source_id if source == CANONICAL_SOURCE else None)
+            if match_id:
+                stored_ids[(source, source_id)] = match_id
+
+    match_ids = set(stored_ids.values())
+    match_dates = dict(db.session.query(Match.id, Match.date).filter(Match.id.in_(match_ids)).all()) if match_ids else {}
+    known_dates = {key: match_dates.get(match_id) for key, match_id in stored_ids.items()}
+
+    index = MatchIndex()
+    groups = []
+
+    # Sources are visited by cost so the cheapest listing seeds each group
+    for source in sorted(listings_by_source, key=lambda name: SOURCE_COST.get(name, 99)):
+        for listing in listings_by_source[source]:
+            if not listing.get('id'):
+                continue
+
+            if not isinstance(listing.get('date'), datetime):
+                listing['date'] = known_dates.get((source, str(listing['id'])))
+
+            group = index.find(listing.get('team1_name'), listing.get('team2_name'), listing.get('date'))
+
+            if group and source not in group.listings:
+                group.listings[source] = listing
+                continue
+
+            group = ReconciledMatch(source, listing)
+            groups.append(group)
+            index.add(listing.get('team1_name'), listing.get('team2_name'), listing.get('date'), group)
+
+    plan = []
+    for group in groups:
+        match_id = group.get_match_id(linked_ids)
+        source = group.choose_source(stored=match_id in match_dates)
+        plan.append({
+            'source': source,
+            'source_id': str(group.listings[source]['id']),
+            'slug': group.listings[source].get('slug'),
+            'match_id': match_id,
+            'links': [(name, str(listing['id'])) for name, listing in group.listings.items()]
+        })
+
+    skipped = sum(len(item['links']) - 1 for item in plan)
+    logger.info(f"Reconciled listings into {len(plan)} matches, skipping {skipped} duplicate fetches")
+    return plan
+
+
+def canonicalize_match(match_details, match_id, source):
+    """
+    Rewrite source match details to the canonical match and team IDs
+
+    Args:
+        match_details (dict): Match details from a source scraper
+        match_id (str): Canonical match ID
+        source (str): Source the details came from
+
+    Returns:
+        dict: The updated match details
+    """
+    match_details['id'] = match_id
+
+    if source == CANONICAL_SOURCE:
+        return match_details
+
+    # Map teams onto existing teams by normalized name
+    for side in ('team1', 'team2'):
+        name = match_details.get(f'{side}_name')
+        if not name:
+            continue
+
+        team_id = find_team_id(name)
+        match_details[f'{side}_id'] = team_id or f"{source}-{match_details.get(f'{side}_id') or normalize_team_name(name).replace(' ', '-')}"
+
+    # A stored match keeps what the canonical source knows about it; the
+    # other source only updates its progress (status, score, start time)
+    stored = Match.query.filter_by(id=match_id).first()
+    if stored:
+        if stored.match_url:
+            match_details['match_url'] = stored.match_url
+        for side in ('team1', 'team2'):
+            stored_team_id = getattr(stored, f'{side}_id')
+            if stored_team_id and not is_source_team_id(stored_team_id):
+                match_details[f'{side}_id'] = stored_team_id
+        if MapStatistic.query.filter_by(match_id=match_id).first():
+            match_details.pop('maps', None)
+
+    return match_details
+
+
+def is_source_team_id(team_id):
+    """
+    Check whether a team ID was made up from another source's listing; such
+    teams have no VLR page to refresh
+
+    Args:
+        team_id (str): Team ID
+
+    Returns:
+        bool: True for a source-prefixed team ID
+    """
+    return any(str(team_id or '').startswith(f"{source}-") for source in SOURCE_COST if source != CANONICAL_SOURCE)
+
+
+def find_team_id(name):
+    """
+    Find a stored team by normalized name
+
+    Args:
+        name (str): Team name
+
+    Returns:
+        str: Team ID, or None if no team matches
+    """
+    normalized = normalize_team_name(name)
+    if not normalized:
+        return None
+
+    first_word = normalized.split()[0]
+    candidates = Team.query.with_entities(Team.id, Team.name).filter(Team.name.ilike(f"%{first_word}%")).all()
+
+    for team_id, team_name in candidates:
+        if normalize_team_name(team_name) == normalized:
+            return team_id
+
+    return None
+
+
+def record_source_links(match_id, links):
+    """
+    Remember which source IDs belong to a canonical match
+
+    Args:
+        match_id (str): Canonical match ID
+        links (list): (source, source_id) tuples
+    """
+    try:
+        now = datetime.utcnow()
+
+        for source, source_id in links:
+            link = MatchSourceLink.query.filter_by(source=source, source_id=source_id).first()
+            if not link:
+                link = MatchSourceLink(source=source, source_id=source_id)
+            link.match_id = match_id
+            link.last_seen = now
+            db.session.add(link)
+
+        db.session.commit()
+
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error in record_source_links: {str(e)}")
@@ -0,0 +1,662 @@
+import logging
+import json
+import os
+import socket
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from app import db
+from models import ScrapeJob, Team
+from scrapers.fetch_state import clear_last_fetch
+from utils.run_metrics import get_current_run
+from utils.schedule_config import (  # noqa: F401
+    PRIORITY_LIVE, PRIORITY_ON_DEMAND, PRIORITY_READS, PRIORITY_MATCHES, PRIORITY_EVENTS,
+    PRIORITY_RETRIES, PRIORITY_ROSTERS, PRIORITY_PLAYERS, PRIORITY_BUDGET_CLASSES
+)
+
+# Setup logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# Kinds clients may request through POST /api/refresh/{kind}/{id}
+API_JOB_KINDS = ('team', 'match', 'event', 'player')
+
+# Kinds queued internally by stale reads (see utils.background_refresh)
+INTERNAL_JOB_KINDS = ('events', 'search_teams', 'search_players')
+
+# Statuses of jobs that are not finished yet
+ACTIVE_JOB_STATUSES = ('queued', 'running')
+
+# Per-client quotas: jobs created per hour and unfinished jobs at a time
+JOB_QUOTA_PER_HOUR = 30
+JOB_QUOTA_ACTIVE = 5
+
+# Separate, larger quotas for refreshes queued by a client's stale reads, so
+# browsing stale pages never uses up the client's explicit refreshes
+READ_JOB_QUOTA_PER_HOUR = 120
+READ_JOB_QUOTA_ACTIVE = 20
+
+# How often an idle job worker checks for new jobs (in seconds)
+JOB_POLL_INTERVAL = 2
+
+# A running job whose worker has not finished it by then is requeued (in seconds)
+JOB_LEASE_SECONDS = 900
+
+# Attempts per job; the delay before a retry doubles every attempt (in seconds)
+JOB_MAX_ATTEMPTS = 3
+JOB_RETRY_BASE_DELAY = 60
+
+# Queued jobs looked at per claim when SKIP LOCKED is not available
+JOB_CLAIM_CANDIDATES = 5
+
+
+def get_worker_id():
+    """
+    Identify the current worker thread in job leases
+    """
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+
+
+def get_dedup_key(kind, target_id, params=None):
+    """
+    Get the key shared by identical jobs; match IDs are only unique per source
+    """
+    if kind == 'match':
+        return f"match:{(params or {}).get('source', 'vlr')}:{target_id}"
+    return f"{kind}:{target_id}" if target_id is not None else kind
+
+
+def find_active_job(kind, target_id, dedup_key=None):
+    """
+    Find an unfinished job for the same target
+
+    Returns:
+        ScrapeJob: The queued or running job, or None
+    """
+    return ScrapeJob.query.filter(
+        ScrapeJob.dedup_key == (dedup_key or get_dedup_key(kind, target_id)),
+        ScrapeJob.status.in_(ACTIVE_JOB_STATUSES)
+    ).order_by(ScrapeJob.id.asc()).first()
+
+
+def check_job_quota(client, origin='api', now=None):
+    """
+    Check whether a client may create another job. Explicit and read-triggered
+    jobs are counted against separate quotas
+
+    Args:
+        client (str): Client address
+        origin (str): api for POST /api/refresh, read for refreshes queued by reads
+        now (datetime, optional): Current time
+
+    Returns:
+        str: Reason the quota is exceeded, or None if the job is allowed
+    """
+    now = now or datetime.utcnow()
+
+    if origin == 'read':
+        quota_active, quota_per_hour = READ_JOB_QUOTA_ACTIVE, READ_JOB_QUOTA_PER_HOUR
+        same_origin = ScrapeJob.origin == 'read'
+    else:
+        quota_active, quota_per_hour = JOB_QUOTA_ACTIVE, JOB_QUOTA_PER_HOUR
+        same_origin = or_(ScrapeJob.origin.is_(None), ScrapeJob.origin != 'read')
+
+    client_jobs = ScrapeJob.query.filter(ScrapeJob.client == client, same_origin)
+
+    active = client_jobs.filter(ScrapeJob.status.in_(ACTIVE_JOB_STATUSES)).count()
+    if active >= quota_active:
+        return f"At most {quota_active} unfinished refresh jobs per client"
+
+    recent = client_jobs.filter(ScrapeJob.created_at > now - timedelta(hours=1)).count()
+    if recent >= quota_per_hour:
+        return f"At most {quota_per_hour} refresh jobs per hour per client"
+
+    return None
+
+
+def get_job_params(job):
+    return json.loads(job.params) if job.params else {}
+
+
+def merge_job(job, priority, params):
+    """
+    Fold a duplicate request into a queued job: keep the more urgent
+    priority and add the new parameters
+    """
+    if job.status != 'queued':
+        return
+
+    changed = False
+    if priority is not None and (job.priority is None or priority < job.priority):
+        job.priority = priority
+        changed = True
+
+    if params:
+        current = get_job_params(job)
+        # Flags only widen a job (e.g. a roster job that now also refreshes players)
+        merged = dict(current, **{key: value for key, value in params.items() if value or key not in current})
+        if merged != current:
+            job.params = json.dumps(merged)
+            changed = True
+
+    if changed:
+        db.session.add(job)
+        db.session.commit()
+
+
+def create_job(kind, target_id=None, client=None, priority=PRIORITY_READS, params=None, dedup_key=None, origin=None):
+    """
+    Queue a job, reusing an identical unfinished job if there is one
+
+    Args:
+        kind (str): Job kind
+        target_id (str, optional): Entity ID or search query
+        client (str, optional): Client address, for quotas
+        priority (int): Job priority, lower runs first
+        params (dict, optional): Extra parameters for the job handler
+        dedup_key (str, optional): Key shared by identical jobs; kind and target by default
+        origin (str, optional): api or read for jobs requested by a client, for quotas
+
+    Returns:
+        tuple: (ScrapeJob, created) where created is False for a deduplicated job
+    """
+    dedup_key = dedup_key or get_dedup_key(kind, target_id, params)
+
+    job = find_active_job(kind, target_id, dedup_key)
+    if job:
+        merge_job(job, priority, params)
+        return job, False
+
+    job = ScrapeJob(kind=kind, target_id=target_id, client=client, origin=origin, status='queued', priority=priority,
+                    params=json.dumps(params) if params else None, dedup_key=dedup_key,
+                    attempts=0, max_attempts=JOB_MAX_ATTEMPTS, created_at=datetime.utcnow())
+    db.session.add(job)
+
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another producer queued the same job between the lookup and the insert
+        db.session.rollback()
+        job = find_active_job(kind, target_id, dedup_key)
+        if job:
+            merge_job(job, priority, params)
+            return job, False
+        raise
+
+    logger.info(f"Queued {kind} job {job.id} for {target_id} (priority {priority})")
+    return job, True
+
+
+def get_recently_succeeded_keys(dedup_keys, window, now=None):
+    """
+    Find which of the given jobs succeeded within a time window
+
+    Args:
+        dedup_keys (list): Dedup keys to check
+        window (int): Window in seconds
+        now (datetime, optional): Current time
+
+    Returns:
+        set: Dedup keys with a job that succeeded within the window
+    """
+    if not dedup_keys:
+        return set()
+
+    now = now or datetime.utcnow()
+    rows = db.session.query(ScrapeJob.dedup_key).filter(
+        ScrapeJob.dedup_key.in_(dedup_keys),
+        ScrapeJob.status == 'succeeded',
+        ScrapeJob.finished_at > now - timedelta(seconds=window)
+    ).distinct().all()
+    return {dedup_key for (dedup_key,) in rows}
+
+
+def get_job(job_id):
+    return ScrapeJob.query.filter_by(id=job_id).first()
+
+
+def get_claimable_jobs(now):
+    return ScrapeJob.query.filter(
+        ScrapeJob.status == 'queued',
+        or_(ScrapeJob.run_after == None, ScrapeJob.run_after <= now)  # noqa: E711
+    ).order_by(ScrapeJob.priority.asc(), ScrapeJob.id.asc())
+
+
+def claim_next_job(worker=None):
+    """
+    Lease the most urgent queued job to a worker
+
+    On PostgreSQL the job row is locked with SELECT ... FOR UPDATE SKIP LOCKED,
+    so concurrent workers never wait for or take the same job. Elsewhere a few
+    candidates are tried with a conditional update on their status.
+
+    Args:
+        worker (str, optional): Worker ID recorded as the lease owner
+
+    Returns:
+        ScrapeJob: The claimed job, or None if nothing is queued
+    """
+    try:
+        worker = worker or get_worker_id()
+        now = datetime.utcnow()
+        lease = {
+            'status': 'running',
+            'started_at': now,
+            'lease_owner': worker,
+            'lease_expires_at': now + timedelta(seconds=JOB_LEASE_SECONDS)
+        }
+
+        if db.engine.dialect.name == 'postgresql':
+            job = get_claimable_jobs(now).with_for_update(skip_locked=True).first()
+            if not job:
+                db.session.rollback()
+                return None
+
+            for key, value in lease.items():
+                setattr(job, key, value)
+            job.attempts = (job.attempts or 0) + 1
+            db.session.commit()
+            return job
+
+        for job_id, attempts in get_claimable_jobs(now).with_entities(ScrapeJob.id, ScrapeJob.attempts).limit(JOB_CLAIM_CANDIDATES).all():
+            # Only the worker whose update changes the status owns the job
+            claimed = ScrapeJob.query.filter_by(id=job_id, status='queued').update(
+                dict(lease, attempts=(attempts or 0) + 1), synchronize_session=False
+            )
+            db.session.commit()
+
+            if claimed:
+                return get_job(job_id)
+
+        return None
+
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error in claim_next_job: {str(e)}")
+        return None
+
+
+def requeue_expired_jobs(now=None):
+    """
+    Requeue running jobs whose lease expired (their worker died or hung);
+    jobs out of attempts are failed instead
+
+    Returns:
+        int: Number of jobs requeued or failed
+    """
+    try:
+        now = now or datetime.utcnow()
+        expired = ScrapeJob.query.filter(ScrapeJob.status == 'running', ScrapeJob.lease_expires_at < now).all()
+
+        for job in expired:
+            logger.warning(f"Lease of {job.kind} job {job.id} held by {job.lease_owner} expired")
+            job.error = f"Lease held by {job.lease_owner} expired"
+            job.lease_owner = None
+            job.lease_expires_at = None
+
+            if (job.attempts or 0) >= (job.max_attempts or JOB_MAX_ATTEMPTS):
+                job.status = 'failed'
+                job.finished_at = now
+            else:
+                job.status = 'queued'
+
+        db.session.commit()
+        return len(expired)
+
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error in requeue_expired_jobs: {str(e)}")
+        return 0
+
+
+def get_match_source(job):
+    """
+    Get the source and source ID a match job fetches from
+    """
+    params = get_job_params(job)
+    return params.get('source', 'vlr'), job.target_id
+
+
+def fetch_team(job):
+    from scrapers import vlr_scraper, player_scraper
+    from utils.negative_cache import get_miss_state
+
+    team_details = vlr_scraper.get_team_details(job.target_id)
+
+    # A team known not to exist has no roster page either
+    if not team_details and get_miss_state('team', job.target_id) == 'active':
+        return None
+
+    # If no players or limited player info in team_details, try dedicated player scraper
+    if not team_details or len(team_details.get('players', [])) == 0:
+        logger.info(f"Using dedicated player scraper for team: {job.target_id}")
+        players = player_scraper.get_team_players(job.target_id)
+
+        if players:
+            if team_details:
+                team_details['players'] = players
+            else:
+                team = Team.query.filter_by(id=job.target_id).first()
+                if team:
+                    team_details = {
+                        'id': team.id,
+                        'name': team.name,
+                        'region': team.region,
+                        'logo_url': team.logo_url,
+                        'stats': json.loads(team.stats) if team.stats else {},
+                        'players': players
+                    }
+
+    return team_details
+
+
+def store_team(job, team_details):
+    from utils.db_operations import upsert_team
+    from utils.dead_letter import record_success
+
+    if not upsert_team(team_details):
+        return None
+    record_success('team', job.target_id)
+
+    # Player pages are separate jobs at the same priority
+    players = team_details.get('players', [])
+    if get_job_params(job).get('players'):
+        for player in players:
+            create_job('player', player['id'], priority=job.priority)
+
+    return {'team_id': job.target_id, 'players': len(players)}
+
+
+def fetch_match(job):
+    from scrapers import vlr_scraper, bo3_scraper
+
+    source, source_id = get_match_source(job)
+    if source == 'bo3':
+        # The slug travels with the job; the worker may never have seen the listing
+        return bo3_scraper.get_match_details(source_id, slug=get_job_params(job).get('slug'))
+    return vlr_scraper.get_match_details(source_id)
+
+
+def store_match(job, match_details):
+    from utils.db_operations import upsert_match
+    from utils.reconciliation import canonicalize_match, record_source_links
+    from utils.dead_letter import record_success
+
+    params = get_job_params(job)
+    source, source_id = get_match_source(job)
+
+    if params.get('match_id'):
+        match_details = canonicalize_match(match_details, params['match_id'], source)
+
+    match = upsert_match(match_details)
+    if not match:
+        return None
+
+    if params.get('links'):
+        record_source_links(match.id, params['links'])
+    record_success('match', source_id, source)
+
+    return {'match_id': match.id, 'status': match_details.get('status')}
+
+
+def fetch_player(job):
+    from scrapers import player_scraper
+
+    return player_scraper.get_player_details(job.target_id)
+
+
+def store_player(job, player_details):
+    from utils.db_operations import upsert_player
+    from utils.dead_letter import record_success
+
+    if not upsert_player(player_details):
+        return None
+    record_success('player', job.target_id)
+    return {'player_id': job.target_id}
+
+
+def fetch_event(job):
+    from scrapers import vlr_scraper
+
+    return vlr_scraper.get_event_details(job.target_id)
+
+
+def store_event(job, event_data):
+    from utils.db_operations import upsert_event, link_matches_to_event
+
+    if not upsert_event(event_data):
+        return None
+    link_matches_to_event(job.target_id, event_data.get('matches', []))
+    return {'event_id': job.target_id, 'matches': len(event_data.get('matches', []))}
+
+
+def fetch_events(job):
+    from scrapers import vlr_scraper
+
+    return vlr_scraper.get_events(limit=50)
+
+
+def store_events(job, events):
+    from utils.db_operations import upsert_event
+
+    return {'events': sum(1 for event_data in events if upsert_event(event_data))}
+
+
+def fetch_team_search(job):
+    from scrapers import vlr_scraper
+    from utils.search_cache import cached_search, SEARCH_JOB_LIMIT
+
+    return cached_search('teams', job.target_id, vlr_scraper.search_teams, limit=SEARCH_JOB_LIMIT)
+
+
+def store_team_search(job, teams):
+    from utils.search_cache import persist_team_results
+
+    # The results are kept with the job for the web process (see get_stored_search)
+    return {'added': persist_team_results(teams), 'results': teams}
+
+
+def fetch_player_search(job):
+    from scrapers import player_scraper
+    from utils.search_cache import cached_search, SEARCH_JOB_LIMIT
+
+    return cached_search('players', job.target_id, player_scraper.search_players, limit=SEARCH_JOB_LIMIT)
+
+
+def store_player_search(job, players):
+    from utils.search_cache import persist_player_results
+
+    return {'added': persist_player_results(players), 'results': players}
+
+
+# Fetch and store step of every job kind. Fetching only talks to the source
+# site and returns a payload; storing only writes it to the database.
+JOB_HANDLERS = {
+    'team': (fetch_team, store_team),
+    'match': (fetch_match, store_match),
+    'player': (fetch_player, store_player),
+    'event': (fetch_event, store_event),
+    'events': (fetch_events, store_events),
+    'search_teams': (fetch_team_search, store_team_search),
+    'search_players': (fetch_player_search, store_player_search)
+}
+
+# Kinds whose failures are recorded in the dead-letter table
+DEAD_LETTER_JOB_KINDS = ('team', 'match', 'player')
+
+
+def record_job_failure(job, stage=None, error=None, fetch=None):
+    """
+    Record a failed entity job in the dead-letter table, which schedules
+    its next attempt; pages known to be missing are not failures. The fetch
+    outcome of a job stored on another thread than it was fetched on is
+    passed in, as that thread's last request is not the job's.
+    """
+    from utils.dead_letter import record_failure
+    from utils.negative_cache import get_miss_state
+
+    if job.kind not in DEAD_LETTER_JOB_KINDS:
+        return
+
+    if job.kind == 'match':
+        source, source_id = get_match_source(job)
+        record_failure('match', source_id, source, stage=stage, error=error, fetch=fetch)
+    elif get_miss_state(job.kind, job.target_id) != 'active':
+        record_failure(job.kind, job.target_id, stage=stage, error=error, fetch=fetch)
+
+
+def finish_job(job, **values):
+    """
+    Finish a job unless its lease was lost to another worker in the meantime
+
+    Returns:
+        bool: True if the job was updated
+    """
+    updated = ScrapeJob.query.filter_by(id=job.id, status='running', lease_owner=job.lease_owner).update(
+        dict(values, lease_owner=None, lease_expires_at=None), synchronize_session=False
+    )
+    db.session.commit()
+
+    if not updated:
+        logger.warning(f"{job.kind} job {job.id} lost its lease before finishing")
+    return bool(updated)
+
+
+def handle_job_error(job, error, fetch=None):
+    """
+    Retry a job that raised with a growing delay, or fail it once it is
+    out of attempts. The exception also fails the run recording its metrics.
+    """
+    db.session.rollback()
+    logger.error(f"{job.kind} job {job.id} ({job.target_id}) raised: {str(error)}")
+
+    run = get_current_run()
+    if run:
+        run.fail(str(error))
+
+    if (job.attempts or 0) < (job.max_attempts or JOB_MAX_ATTEMPTS):
+        delay = JOB_RETRY_BASE_DELAY * 2 ** max((job.attempts or 1) - 1, 0)
+        finish_job(job, status='queued', error=str(error), run_after=datetime.utcnow() + timedelta(seconds=delay))
+    else:
+        record_job_failure(job, error=error, fetch=fetch)
+        finish_job(job, status='failed', error=str(error), finished_at=datetime.utcnow())
+
+
+def fetch_job(job):
+    """
+    Run the fetch step of a claimed job
+
+    Args:
+        job (ScrapeJob): Job in running state
+
+    Returns:
+        tuple: (fetched, payload); the job is already finished when fetched is False
+    """
+    handler = JOB_HANDLERS.get(job.kind)
+    if not handler:
+        finish_job(job, status='failed', error=f"Unknown job kind: {job.kind}", finished_at=datetime.utcnow())
+        return False, None
+
+    # A failure is filed with this job's request, not the thread's previous one
+    clear_last_fetch()
+
+    try:
+        payload = handler[0](job)
+    except Exception as e:
+        handle_job_error(job, e)
+        return False, None
+
+    # An empty listing is a result; a missing page is not
+    if not payload and payload != []:
+        record_job_failure(job)
+        finish_job(job, status='failed', error=f"Could not fetch {job.kind} {job.target_id}", finished_at=datetime.utcnow())
+        logger.error(f"{job.kind} job {job.id} ({job.target_id}) failed: nothing fetched")
+        return False, None
+
+    return True, payload
+
+
+def store_job(job, payload, fetch=None):
+    """
+    Run the store step of a job and record its outcome
+
+    Args:
+        job (ScrapeJob): Job in running state
+        payload: What the fetch step returned
+        fetch (dict, optional): Outcome of the job's request from
+            get_last_fetch(), when the job was fetched on another thread
+
+    Returns:
+        bool: True if the job succeeded
+    """
+    try:
+        result = JOB_HANDLERS[job.kind][1](job, payload)
+        if result is None:
+            record_job_failure(job, stage='store', fetch=fetch)
+            finish_job(job, status='failed', error=f"Could not store {job.kind} {job.target_id}", finished_at=datetime.utcnow())
+            logger.error(f"{job.kind} job {job.id} ({job.target_id}) failed: could not store")
+            return False
+
+        finish_job(job, status='succeeded', result=json.dumps(result), error=None, finished_at=datetime.utcnow())
+        logger.info(f"{job.kind} job {job.id} ({job.target_id}) succeeded")
+        return True
+
+    except Exception as e:
+        handle_job_error(job, e, fetch=fetch)
+        return False
+
+
+def run_job(job):
+    """
+    Run a claimed job and record its outcome
+
+    A job whose page could not be fetched, parsed or stored fails at once;
+    the dead-letter table decides when the item is tried again. A job that
+    raised is retried with a growing delay until it is out of attempts.
+
+    Args:
+        job (ScrapeJob): Job in running state
+
+    Returns:
+        bool: True if the job succeeded
+    """
+    fetched, payload = fetch_job(job)
+    if not fetched:
+        return False
+    return store_job(job, payload)
+
+
+def process_jobs(max_jobs=None, budget=None, worker=None):
+    """
+    Run queued jobs until the queue is empty
+
+    Args:
+        max_jobs (int, optional): Maximum number of jobs to run
+        budget (PriorityRateBudget, optional): Rate budget the jobs' requests
+            are drawn from, at each job's priority
+        worker (str, optional): Worker ID recorded as the lease owner
+
+    Returns:
+        int: Number of jobs run
+    """
+    from utils.rate_budget import use_budget
+    from utils.job_metrics import track_run
+
+    count = 0
+
+    while max_jobs is None or count < max_jobs:
+        job = claim_next_job(worker)
+        if not job:
+            break
+
+        with track_run(job.kind, 'queue', job.id):
+            if budget is not None:
+                with use_budget(budget.share(job.kind, job.priority)):
+                    run_job(job)
+            else:
+                run_job(job)
+        count += 1
+
+    return count
+
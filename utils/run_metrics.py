@@ -0,0 +1,145 @@
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Per-run counters; times are in seconds
+JOB_RUN_COUNTERS = ('pages_fetched', 'bytes_fetched', 'cache_hits', 'fetch_time', 'parse_time',
+                    'db_write_time', 'rows_changed', 'errors')
+
+# Statements counted as database writes
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE')
+
+# Run collecting metrics on each thread
+_state = threading.local()
+
+
+class RunMetrics:
+    """
+    Counters of one job run.
+
+    A run can span threads: batch fetches run on a thread pool, and a queued
+    job fetched on a fetch worker is handed to the writer with its page.
+    Only time spent on the run's own thread(s) counts towards its duration.
+    """
+
+    def __init__(self, job_name, run_type='scheduled', scrape_job_id=None):
+        self.job_name = job_name
+        self.run_type = run_type
+        self.scrape_job_id = scrape_job_id
+        self.started_at = datetime.utcnow()
+        self.elapsed = 0.0
+        self.error = None
+        self.counters = dict.fromkeys(JOB_RUN_COUNTERS, 0)
+        self.lock = threading.Lock()
+        # Set when the run is passed to another thread, which saves it
+        self.handed_off = False
+
+    def add(self, name, value=1):
+        with self.lock:
+            self.counters[name] += value
+
+    def fail(self, error):
+        """
+        Mark the run failed
+
+        Args:
+            error (str): Error the run failed with
+        """
+        self.error = error
+        self.add('errors')
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.counters)
+
+
+def get_current_run():
+    """
+    Get the run collecting metrics on the current thread
+
+    Returns:
+        RunMetrics: Current run, or None outside a tracked run
+    """
+    return getattr(_state, 'run', None)
+
+
+@contextmanager
+def use_run(run):
+    """
+    Count what the current thread does in the block towards a run
+
+    Args:
+        run (RunMetrics): Run to collect into; None collects nothing
+    """
+    previous = get_current_run()
+    _state.run = run
+    try:
+        yield run
+    finally:
+        _state.run = previous
+
+
+def count(name, value=1):
+    """
+    Add to a counter of the current thread's run, if any
+
+    Args:
+        name (str): Counter name from JOB_RUN_COUNTERS
+        value (int/float): Amount to add
+    """
+    run = get_current_run()
+    if run:
+        run.add(name, value)
+
+
+def record_page(size, seconds):
+    """
+    Count a fetched page towards the current thread's run
+
+    Args:
+        size (int): Response body size in bytes
+        seconds (float): Time the request took
+    """
+    run = get_current_run()
+    if run:
+        run.add('pages_fetched')
+        run.add('bytes_fetched', size)
+        run.add('fetch_time', seconds)
+
+
+@contextmanager
+def timed(name):
+    """
+    Add the time spent in the block to a counter of the current thread's run
+
+    Args:
+        name (str): Time counter, e.g. parse_time
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        count(name, time.perf_counter() - started)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if get_current_run():
+        conn.info.setdefault('run_metrics_started', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('run_metrics_started')
+    if not started:
+        return
+
+    elapsed = time.perf_counter() - started.pop()
+    run = get_current_run()
+    if run and statement.lstrip()[:6].upper() in WRITE_STATEMENTS:
+        run.add('db_write_time', elapsed)
+        if cursor.rowcount and cursor.rowcount > 0:
+            run.add('rows_changed', cursor.rowcount)
@@ -0,0 +1,55 @@
+# Scheduling constants shared by the scheduler, the job queue and the
+# scheduler simulation. This module imports nothing, so the simulator can
+# read the production policy without loading the app, scrapers or database.
+
+# Scheduling parameters
+MATCH_UPDATE_INTERVAL = 300  # Update matches every 5 minutes (in seconds)
+COMPREHENSIVE_MATCH_UPDATE_INTERVAL = 1800  # Update more matches every 30 minutes (in seconds)
+TEAM_UPDATE_INTERVAL = 14400  # Update teams every 4 hours (in seconds)
+EVENT_UPDATE_INTERVAL = 1800  # Crawl events every 30 minutes; per-status freshness is in utils.event_crawler
+DEAD_LETTER_RETRY_INTERVAL = 300  # Retry failed scrapes every 5 minutes; per-item backoff is in utils.dead_letter
+JOB_LEASE_CHECK_INTERVAL = 60  # Requeue jobs of dead workers every minute
+JOB_RUN_PRUNE_INTERVAL = 86400  # Delete old job run history once a day; retention is in utils.job_metrics
+
+# Matches queued by the quick (live) and comprehensive match passes
+LIVE_MATCH_LIMIT = 10
+COMPREHENSIVE_MATCH_LIMIT = 50
+
+# Listings are always fetched at the size of the comprehensive pass: it is the
+# same single request either way, and the quick pass's result then covers both
+MATCH_LISTING_LIMIT = 50
+
+# How long a listing fetched by one match pass is reused by the other (in seconds)
+MATCH_LISTING_REUSE_WINDOW = 120
+
+# Matches whose job succeeded this recently are not queued again by the other pass (in seconds)
+MATCH_DETAIL_REUSE_WINDOW = 120
+
+# Number of threads running queued scrape jobs
+JOB_WORKERS = 3
+
+# Job priorities, also used on the shared rate budget (lower is served first)
+PRIORITY_LIVE = 0
+PRIORITY_ON_DEMAND = 1
+PRIORITY_READS = 2
+PRIORITY_MATCHES = 3
+PRIORITY_EVENTS = 4
+PRIORITY_RETRIES = 5
+PRIORITY_ROSTERS = 6
+PRIORITY_PLAYERS = 7
+PRIORITY_BACKFILL = 8
+
+# Budget class (see utils.rate_budget.BUDGET_CLASS_WEIGHTS) of every priority.
+# Refreshes requested through POST /api/refresh are quota'd and served like
+# live work; refreshes queued by stale reads get a share but never preempt.
+PRIORITY_BUDGET_CLASSES = {
+    PRIORITY_LIVE: 'live',
+    PRIORITY_ON_DEMAND: 'live',
+    PRIORITY_READS: 'reads',
+    PRIORITY_MATCHES: 'upcoming',
+    PRIORITY_EVENTS: 'events',
+    PRIORITY_RETRIES: 'retries',
+    PRIORITY_ROSTERS: 'rosters',
+    PRIORITY_PLAYERS: 'players',
+    PRIORITY_BACKFILL: 'backfill'
+}
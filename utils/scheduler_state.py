@@ -0,0 +1,103 @@
+import logging
+from datetime import datetime, timedelta
+from app import db
+from models import SchedulerJobState
+
+# Setup logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+
+def get_next_run(name, interval, now=None):
+    """
+    Get when a scheduled job is next due, from the start time of its last run
+    (by any scheduler process), so a restarted scheduler only runs what is due
+
+    Args:
+        name (str): Scheduled job name
+        interval (int): Job interval in seconds
+        now (datetime, optional): Current time
+
+    Returns:
+        datetime: When the job should run next; now if it never ran
+    """
+    now = now or datetime.utcnow()
+
+    try:
+        state = SchedulerJobState.query.filter_by(name=name).first()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error loading state of scheduled job {name}: {str(e)}")
+        return now
+
+    if not state or not state.last_started_at:
+        return now
+
+    return max(state.last_started_at + timedelta(seconds=interval), now)
+
+
+def record_job_start(name, started_at, interval=None):
+    """
+    Persist the start of a run before doing any work, so a scheduler that
+    crashes mid-run does not start the job again right after restarting
+
+    Args:
+        name (str): Scheduled job name
+        started_at (datetime): When the run started
+        interval (int, optional): Job interval in seconds; records when the
+            next run is due, so other processes can tell the job is behind
+    """
+    try:
+        state = SchedulerJobState.query.filter_by(name=name).first()
+        if not state:
+            state = SchedulerJobState(name=name, runs=0, failures=0)
+
+        state.last_started_at = started_at
+        if interval is not None:
+            state.next_run_at = started_at + timedelta(seconds=interval)
+        db.session.add(state)
+        db.session.commit()
+
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error saving start of scheduled job {name}: {str(e)}")
+
+
+def record_job_finish(name, finished_at, duration, error=None):
+    """
+    Persist the outcome of a run
+
+    Args:
+        name (str): Scheduled job name
+        finished_at (datetime): When the run finished
+        duration (float): Run time in seconds
+        error (str, optional): Error the run failed with
+    """
+    try:
+        state = SchedulerJobState.query.filter_by(name=name).first()
+        if not state:
+            state = SchedulerJobState(name=name, runs=0, failures=0)
+
+        state.last_finished_at = finished_at
+        state.last_duration = duration
+        state.last_error = error
+        state.runs = (state.runs or 0) + 1
+        if error:
+            state.failures = (state.failures or 0) + 1
+
+        db.session.add(state)
+        db.session.commit()
+
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error saving run of scheduled job {name}: {str(e)}")
+
+
+def get_job_states():
+    """
+    Get the persisted state of every scheduled job
+
+    Returns:
+        dict: State dictionaries by job name
+    """
+    return {state.name: state.to_dict() for state in SchedulerJobState.query.all()}
@@ -1,80 +1,168 @@
 import logging
 import time
-from datetime import datetime
+from datetime import datetime, timedelta
 from threading import Thread
 from app import app
 from scrapers import vlr_scraper, bo3_scraper
 from utils.db_operations import scrape_and_update_recent_matches, update_teams_and_players
+from utils.event_crawler import update_events
+from utils.dead_letter import retry_due_failures
+from utils.refresh_jobs import requeue_expired_jobs
+from utils.schedule_config import (
+    MATCH_UPDATE_INTERVAL, COMPREHENSIVE_MATCH_UPDATE_INTERVAL, TEAM_UPDATE_INTERVAL, EVENT_UPDATE_INTERVAL,
+    DEAD_LETTER_RETRY_INTERVAL, JOB_LEASE_CHECK_INTERVAL, JOB_RUN_PRUNE_INTERVAL, LIVE_MATCH_LIMIT,
+    COMPREHENSIVE_MATCH_LIMIT, JOB_WORKERS, PRIORITY_BUDGET_CLASSES,
+    PRIORITY_LIVE, PRIORITY_MATCHES, PRIORITY_EVENTS, PRIORITY_RETRIES, PRIORITY_ROSTERS
+)
+from utils.rate_budget import BudgetAllocator, use_budget, SCHEDULER_REQUESTS_PER_MINUTE
+from utils.leader import is_leader, LEADER_RETRY_INTERVAL
+from utils.workers import start_workers
+from utils.scheduler_state import get_next_run, record_job_start, record_job_finish
+from utils.job_metrics import track_run, prune_job_runs
 
 # Setup logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-# Scheduling parameters
-MATCH_UPDATE_INTERVAL = 300  # Update matches every 5 minutes (in seconds)
-COMPREHENSIVE_MATCH_UPDATE_INTERVAL = 1800  # Update more matches every 30 minutes (in seconds)
-TEAM_UPDATE_INTERVAL = 14400  # Update teams every 4 hours (in seconds)
+# Rate budget shared by every scheduled job and the job workers, split into weighted class shares
+scheduler_budget = BudgetAllocator('scheduler', SCHEDULER_REQUESTS_PER_MINUTE, classes=PRIORITY_BUDGET_CLASSES, burst=2)
 
-def scheduler_thread():
+
+class ScheduledJob:
     """
-    Background thread for scheduled scraping
+    A periodic job with its own cadence, run on its own thread.
+
+    Run times are persisted, so a restarted scheduler (or a new leader)
+    waits out the rest of the interval instead of running every job at once.
     """
-    with app.app_context():
-        logger.info("Starting scheduler thread")
-        
-        last_match_update = 0
-        last_comprehensive_match_update = 0
-        last_team_update = 0
-        
-        while True:
-            current_time = time.time()
-            
-            # Quick update for live matches (every 5 minutes)
-            if current_time - last_match_update >= MATCH_UPDATE_INTERVAL:
-                logger.info("Running quick match update (focusing on live matches)")
-                try:
-                    # Only update a few recent matches for better responsiveness
-                    scrape_and_update_recent_matches(vlr_scraper, bo3_scraper, limit=10)
-                    last_match_update = current_time
-                except Exception as e:
-                    logger.error(f"Error in quick match update: {str(e)}")
-            
-            # More comprehensive match update (every 30 minutes)
-            if current_time - last_comprehensive_match_update >= COMPREHENSIVE_MATCH_UPDATE_INTERVAL:
-                logger.info("Running comprehensive match update")
-                try:
-                    # Update more matches in a comprehensive update
-                    scrape_and_update_recent_matches(vlr_scraper, bo3_scraper, limit=50)
-                    last_comprehensive_match_update = current_time
-                except Exception as e:
-                    logger.error(f"Error in comprehensive match update: {str(e)}")
-            
-            # Update teams and players (every 4 hours)
-            if current_time - last_team_update >= TEAM_UPDATE_INTERVAL:
-                logger.info("Running scheduled team update")
+
+    def __init__(self, name, interval, func, priority):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.priority = priority
+        self.last_run = None
+        self.last_duration = None
+        self.next_run = None
+        self.thread = None
+
+    def run_forever(self):
+        """
+        Run the job whenever it is due; a slow run delays only this job
+        """
+        with app.app_context(), use_budget(scheduler_budget.share(self.name, self.priority)):
+            logger.info(f"Starting scheduled job {self.name} (every {self.interval}s)")
+
+            while True:
+                # A process that lost leadership keeps its threads but stops scraping
+                if not is_leader():
+                    # Another leader may run the job meanwhile; reload its state when leading again
+                    self.next_run = None
+                    time.sleep(LEADER_RETRY_INTERVAL)
+                    continue
+
+                if self.next_run is None:
+                    self.next_run = get_next_run(self.name, self.interval)
+                    logger.info(f"Scheduled job {self.name} next due at {self.next_run:%Y-%m-%d %H:%M:%S}")
+
+                # Wait in steps so a lost leadership is noticed
+                wait = (self.next_run - datetime.utcnow()).total_seconds()
+                if wait > 0:
+                    time.sleep(min(wait, LEADER_RETRY_INTERVAL))
+                    continue
+
+                started = datetime.utcnow()
+                record_job_start(self.name, started, self.interval)
+                logger.info(f"Running scheduled job {self.name}")
+
+                error = None
                 try:
-                    update_teams_and_players()
-                    last_team_update = current_time
+                    with track_run(self.name):
+                        self.func()
                 except Exception as e:
-                    logger.error(f"Error in scheduled team update: {str(e)}")
-            
-            # Sleep for 30 seconds before checking again (more responsive)
-            time.sleep(30)
+                    error = str(e)
+                    logger.error(f"Error in scheduled job {self.name}: {error}")
+
+                self.last_run = started
+                self.last_duration = (datetime.utcnow() - started).total_seconds()
+                self.next_run = started + timedelta(seconds=self.interval)
+                record_job_finish(self.name, datetime.utcnow(), self.last_duration, error)
+                logger.info(f"Scheduled job {self.name} finished in {self.last_duration:.0f}s")
+
+    def start(self):
+        self.thread = Thread(target=self.run_forever, name=f"scheduler-{self.name}", daemon=True)
+        self.thread.start()
 
 
-def start_scheduler():
+SCHEDULED_JOBS = [
+    # Quick update focusing on live matches
+    ScheduledJob('live_matches', MATCH_UPDATE_INTERVAL,
+                 lambda: scrape_and_update_recent_matches(vlr_scraper, bo3_scraper, limit=LIVE_MATCH_LIMIT, priority=PRIORITY_LIVE),
+                 PRIORITY_LIVE),
+    # More comprehensive match update
+    ScheduledJob('matches', COMPREHENSIVE_MATCH_UPDATE_INTERVAL,
+                 lambda: scrape_and_update_recent_matches(vlr_scraper, bo3_scraper, limit=COMPREHENSIVE_MATCH_LIMIT, priority=PRIORITY_MATCHES),
+                 PRIORITY_MATCHES),
+    # Events and their match lists
+    ScheduledJob('events', EVENT_UPDATE_INTERVAL, lambda: update_events(vlr_scraper), PRIORITY_EVENTS),
+    # Failed scrapes whose backoff has expired
+    ScheduledJob('dead_letter_retry', DEAD_LETTER_RETRY_INTERVAL, retry_due_failures, PRIORITY_RETRIES),
+    # Teams and players
+    ScheduledJob('teams', TEAM_UPDATE_INTERVAL, update_teams_and_players, PRIORITY_ROSTERS),
+    # Jobs whose worker died while running them
+    ScheduledJob('job_leases', JOB_LEASE_CHECK_INTERVAL, requeue_expired_jobs, PRIORITY_RETRIES),
+    # Job run history past its retention
+    ScheduledJob('job_runs_prune', JOB_RUN_PRUNE_INTERVAL, prune_job_runs, PRIORITY_RETRIES)
+]
+
+
+def get_scheduler_stats():
+    """
+    Get the last run, duration and request count of every scheduled job
+
+    Returns:
+        dict: Stats per job name
     """
-    Start the scheduler thread
+    return {
+        job.name: {
+            'interval': job.interval,
+            'priority': job.priority,
+            'last_run': job.last_run.isoformat() if job.last_run else None,
+            'next_run': job.next_run.isoformat() if job.next_run else None,
+            'last_duration': job.last_duration,
+            'requests': scheduler_budget.consumed_by.get(job.name, 0),
+            'running': bool(job.thread and job.thread.is_alive())
+        }
+        for job in SCHEDULED_JOBS
+    }
+
+
+def get_budget_report():
+    """
+    Get the scheduler budget's consumption per job class against its share
+
+    Returns:
+        dict: Report per class
+    """
+    return scheduler_budget.report()
+
+
+def start_scheduler(job_workers=JOB_WORKERS):
+    """
+    Start the job workers and one thread per scheduled job.
+    Each job runs when it is next due according to its persisted last run;
+    jobs that never ran start right away.
+
+    Args:
+        job_workers (int): Number of fetch workers to run in this process;
+            0 when separate worker processes run the queue
     """
     try:
-        # Initial data collection
-        logger.info("Performing initial data collection")
-        with app.app_context():
-            scrape_and_update_recent_matches(vlr_scraper, bo3_scraper)
-        
-        # Start scheduler thread
-        scheduler = Thread(target=scheduler_thread, daemon=True)
-        scheduler.start()
-        logger.info("Scheduler thread started")
+        start_workers(job_workers, scheduler_budget)
+
+        for job in SCHEDULED_JOBS:
+            job.start()
+
+        logger.info(f"Scheduler started with {len(SCHEDULED_JOBS)} jobs")
     except Exception as e:
         logger.error(f"Error starting scheduler: {str(e)}")
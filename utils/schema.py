@@ -0,0 +1,42 @@
+import logging
+from sqlalchemy import inspect, text
+from app import db
+
+# Setup logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+
+def sync_schema():
+    """
+    Create missing tables, then add columns and indexes that were added to
+    the models after a table was first created (db.create_all only creates
+    whole tables). Added columns are always created as nullable.
+    """
+    # Register every model's table, not only those imported by the caller
+    import models  # noqa: F401
+
+    db.create_all()
+
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+
+        existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing_columns:
+                continue
+
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            logger.info(f"Adding column {table.name}.{column.name}")
+            with db.engine.begin() as connection:
+                connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+
+        existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                logger.info(f"Creating index {index.name}")
+                index.create(bind=db.engine, checkfirst=True)
@@ -0,0 +1,288 @@
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from app import db
+from models import Team, Player, ScrapeJob
+from scrapers.fetch_state import get_last_fetch, clear_last_fetch
+
+# Setup logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# How long an outbound search result is reused (in seconds) and how many are kept
+SEARCH_CACHE_TTL = 3600
+SEARCH_CACHE_SIZE = 512
+
+# Results asked for by the background search jobs
+SEARCH_JOB_LIMIT = 10
+
+# Shortest cached query that may answer longer queries starting with it
+SEARCH_PREFIX_MIN_LENGTH = 2
+
+
+def normalize_query(query):
+    """
+    Normalize a search query so trivially different spellings share a cache entry
+
+    Args:
+        query (str): Search query
+
+    Returns:
+        str: Lowercased query with collapsed whitespace
+    """
+    return re.sub(r'\s+', ' ', (query or '').lower()).strip()
+
+
+class SearchCache:
+    """
+    Thread-safe LRU cache of search results with a TTL.
+
+    An entry is complete when the search returned fewer results than were
+    asked for, i.e. it holds every match for its query. A complete entry
+    also answers longer queries starting with it ("sen" answers "sent"),
+    by filtering its results by name.
+    """
+
+    def __init__(self, ttl=SEARCH_CACHE_TTL, maxsize=SEARCH_CACHE_SIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.prefix_hits = 0
+        self.misses = 0
+
+    def _get_fresh(self, key, now):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+
+        if now - entry['stored_at'] > self.ttl:
+            del self.entries[key]
+            return None
+
+        self.entries.move_to_end(key)
+        return entry
+
+    def get(self, kind, query, limit):
+        """
+        Look up the results of a search
+
+        Args:
+            kind (str): teams or players
+            query (str): Normalized query
+            limit (int): Maximum number of results wanted
+
+        Returns:
+            list: Cached results, or None on a miss
+        """
+        now = time.monotonic()
+
+        with self.lock:
+            entry = self._get_fresh((kind, query), now)
+            if entry is not None and (entry['complete'] or len(entry['results']) >= limit):
+                self.hits += 1
+                return entry['results'][:limit]
+
+            for length in range(len(query) - 1, SEARCH_PREFIX_MIN_LENGTH - 1, -1):
+                entry = self._get_fresh((kind, query[:length]), now)
+                if entry is not None and entry['complete']:
+                    self.prefix_hits += 1
+                    return [result for result in entry['results'] if query in normalize_query(result.get('name'))][:limit]
+
+            self.misses += 1
+            return None
+
+    def put(self, kind, query, results, complete):
+        """
+        Store the results of a search
+
+        Args:
+            kind (str): teams or players
+            query (str): Normalized query
+            results (list): Search results
+            complete (bool): True if the results hold every match for the query
+        """
+        with self.lock:
+            self.entries[(kind, query)] = {
+                'results': results,
+                'complete': complete,
+                'stored_at': time.monotonic()
+            }
+            self.entries.move_to_end((kind, query))
+
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'size': len(self.entries),
+                'hits': self.hits,
+                'prefix_hits': self.prefix_hits,
+                'misses': self.misses
+            }
+
+
+search_cache = SearchCache()
+
+
+def cached_search(kind, query, search_function, limit=10):
+    """
+    Run an outbound search through the cache
+
+    Failed searches (request or parse errors) are not cached, so an error
+    page is never stored as a complete empty result.
+
+    Args:
+        kind (str): teams or players
+        query (str): Search query as given by the client
+        search_function: Scraper search function taking (query, limit)
+        limit (int): Maximum number of results
+
+    Returns:
+        list: Search results, or None if the search failed
+    """
+    query = normalize_query(query)
+
+    results = search_cache.get(kind, query, limit)
+    if results is not None:
+        return results
+
+    clear_last_fetch()
+    results = search_function(query, limit=limit)
+
+    if get_last_fetch().get('error_class'):
+        return None
+
+    search_cache.put(kind, query, results, complete=len(results) < limit)
+    return results
+
+
+def get_stored_search(kind, query, limit=10, now=None):
+    """
+    Look up the results of a search job that succeeded within the cache TTL.
+
+    Searches run on the scraper workers, so their in-memory cache is not the
+    web process's; the results saved with the job are readable by every process.
+
+    Args:
+        kind (str): teams or players
+        query (str): Normalized query
+        limit (int): Maximum number of results wanted
+        now (datetime, optional): Current time
+
+    Returns:
+        list: Stored results, or None if no recent search job has them
+    """
+    now = now or datetime.utcnow()
+
+    job = ScrapeJob.query.filter(
+        ScrapeJob.kind == f'search_{kind}',
+        ScrapeJob.target_id == query,
+        ScrapeJob.status == 'succeeded',
+        ScrapeJob.finished_at > now - timedelta(seconds=SEARCH_CACHE_TTL)
+    ).order_by(ScrapeJob.finished_at.desc()).first()
+
+    results = (json.loads(job.result) if job and job.result else {}).get('results')
+    if results is None:
+        return None
+
+    # Search jobs ask for SEARCH_JOB_LIMIT results, so fewer means every match
+    search_cache.put(kind, query, results, complete=len(results) < SEARCH_JOB_LIMIT)
+    return results[:limit]
+
+
+def get_cached_search(kind, query, limit=10):
+    """
+    Look up an outbound search in the cache, or in the results of a recent
+    search job, without fetching anything. An empty list is a search that
+    found nothing.
+
+    Returns:
+        list: Cached results, or None on a miss
+    """
+    query = normalize_query(query)
+
+    results = search_cache.get(kind, query, limit)
+    if results is None:
+        results = get_stored_search(kind, query, limit)
+    return results
+
+
+def persist_team_results(teams):
+    """
+    Store teams found by an outbound search that are not in the database yet,
+    so later searches are answered locally. Existing teams are left untouched.
+
+    Args:
+        teams (list): Team dictionaries from vlr_scraper.search_teams
+
+    Returns:
+        int: Number of teams added
+    """
+    try:
+        team_ids = [team['id'] for team in teams if team.get('id') and team.get('name')]
+        if not team_ids:
+            return 0
+
+        known = {team_id for (team_id,) in db.session.query(Team.id).filter(Team.id.in_(team_ids)).all()}
+
+        added = 0
+        for team in teams:
+            if team.get('id') in team_ids and team['id'] not in known:
+                # Details are fetched by the next team update
+                db.session.add(Team(id=team['id'], name=team['name'], last_updated=None))
+                known.add(team['id'])
+                added += 1
+
+        if added:
+            db.session.commit()
+            logger.info(f"Stored {added} teams from search results")
+        return added
+
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error in persist_team_results: {str(e)}")
+        return 0
+
+
+def persist_player_results(players):
+    """
+    Store players found by an outbound search that are not in the database yet,
+    so later searches are answered locally. Existing players are left untouched.
+
+    Args:
+        players (list): Player dictionaries from player_scraper.search_players
+
+    Returns:
+        int: Number of players added
+    """
+    try:
+        player_ids = [player['id'] for player in players if player.get('id') and player.get('name')]
+        if not player_ids:
+            return 0
+
+        known = {player_id for (player_id,) in db.session.query(Player.id).filter(Player.id.in_(player_ids)).all()}
+
+        added = 0
+        for player in players:
+            if player.get('id') in player_ids and player['id'] not in known:
+                # The team is set when the player's details are refreshed
+                db.session.add(Player(id=player['id'], name=player['name'], last_updated=None))
+                known.add(player['id'])
+                added += 1
+
+        if added:
+            db.session.commit()
+            logger.info(f"Stored {added} players from search results")
+        return added
+
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error in persist_player_results: {str(e)}")
+        return 0
@@ -0,0 +1,500 @@
+import heapq
+import itertools
+import json
+import logging
+import math
+import random
+from utils.rate_budget import BudgetAllocator, BUDGET_CLASS_WEIGHTS, SCHEDULER_REQUESTS_PER_MINUTE
+from utils.schedule_config import (
+    MATCH_UPDATE_INTERVAL, COMPREHENSIVE_MATCH_UPDATE_INTERVAL, TEAM_UPDATE_INTERVAL, EVENT_UPDATE_INTERVAL,
+    DEAD_LETTER_RETRY_INTERVAL, LIVE_MATCH_LIMIT, COMPREHENSIVE_MATCH_LIMIT, MATCH_LISTING_LIMIT,
+    MATCH_LISTING_REUSE_WINDOW, MATCH_DETAIL_REUSE_WINDOW, JOB_WORKERS, PRIORITY_BUDGET_CLASSES,
+    PRIORITY_LIVE, PRIORITY_MATCHES, PRIORITY_EVENTS, PRIORITY_RETRIES, PRIORITY_ROSTERS, PRIORITY_PLAYERS
+)
+from utils.stats import percentile
+
+# Setup logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# Defaults of the synthetic match calendar
+SIM_MATCH_DURATION = (60 * 60, 150 * 60)  # Match length range (in seconds)
+SIM_SCORE_CHANGE_INTERVAL = 6 * 60  # Average time between score changes of a live match (in seconds)
+SIM_SOURCE_LATENCY = 1.5  # Median response time of the source site (in seconds)
+SIM_LATENCY_SIGMA = 0.5  # Spread of the log-normal latency
+
+# Other consumers of the request budget, as rough per-run request counts:
+# scheduled crawls making their requests one at a time on their own thread,
+# and jobs queued for the job workers behind the match jobs
+SIM_BACKGROUND_LOAD = {
+    'events': {'interval': EVENT_UPDATE_INTERVAL, 'requests': 10, 'priority': PRIORITY_EVENTS, 'queued': False},
+    'dead_letter_retry': {'interval': DEAD_LETTER_RETRY_INTERVAL, 'requests': 2, 'priority': PRIORITY_RETRIES, 'queued': False},
+    'rosters': {'interval': TEAM_UPDATE_INTERVAL, 'requests': 40, 'priority': PRIORITY_ROSTERS, 'queued': True},
+    'players': {'interval': TEAM_UPDATE_INTERVAL, 'requests': 200, 'priority': PRIORITY_PLAYERS, 'queued': True}
+}
+
+
+class SchedulerPolicy:
+    """
+    Knobs of the match scheduling policy the simulator replays: pass
+    intervals and listing sizes, the work sharing windows, job workers, the
+    request budget with its class weights, and the other work drawing from
+    the budget.
+    """
+
+    def __init__(self, live_interval=MATCH_UPDATE_INTERVAL, live_limit=LIVE_MATCH_LIMIT,
+                 full_interval=COMPREHENSIVE_MATCH_UPDATE_INTERVAL, full_limit=COMPREHENSIVE_MATCH_LIMIT,
+                 listing_limit=MATCH_LISTING_LIMIT, listing_reuse_window=MATCH_LISTING_REUSE_WINDOW,
+                 detail_reuse_window=MATCH_DETAIL_REUSE_WINDOW, workers=JOB_WORKERS,
+                 requests_per_minute=SCHEDULER_REQUESTS_PER_MINUTE, burst=2, completed_listed_for=0,
+                 weights=None, background=None):
+        self.live_interval = live_interval
+        self.live_limit = live_limit
+        self.full_interval = full_interval
+        self.full_limit = full_limit
+        self.listing_limit = listing_limit
+        self.listing_reuse_window = listing_reuse_window
+        self.detail_reuse_window = detail_reuse_window
+        self.workers = workers
+        self.requests_per_minute = requests_per_minute
+        self.burst = burst
+        # How long a finished match stays on the /matches listing (in seconds)
+        self.completed_listed_for = completed_listed_for
+        self.weights = dict(weights or BUDGET_CLASS_WEIGHTS)
+        # Other consumers of the budget, see SIM_BACKGROUND_LOAD; {} for none
+        self.background = dict(SIM_BACKGROUND_LOAD if background is None else background)
+
+    @classmethod
+    def from_scheduler(cls, **overrides):
+        """
+        Build the policy the production scheduler currently uses
+
+        Args:
+            overrides: Policy values to change
+
+        Returns:
+            SchedulerPolicy: The policy
+        """
+        return cls(**{key: value for key, value in overrides.items() if value is not None})
+
+    def to_dict(self):
+        return dict(vars(self))
+
+
+class SimulatedMatch:
+    """
+    A match of the calendar. Its version increases with every change a
+    client would notice: going live, every score change and finishing.
+    """
+
+    def __init__(self, match_id, start, duration, score_changes):
+        self.id = str(match_id)
+        self.start = start
+        self.end = start + duration
+        self.score_changes = sorted(start + offset for offset in score_changes if 0 < offset < duration)
+
+    def get_changes(self):
+        """
+        Get every change of the match as (time, state) pairs
+        """
+        return [(self.start, 'went_live')] + [(time, 'score') for time in self.score_changes] + [(self.end, 'completed')]
+
+    def get_version(self, now):
+        return sum(1 for time, _ in self.get_changes() if time <= now)
+
+    def get_status(self, now):
+        if now < self.start:
+            return 'upcoming'
+        if now < self.end:
+            return 'live'
+        return 'completed'
+
+
+def generate_calendar(matches=60, hours=24, seed=None):
+    """
+    Generate a synthetic match calendar
+
+    Args:
+        matches (int): Number of matches
+        hours (int): Span the matches start in
+        seed (int, optional): Random seed, for repeatable runs
+
+    Returns:
+        list: SimulatedMatch objects
+    """
+    rng = random.Random(seed)
+    calendar = []
+
+    for number in range(matches):
+        start = rng.uniform(0, hours * 3600)
+        duration = rng.uniform(*SIM_MATCH_DURATION)
+
+        score_changes = []
+        offset = rng.expovariate(1.0 / SIM_SCORE_CHANGE_INTERVAL)
+        while offset < duration:
+            score_changes.append(offset)
+            offset += rng.expovariate(1.0 / SIM_SCORE_CHANGE_INTERVAL)
+
+        calendar.append(SimulatedMatch(number + 1, start, duration, score_changes))
+
+    return calendar
+
+
+def load_calendar(path):
+    """
+    Load a recorded match calendar from a JSON file: a list of objects with
+    id, start and duration, and score_changes as offsets from the start
+    (all in seconds, start relative to the beginning of the simulation)
+
+    Returns:
+        list: SimulatedMatch objects
+    """
+    with open(path) as calendar_file:
+        entries = json.load(calendar_file)
+
+    return [
+        SimulatedMatch(entry['id'], float(entry['start']), float(entry['duration']), entry.get('score_changes', []))
+        for entry in entries
+    ]
+
+
+class VirtualBudget(BudgetAllocator):
+    """
+    The scheduler's budget allocator on the virtual clock: the same class
+    shares, borrowing and live preemption, with tokens earned in simulated
+    time. Requests wait in the allocator's queues until grant() hands them
+    their token.
+    """
+
+    def __init__(self, requests_per_minute, burst=1, weights=None):
+        super().__init__('simulation', requests_per_minute, weights=weights, classes=PRIORITY_BUDGET_CLASSES, burst=burst)
+        self.updated = 0.0
+        self.requests = {}
+
+    def add(self, now, priority, request):
+        """
+        Queue a request for a token
+
+        Args:
+            now (float): Current virtual time
+            priority (int): Request priority, which selects the class
+            request: What to send once the token is granted
+        """
+        ticket = (priority, next(self.sequence))
+        self._add_waiter(self.get_class(priority), ticket)
+        self.requests[ticket] = (request, now)
+
+    def next_grant(self, now):
+        """
+        Get when the next token can be granted
+
+        Returns:
+            float: Virtual time of the next grant, None if nothing is waiting
+        """
+        if not self.requests:
+            return None
+        self._refill(now)
+        return now if self.tokens >= 1 else now + (1 - self.tokens) * self.interval
+
+    def grant(self, now):
+        """
+        Hand the next token to the request the allocator picks
+
+        Returns:
+            The granted request, or None if no token is available yet
+        """
+        self._refill(now)
+        chosen = self._next_ticket()
+        # Allow for rounding in next_grant's time
+        if chosen is None or self.tokens < 1 - 1e-9:
+            return None
+
+        budget_class, ticket = chosen
+        self.tokens = max(self.tokens - 1, 0.0)
+        request, queued_at = self.requests.pop(ticket)
+        self._serve_next(budget_class, now - queued_at)
+        return request
+
+
+class SchedulerSimulation:
+    """
+    Discrete-event simulation of the match passes, the job queue and the
+    source site on a virtual clock.
+
+    Two passes list matches at their own interval, share listings and
+    skip matches fetched within the reuse windows, and queue detail jobs
+    (quick pass at live priority). Identical unfinished jobs, queued or in
+    flight, are merged. A fixed number of workers run the queue, which also
+    holds the roster and player jobs, and every request waits for a token
+    from the budget allocator, shared with the scheduled crawls. The source
+    responds with log-normal latency, and a fetch observes the match as it
+    is when the request is sent.
+    """
+
+    def __init__(self, calendar, policy, latency=SIM_SOURCE_LATENCY, seed=None):
+        self.calendar = calendar
+        self.policy = policy
+        self.latency = latency
+        self.rng = random.Random(seed)
+        self.budget = VirtualBudget(policy.requests_per_minute, policy.burst, policy.weights)
+        self.grant_at = None
+        self.events = []
+        self.sequence = itertools.count()
+        self.queue = []
+        self.queued = {}
+        self.in_flight = set()
+        self.idle_workers = policy.workers
+        self.listing = None
+        self.listing_waiters = None
+        self.fetched_at = {}
+        self.last_version = {}
+        self.observations = {}
+        self.requests = {'listing': 0, 'detail': 0, 'other': 0}
+        self.outstanding = {name: 0 for name in policy.background}
+        self.rerun = set()
+        self.listing_reuses = 0
+        self.wasted = 0
+        self.deduplicated = 0
+
+    def schedule(self, time, kind, data=None):
+        heapq.heappush(self.events, (time, next(self.sequence), kind, data))
+
+    def get_latency(self):
+        return self.rng.lognormvariate(math.log(self.latency), SIM_LATENCY_SIGMA)
+
+    def get_listing(self, now):
+        listed = [match for match in self.calendar if now < match.end + self.policy.completed_listed_for]
+        # Live matches first, then upcoming ones by start time
+        listed.sort(key=lambda match: (match.get_status(now) != 'live', match.start))
+        return listed[:self.policy.listing_limit]
+
+    def request(self, now, priority, kind, data=None):
+        """
+        Ask the budget for a token to send a request with
+        """
+        self.budget.add(now, priority, (kind, data))
+        self.arm_grant(now)
+
+    def arm_grant(self, now):
+        grant_at = self.budget.next_grant(now)
+        if grant_at is not None and (self.grant_at is None or grant_at < self.grant_at):
+            self.grant_at = grant_at
+            self.schedule(grant_at, 'grant')
+
+    def send(self, now, kind, data):
+        """
+        Send a request that got its token; the response arrives after the source's latency
+        """
+        response_at = now + self.get_latency()
+        if kind == 'listing':
+            self.requests['listing'] += 1
+            self.schedule(response_at, 'listing', self.get_listing(now))
+        elif kind == 'detail':
+            self.requests['detail'] += 1
+            self.schedule(response_at, 'detail', (data, data.get_version(now)))
+        else:
+            self.requests['other'] += 1
+            self.schedule(response_at, kind, data)
+
+    def run_pass(self, now, limit, priority):
+        if self.listing and now - self.listing[0] <= self.policy.listing_reuse_window:
+            self.listing_reuses += 1
+            self.enqueue(self.listing[0], self.listing[1][:limit], priority)
+            return
+
+        # A pass asking while the other one's listing request is in flight waits for it
+        if self.listing_waiters is not None:
+            self.listing_reuses += 1
+            self.listing_waiters.append((priority, limit))
+            return
+
+        self.listing_waiters = [(priority, limit)]
+        self.request(now, priority, 'listing')
+
+    def enqueue(self, now, matches, priority):
+        for match in matches:
+            if now - self.fetched_at.get(match.id, -math.inf) <= self.policy.detail_reuse_window:
+                continue
+
+            # A match being fetched already has its unfinished job
+            if match.id in self.in_flight:
+                self.deduplicated += 1
+                continue
+
+            if match.id in self.queued:
+                self.deduplicated += 1
+                if priority < self.queued[match.id]:
+                    self.queued[match.id] = priority
+                    heapq.heappush(self.queue, (priority, next(self.sequence), 'detail', match))
+                continue
+
+            self.queued[match.id] = priority
+            heapq.heappush(self.queue, (priority, next(self.sequence), 'detail', match))
+
+        self.dispatch(now)
+
+    def dispatch(self, now):
+        while self.idle_workers and self.queue:
+            priority, _, kind, data = heapq.heappop(self.queue)
+            if kind == 'detail':
+                # Entries superseded by a priority raise are skipped
+                if self.queued.get(data.id) != priority:
+                    continue
+                del self.queued[data.id]
+                self.in_flight.add(data.id)
+
+            self.idle_workers -= 1
+            self.request(now, priority, kind, data)
+
+    def run_background(self, now, name):
+        """
+        Start a run of another consumer of the budget
+        """
+        consumer = self.policy.background[name]
+
+        if consumer['queued']:
+            # Jobs still unfinished from the previous run are merged with the new ones
+            added = max(consumer['requests'] - self.outstanding[name], 0)
+            for _ in range(added):
+                heapq.heappush(self.queue, (consumer['priority'], next(self.sequence), 'job_done', name))
+            self.outstanding[name] += added
+            self.dispatch(now)
+        elif self.outstanding[name]:
+            # A scheduled job runs again right after a run that overran its interval
+            self.rerun.add(name)
+        else:
+            self.outstanding[name] = consumer['requests']
+            self.request(now, consumer['priority'], 'crawl_done', name)
+
+    def run(self, duration):
+        """
+        Run the simulation
+
+        Args:
+            duration (float): Simulated time in seconds
+
+        Returns:
+            dict: Report, see get_report
+        """
+        self.schedule(0.0, 'live_pass')
+        self.schedule(0.0, 'full_pass')
+        for name in self.policy.background:
+            self.schedule(0.0, 'background', name)
+
+        while self.events:
+            now, _, kind, data = heapq.heappop(self.events)
+            if now > duration:
+                break
+
+            if kind == 'grant':
+                self.grant_at = None
+                granted = self.budget.grant(now)
+                if granted:
+                    self.send(now, *granted)
+                self.arm_grant(now)
+            elif kind == 'live_pass':
+                self.run_pass(now, self.policy.live_limit, PRIORITY_LIVE)
+                self.schedule(now + self.policy.live_interval, 'live_pass')
+            elif kind == 'full_pass':
+                self.run_pass(now, self.policy.full_limit, PRIORITY_MATCHES)
+                self.schedule(now + self.policy.full_interval, 'full_pass')
+            elif kind == 'background':
+                self.run_background(now, data)
+                self.schedule(now + self.policy.background[data]['interval'], 'background', data)
+            elif kind == 'listing':
+                self.listing = (now, data)
+                waiters, self.listing_waiters = self.listing_waiters, None
+                for priority, limit in sorted(waiters):
+                    self.enqueue(now, data[:limit], priority)
+            elif kind == 'detail':
+                match, version = data
+                # A fetch that shows nothing new since the previous one was wasted
+                if version == self.last_version.get(match.id):
+                    self.wasted += 1
+                self.last_version[match.id] = version
+                self.observations.setdefault(match.id, []).append((now, version))
+                self.fetched_at[match.id] = now
+                self.in_flight.discard(match.id)
+                self.idle_workers += 1
+                self.dispatch(now)
+            elif kind == 'job_done':
+                self.outstanding[data] -= 1
+                self.idle_workers += 1
+                self.dispatch(now)
+            elif kind == 'crawl_done':
+                # Scheduled crawls make their requests one after another
+                self.outstanding[data] -= 1
+                if self.outstanding[data]:
+                    self.request(now, self.policy.background[data]['priority'], 'crawl_done', data)
+                elif data in self.rerun:
+                    self.rerun.discard(data)
+                    self.run_background(now, data)
+
+        return self.get_report(duration)
+
+    def get_report(self, duration):
+        """
+        Report freshness lag per change state, requests spent, wasted
+        fetches and the budget's consumption per class
+
+        The lag of a change is the time from the change until a fetch first
+        returned it; changes never returned are counted as missed.
+
+        Returns:
+            dict: Report
+        """
+        lags = {'went_live': [], 'score': [], 'completed': []}
+        missed = {state: 0 for state in lags}
+
+        for match in self.calendar:
+            observations = self.observations.get(match.id, [])
+            for version, (changed_at, state) in enumerate(match.get_changes(), start=1):
+                if changed_at > duration:
+                    continue
+
+                seen_at = next((time for time, seen in observations if seen >= version and time >= changed_at), None)
+                if seen_at is None:
+                    missed[state] += 1
+                else:
+                    lags[state].append(seen_at - changed_at)
+
+        total_requests = sum(self.requests.values())
+        return {
+            'policy': self.policy.to_dict(),
+            'simulated_hours': round(duration / 3600, 2),
+            'matches': len(self.calendar),
+            'freshness': {
+                state: {
+                    'changes': len(values) + missed[state],
+                    'p50': round(percentile(values, 0.5), 1) if values else None,
+                    'p95': round(percentile(values, 0.95), 1) if values else None,
+                    'max': round(max(values), 1) if values else None,
+                    'missed': missed[state]
+                }
+                for state, values in lags.items()
+            },
+            'requests': dict(self.requests, total=total_requests,
+                             per_minute=round(total_requests / (duration / 60), 2) if duration else None),
+            'budget': self.budget.report(),
+            'listing_reuses': self.listing_reuses,
+            'deduplicated': self.deduplicated,
+            'wasted_fetches': self.wasted,
+            'wasted_share': round(self.wasted / self.requests['detail'], 3) if self.requests['detail'] else 0.0
+        }
+
+
+def simulate(policy, calendar, duration, latency=SIM_SOURCE_LATENCY, seed=None):
+    """
+    Replay a match calendar against a scheduling policy
+
+    Args:
+        policy (SchedulerPolicy): Policy to evaluate
+        calendar (list): SimulatedMatch objects
+        duration (float): Simulated time in seconds
+        latency (float): Median source response time in seconds
+        seed (int, optional): Random seed of the latency model
+
+    Returns:
+        dict: Report
+    """
+    return SchedulerSimulation(calendar, policy, latency=latency, seed=seed).run(duration)
@@ -0,0 +1,18 @@
+import math
+
+
+def percentile(values, fraction):
+    """
+    Get a percentile of a list of values by the nearest-rank method
+
+    Args:
+        values (list): Numbers, in any order
+        fraction (float): Percentile as a fraction, e.g. 0.95
+
+    Returns:
+        float: The value at the percentile, or None if there are no values
+    """
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(math.ceil(fraction * len(values))) - 1, len(values) - 1)] if fraction > 0 else values[0]
@@ -0,0 +1,117 @@
+import logging
+import queue
+import time
+from threading import Thread
+from app import app, db
+from scrapers.fetch_state import get_last_fetch
+from utils.refresh_jobs import claim_next_job, fetch_job, store_job, get_job, JOB_POLL_INTERVAL
+from utils.rate_budget import use_budget
+from utils.job_metrics import track_run
+
+# Setup logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# Fetched pages waiting for the writer; fetch workers block when it is full
+WRITE_QUEUE_SIZE = 50
+
+
+def fetch_worker(budget, writes=None, poll_interval=JOB_POLL_INTERVAL):
+    """
+    Claim queued jobs and fetch their pages, most urgent first. Each job draws
+    on the budget at its own priority.
+
+    Args:
+        budget (PriorityRateBudget): Rate budget shared by the process's fetch workers
+        writes (queue.Queue, optional): Writer queue; without one the worker
+            stores what it fetched itself
+        poll_interval (int): Seconds to wait when no job is queued
+    """
+    with app.app_context():
+        logger.info("Starting fetch worker")
+
+        while True:
+            try:
+                job = claim_next_job()
+                if not job:
+                    time.sleep(poll_interval)
+                    continue
+
+                with track_run(job.kind, 'queue', job.id) as run:
+                    with use_budget(budget.share(job.kind, job.priority)):
+                        fetched, payload = fetch_job(job)
+
+                    if fetched and writes is None:
+                        store_job(job, payload)
+                    elif fetched:
+                        # The writer continues and saves the run
+                        run.handed_off = True
+
+                if fetched and writes is not None:
+                    # Jobs are reloaded by the writer's own session; the
+                    # request goes along for a failure to be filed with it
+                    writes.put((job.id, payload, run, get_last_fetch()))
+                    db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Error in fetch worker: {str(e)}")
+                time.sleep(poll_interval)
+
+
+def writer_worker(writes):
+    """
+    Store fetched pages one at a time, so database writes do not contend
+    with each other (SQLite allows a single writer)
+
+    Args:
+        writes (queue.Queue): (job ID, payload, run, fetch outcome) tuples from the fetch workers
+    """
+    with app.app_context():
+        logger.info("Starting writer")
+
+        while True:
+            job_id, payload, run, fetch = writes.get()
+            try:
+                with track_run(run.job_name, run=run):
+                    job = get_job(job_id)
+                    if job and job.status == 'running':
+                        store_job(job, payload, fetch=fetch)
+                    else:
+                        run.fail("Job no longer running")
+                        logger.warning(f"Dropping fetched page of job {job_id}: no longer running")
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Error storing job {job_id}: {str(e)}")
+            finally:
+                writes.task_done()
+
+
+def start_workers(fetchers, budget, writer=False, poll_interval=JOB_POLL_INTERVAL):
+    """
+    Start the fetch workers and, optionally, a single writer
+
+    Args:
+        fetchers (int): Number of fetch worker threads
+        budget (PriorityRateBudget): Rate budget shared by the fetch workers
+        writer (bool): Hand fetched pages to one writer thread instead of
+            storing them on the fetch threads
+        poll_interval (int): Seconds an idle fetch worker waits between polls
+
+    Returns:
+        list: Started threads
+    """
+    threads = []
+    writes = queue.Queue(maxsize=WRITE_QUEUE_SIZE) if writer else None
+
+    if writer:
+        threads.append(Thread(target=writer_worker, args=(writes,), name="job-writer", daemon=True))
+
+    for number in range(fetchers):
+        threads.append(Thread(target=fetch_worker, args=(budget, writes, poll_interval),
+                              name=f"job-fetcher-{number}", daemon=True))
+
+    for thread in threads:
+        thread.start()
+
+    logger.info(f"Started {fetchers} fetch workers{' and a writer' if writer else ''}")
+    return threads